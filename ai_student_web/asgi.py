@@ -0,0 +1,19 @@
+"""
+ASGI config for ai_student_web project.
+
+It exposes the ASGI callable as a module-level variable named ``application``
+and switches the summarizer to its async views, so one process can serve many
+concurrent summaries while they wait on YouTube and the LLM providers.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_student_web.settings')
+os.environ.setdefault('SUMMARIZER_ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
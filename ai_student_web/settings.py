@@ -53,6 +53,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ai_student_web.wsgi.application'
+ASGI_APPLICATION = 'ai_student_web.asgi.application'
+
+# Route the network-bound views to their async versions (set by the ASGI entry point)
+SUMMARIZER_ASYNC_VIEWS = os.environ.get('SUMMARIZER_ASYNC_VIEWS', 'False') == 'True'
 
 # Database config for Railway
 DATABASES = {
@@ -90,9 +94,28 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caches: pipeline results go to the 'results' alias. The file backend is shared by
+# all workers on one node; point RESULT_CACHE_BACKEND/LOCATION at Redis or
+# Memcached to share results across a cluster.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'results': {
+        'BACKEND': os.environ.get('RESULT_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('RESULT_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'results')),
+        'TIMEOUT': int(os.environ.get('RESULT_CACHE_TTL', str(7 * 24 * 3600))),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '5000')),
+        },
+    },
+}
+
 # Session config
 SESSION_COOKIE_AGE = 3600
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessions hold only result ids (see result_store.py); saving only when they change
+# avoids rewriting the session row on every request
+SESSION_SAVE_EVERY_REQUEST = os.environ.get('SESSION_SAVE_EVERY_REQUEST', 'False') == 'True'
 
 # CSRF settings
 CSRF_COOKIE_SECURE = not DEBUG
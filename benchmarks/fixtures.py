@@ -0,0 +1,88 @@
+import os
+import json
+import random
+from typing import Dict, List
+
+from transcript_index import TranscriptIndex
+
+# Synthetic fixture lengths (minutes), 5 minutes to 6 hours
+FIXTURE_MINUTES = (5, 30, 60, 180, 360)
+# Recorded transcripts: JSON files written by `run.py --record`
+RECORDED_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Each topic's vocabulary; a lecture drifts from one topic to the next
+TOPICS = [
+    'gradient descent learning rate loss function minimum convergence step parameters optimizer momentum',
+    'neural network layer neuron activation weights bias hidden output input sigmoid',
+    'probability distribution random variable expectation variance sample mean gaussian likelihood prior',
+    'matrix vector eigenvalue linear transformation basis dimension rank determinant inverse projection',
+    'database table query index transaction join schema primary key row column',
+    'photosynthesis chlorophyll light energy glucose carbon dioxide oxygen leaf plant cell',
+    'supply demand price market equilibrium consumer producer elasticity curve tax',
+    'recursion function base case stack call tree depth memoization subproblem algorithm',
+    'thermodynamics heat entropy temperature energy system work engine pressure volume',
+    'french revolution monarchy republic king assembly rights citizens paris napoleon reform',
+    'cell membrane protein nucleus dna replication enzyme mitochondria ribosome transcription',
+    'sorting array comparison quicksort pivot merge partition complexity linear logarithmic',
+]
+FILLER = 'so and the we you this that is to of a in it now here just going look at'.split()
+OPENERS = ['so', 'now', 'okay so', 'and then', 'right so', 'next']
+
+def synthetic_transcript(minutes: float, seed: int = 0) -> List[Dict]:
+    """Deterministic lecture-like captions in the youtube-transcript-api list format
+
+    Topics change every few minutes, about half of the captions end a
+    sentence, and some stretches have no punctuation at all, as in
+    auto-generated captions.
+    """
+    rng = random.Random(seed)
+    topic_words = [topic.split() for topic in TOPICS]
+    transcript = []
+    t = 0.0
+    topic = 0
+    punctuated = True
+    while t < minutes * 60:
+        if rng.random() < 0.006:
+            topic = (topic + rng.randint(1, len(TOPICS) - 1)) % len(TOPICS)
+        if rng.random() < 0.01:
+            punctuated = not punctuated
+
+        words = [rng.choice(OPENERS)] if rng.random() < 0.15 else []
+        words += [
+            rng.choice(topic_words[topic]) if rng.random() < 0.45 else rng.choice(FILLER)
+            for _ in range(rng.randint(5, 13))
+        ]
+        text = ' '.join(words)
+        if punctuated and rng.random() < 0.5:
+            text += rng.choice(['.', '.', '.', '?'])
+
+        duration = round(rng.uniform(1.8, 4.5), 2)
+        transcript.append({'text': text, 'start': round(t, 2), 'duration': duration})
+        t += duration + (rng.uniform(0.5, 2.0) if rng.random() < 0.05 else 0.0)
+    return transcript
+
+def synthetic_transcript_document(hours: float = 3.0, seed: int = 0) -> Dict:
+    """A synthetic transcript in the TranscriptIndex.to_dict() form the transcript cache persists"""
+    return TranscriptIndex.from_list(synthetic_transcript(hours * 60, seed)).to_dict()
+
+def synthetic_fixtures(minutes=FIXTURE_MINUTES) -> Dict[str, List[Dict]]:
+    return {f'synthetic-{m:g}min': synthetic_transcript(m, seed=int(m)) for m in minutes}
+
+def recorded_fixtures(directory: str = RECORDED_FIXTURES_DIR) -> Dict[str, List[Dict]]:
+    """Recorded transcripts by name; none when the directory is missing"""
+    fixtures = {}
+    if not os.path.isdir(directory):
+        return fixtures
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.json'):
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                data = json.load(f)
+            fixtures[f"recorded-{data.get('name', filename[:-5])}"] = data['transcript']
+    return fixtures
+
+def save_recorded_fixture(name: str, source: str, transcript: List[Dict], directory: str = RECORDED_FIXTURES_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'name': name, 'source': source, 'transcript': transcript}, f)
+    return path
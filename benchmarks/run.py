@@ -0,0 +1,300 @@
+"""Offline micro-benchmarks for the CPU-side pipeline stages
+
+    python benchmarks/run.py                   # run and compare with the saved baseline
+    python benchmarks/run.py --save-baseline   # run and make the results the new baseline
+    python benchmarks/run.py --record URL NAME # save a real transcript as a recorded fixture
+    python benchmarks/run.py --codec           # storage codec size and speed per compression
+
+Exits with status 1 when a stage is slower (or uses more memory) than the
+baseline by more than the threshold, and 2 when there is no baseline to
+compare with. The LLM handler is stubbed and caches
+are kept out of the way, so nothing touches the network or shared state.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+# Shared state goes to a scratch directory; must be set before the project modules load
+os.environ.setdefault('SUMMARIZER_STATE_DIR', tempfile.mkdtemp(prefix='summarizer-bench-'))
+os.environ.setdefault('TRANSCRIPT_CACHE_DISABLED', 'True')
+os.environ.setdefault('SINGLE_FLIGHT_DISABLED', 'True')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core_summarizer
+import storage_codec
+from result_cache import LocalResultBackend, ResultCache
+from steps import run_steps
+from text_utils import simple_sentence_tokenize
+from transcript_index import TranscriptIndex
+from benchmarks.fixtures import (
+    FIXTURE_MINUTES, RECORDED_FIXTURES_DIR, recorded_fixtures, save_recorded_fixture, synthetic_fixtures, synthetic_transcript_document
+)
+from benchmarks.stubs import StubLLMHandler
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Transcript lengths (hours) for the --codec comparison
+CODEC_HOURS = (0.25, 1.0, 3.0)
+# Differences below these are noise, whatever the ratio
+MIN_TIME_DELTA = 0.002  # seconds
+MIN_MEMORY_DELTA = 64 * 1024  # bytes
+
+class Context:
+    """Per-fixture inputs shared by the stages (built once, outside the timings)"""
+
+    def __init__(self, transcript: List[Dict]):
+        self.transcript = transcript
+        self.index = TranscriptIndex.from_list(transcript)
+        self.summarizer = core_summarizer.YouTubeSummarizer()
+        self.summarizer.result_cache = ResultCache(LocalResultBackend())
+        self.boundaries = self.summarizer.analyze_content_structure(TranscriptIndex.from_list(transcript))
+        self.timestamps = self.summarizer.generate_timestamps(TranscriptIndex.from_list(transcript), mode='fast')
+        self.video_info = core_summarizer.VideoInfo(
+            video_id='benchmark00', title='Benchmark lecture', duration='', channel='Benchmarks', upload_date=''
+        )
+        self.full_summary = self.summarizer.llm_handler.generate_content('', task_type='summary')
+        self.document = self.index.to_dict()
+        self.frame = storage_codec.encode(self.document)
+
+    def fresh_index(self) -> TranscriptIndex:
+        # Indexes cache their sentence split, so each timed run gets a new one
+        return TranscriptIndex.from_list(self.transcript)
+
+# name -> (setup, run): setup builds the arguments untimed, run(*args) is timed
+STAGES: Dict[str, Tuple[Callable, Callable]] = {
+    'transcript_index': (lambda ctx: (ctx.transcript,), TranscriptIndex.from_list),
+    'sentence_tokenize': (lambda ctx: (ctx.index.text,), simple_sentence_tokenize),
+    'analyze_content_structure': (
+        lambda ctx: (ctx.summarizer, ctx.fresh_index()),
+        lambda summarizer, index: summarizer.analyze_content_structure(index)
+    ),
+    'detect_topic_boundaries': (
+        lambda ctx: (ctx.summarizer, ctx.fresh_index()),
+        lambda summarizer, index: summarizer._detect_topic_boundaries(index)
+    ),
+    'section_titles_llm_stub': (
+        lambda ctx: (ctx.summarizer, ctx.index, ctx.boundaries),
+        lambda summarizer, index, boundaries: run_steps(summarizer._section_titles_steps(
+            summarizer._section_contexts(index, boundaries)
+        ))
+    ),
+    'section_titles_extractive': (
+        lambda ctx: (ctx.summarizer, ctx.index, ctx.boundaries),
+        lambda summarizer, index, boundaries: summarizer._extractive_titles(index, boundaries)
+    ),
+    'full_summary_prompt': (
+        lambda ctx: (ctx.summarizer, ctx.index, ctx.timestamps, ctx.video_info),
+        lambda summarizer, index, timestamps, video_info: summarizer._build_full_summary_prompt(
+            index.text, timestamps, video_info, index
+        )
+    ),
+    'extractive_summary': (
+        lambda ctx: (ctx.summarizer, ctx.index, ctx.timestamps),
+        lambda summarizer, index, timestamps: summarizer._extractive_summary(index.text, timestamps, index)
+    ),
+    'extract_executive_summary': (
+        lambda ctx: (ctx.summarizer, ctx.full_summary),
+        lambda summarizer, full_summary: summarizer._extract_executive_summary(full_summary)
+    ),
+    'storage_encode': (lambda ctx: (ctx.document,), storage_codec.encode),
+    'storage_decode': (lambda ctx: (ctx.frame,), storage_codec.decode),
+}
+
+def measure(setup: Callable, run: Callable, ctx: Context, repeat: int) -> Dict:
+    """Best and median wall time over repeat runs (after a warm-up run), then peak traced memory of one more"""
+    run(*setup(ctx))
+    durations = []
+    for _ in range(repeat):
+        args = setup(ctx)
+        # As timeit does: a collection landing in one run is noise, not a regression
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(*args)
+            durations.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    args = setup(ctx)
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': min(durations),
+        'median_seconds': statistics.median(durations),
+        'peak_bytes': peak
+    }
+
+def run_benchmarks(fixtures: Dict[str, List[Dict]], stages: List[str], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for fixture_name, transcript in fixtures.items():
+        ctx = Context(transcript)
+        results[fixture_name] = {}
+        for stage in stages:
+            setup, run = STAGES[stage]
+            results[fixture_name][stage] = measure(setup, run, ctx, repeat)
+            stats = results[fixture_name][stage]
+            print(f"{fixture_name:<22} {stage:<28} {stats['seconds'] * 1000:10.2f} ms "
+                  f"{stats['peak_bytes'] / 1024:10.0f} KiB")
+    return results
+
+def compare(results: Dict, baseline: Dict, threshold: float, memory_threshold: float) -> List[str]:
+    """Regressions of results against a baseline, as readable lines"""
+    regressions = []
+    for fixture_name, stages in results.items():
+        for stage, stats in stages.items():
+            base = baseline.get(fixture_name, {}).get(stage)
+            if base is None:
+                continue
+            slower = stats['seconds'] - base['seconds']
+            if slower > MIN_TIME_DELTA and stats['seconds'] > base['seconds'] * (1 + threshold):
+                regressions.append(
+                    f"{fixture_name} {stage}: {stats['seconds'] * 1000:.2f} ms vs "
+                    f"{base['seconds'] * 1000:.2f} ms baseline (+{slower / base['seconds']:.0%})"
+                )
+            grown = stats['peak_bytes'] - base['peak_bytes']
+            if grown > MIN_MEMORY_DELTA and stats['peak_bytes'] > base['peak_bytes'] * (1 + memory_threshold):
+                regressions.append(
+                    f"{fixture_name} {stage}: peak {stats['peak_bytes'] / 1024:.0f} KiB vs "
+                    f"{base['peak_bytes'] / 1024:.0f} KiB baseline (+{grown / max(1, base['peak_bytes']):.0%})"
+                )
+    return regressions
+
+def _best_time(func: Callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_codec(document, repeat: int = 20) -> Dict[str, Dict]:
+    """Size and best-of-repeat encode/decode times of each codec compression against plain json"""
+    results = {}
+    json_body = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    results['json'] = {
+        'bytes': len(json_body),
+        'encode_ms': _best_time(lambda: json.dumps(document, separators=(',', ':')).encode('utf-8'), repeat) * 1000,
+        'decode_ms': _best_time(lambda: json.loads(json_body), repeat) * 1000
+    }
+    for compression in storage_codec.COMPRESSION_IDS:
+        frame = storage_codec.encode(document, compression=compression)
+        if storage_codec.decode(frame) != json.loads(json_body):
+            raise storage_codec.CodecError(f"Round trip mismatch with {compression}")
+        results[f'orjson+{compression}'] = {
+            'bytes': len(frame),
+            'encode_ms': _best_time(lambda: storage_codec.encode(document, compression=compression), repeat) * 1000,
+            'decode_ms': _best_time(lambda: storage_codec.decode(frame), repeat) * 1000
+        }
+    return results
+
+def print_codec_comparison(repeat: int) -> int:
+    for hours in CODEC_HOURS:
+        print(f"\nTranscript, {hours:g}h:")
+        for name, stats in benchmark_codec(synthetic_transcript_document(hours), repeat).items():
+            print(f"  {name:<14} {stats['bytes'] / 1024:9.1f} KiB  "
+                  f"encode {stats['encode_ms']:8.3f} ms  decode {stats['decode_ms']:8.3f} ms")
+    return 0
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'created': datetime.now().isoformat(timespec='seconds')
+    }
+
+def record_fixture(video_url: str, name: str) -> int:
+    """Fetch a real transcript (needs network) and save it as a recorded fixture"""
+    subtitle_result = core_summarizer.YouTubeSummarizer().extract_subtitles(video_url)
+    if not subtitle_result['success']:
+        print(f"Could not fetch transcript: {subtitle_result['error_message']}")
+        return 1
+    index = subtitle_result['transcript_index']
+    transcript = [
+        {'text': index.segment_text(i), 'start': float(index.starts[i]), 'duration': float(index.durations[i])}
+        for i in range(len(index))
+    ]
+    print(f"Saved {save_recorded_fixture(name, video_url, transcript)}")
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the CPU-side pipeline stages")
+    parser.add_argument('--minutes', default=','.join(str(m) for m in FIXTURE_MINUTES),
+                        help="Synthetic fixture lengths, comma separated")
+    parser.add_argument('--no-recorded', action='store_true', help="Skip recorded fixtures")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Stages to run, comma separated")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per stage (the best counts)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help="Allowed peak memory growth")
+    parser.add_argument('--record', nargs=2, metavar=('URL', 'NAME'), help="Save a real transcript as a fixture")
+    parser.add_argument('--codec', action='store_true', help="Compare storage codec compressions and exit")
+    args = parser.parse_args(argv)
+
+    # The pipeline logs every step; keep the table readable
+    logging.disable(logging.INFO)
+    core_summarizer.get_llm_handler = lambda: StubLLMHandler()
+
+    if args.record:
+        return record_fixture(*args.record)
+    if args.codec:
+        return print_codec_comparison(max(1, args.repeat))
+
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+    fixtures = synthetic_fixtures([float(m) for m in args.minutes.split(',') if m])
+    if not args.no_recorded:
+        recorded = recorded_fixtures()
+        if not recorded:
+            print(f"No recorded fixtures in {RECORDED_FIXTURES_DIR}; timing synthetic transcripts only")
+        fixtures.update(recorded)
+
+    results = run_benchmarks(fixtures, stages, max(1, args.repeat))
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # A missing baseline must not read as a pass in CI
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 2
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.threshold, args.memory_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
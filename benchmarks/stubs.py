@@ -0,0 +1,50 @@
+import re
+from typing import AsyncIterator, Iterator, Optional
+
+from prompt_budget import prompt_token_budget
+
+class StubLLMHandler:
+    """Offline stand-in for MultiLLMHandler: instant canned replies shaped like real ones"""
+
+    SUMMARY = (
+        "This lecture introduces the main ideas and works through examples.\n"
+        "It builds each concept step by step before combining them.\n"
+        "The closing part reviews the key results.\n\n"
+    )
+
+    def __init__(self, summary_sections: int = 12):
+        self.summary_sections = summary_sections
+        self.calls = 0
+
+    def generate_content(self, prompt: str, task_type: str = 'general', **kwargs) -> Optional[str]:
+        self.calls += 1
+        if task_type == 'title':
+            match = re.search(r'excerpts from (\d+) consecutive sections', prompt)
+            if match:
+                count = int(match.group(1))
+                return '[' + ', '.join(f'"Topic {i} overview"' for i in range(1, count + 1)) + ']'
+            return 'Topic overview'
+        sections = '\n'.join(
+            f"## {i}:00 - Topic {i}\n- First key point of topic {i}\n- Second key point of topic {i}"
+            for i in range(1, self.summary_sections + 1)
+        )
+        return self.SUMMARY + sections
+
+    async def generate_content_async(self, prompt: str, task_type: str = 'general', **kwargs) -> Optional[str]:
+        return self.generate_content(prompt, task_type, **kwargs)
+
+    def generate_content_stream(self, prompt: str, task_type: str = 'general', **kwargs) -> Iterator[str]:
+        yield self.generate_content(prompt, task_type, **kwargs)
+
+    async def generate_content_stream_async(self, prompt: str, task_type: str = 'general',
+                                            **kwargs) -> AsyncIterator[str]:
+        yield self.generate_content(prompt, task_type, **kwargs)
+
+    def get_model_signature(self) -> str:
+        return 'stub'
+
+    def prompt_token_budget(self, task_tokens: int) -> int:
+        return prompt_token_budget(('gemini', 'mistral'), task_tokens)
+
+    def has_available_provider(self) -> bool:
+        return True
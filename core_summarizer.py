@@ -2,16 +2,36 @@ import os
 import time
 import re
 import json
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
 from dotenv import load_dotenv
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
-from youtube_transcript_api.formatters import TextFormatter
 import requests
+import httpx
 from urllib.parse import urlparse, parse_qs
 import logging
-from llm_handler import MultiLLMHandler
+from concurrent.futures import ThreadPoolExecutor
+from llm_handler import get_llm_handler
+from text_utils import simple_sentence_tokenize, simple_word_tokenize, get_stop_words
+from segmentation import get_segmenter
+from transcript_index import TranscriptIndex
+from transcript_cache import get_transcript_cache
+from http_pool import get_async_client, get_session
+from result_cache import get_result_cache, hash_text, hash_transcript
+from prompt_budget import (
+    SECTION_PROMPT_TOKENS, SUMMARY_PROMPT_TOKENS, TITLE_CONTEXT_TOKENS, TITLE_PROMPT_TOKENS, count_tokens,
+    fit_transcript
+)
+from extractive import ExtractiveSummarizer
+from job_queue import get_job_queue
+from single_flight import get_single_flight
+from steps import Call, Coalesce, Gather, Start, Steps, Wait, run_steps, run_steps_async
+from metrics import get_metrics
+from deadline import (
+    DEADLINE_MIN_CALL_SECONDS, PIPELINE_DEADLINE_SECONDS, Deadline, current_deadline, deadline_scope
+)
 from django.shortcuts import render, redirect
 
 
@@ -22,29 +42,89 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Simple text processing functions to replace NLTK
-def simple_sentence_tokenize(text):
-    """Simple sentence tokenization without NLTK"""
-    # Split on common sentence endings
-    sentences = re.split(r'[.!?]+', text)
-    return [s.strip() for s in sentences if s.strip()]
-
-def simple_word_tokenize(text):
-    """Simple word tokenization without NLTK"""
-    # Split on whitespace and punctuation
-    words = re.findall(r'\b\w+\b', text.lower())
-    return words
-
-def get_stop_words():
-    """Get common English stop words"""
-    return {
-        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 
-        'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with',
-        'i', 'you', 'your', 'we', 'they', 'them', 'this', 'these', 'those', 'but', 'or',
-        'if', 'then', 'else', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each',
-        'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own',
-        'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now'
-    }
+# Bump whenever a prompt template changes so cached results are regenerated
+PROMPT_TEMPLATE_VERSION = '4'
+
+# Section title generation: parallel LLM calls and per-title time budget (seconds)
+TITLE_CONCURRENCY = int(os.getenv('TITLE_CONCURRENCY', '6'))
+TITLE_TIMEOUT = float(os.getenv('TITLE_TIMEOUT', '20'))
+# 'batch' asks for all titles in one call; 'parallel' makes one call per section
+TITLE_MODE = os.getenv('TITLE_MODE', 'batch')
+
+# Transcripts too long for the one-shot prompt budget (see prompt_budget) are
+# summarized per section (map) and then combined (reduce)
+SUMMARY_MAP_CONCURRENCY = int(os.getenv('SUMMARY_MAP_CONCURRENCY', '4'))
+
+# 'full' uses the LLMs; 'fast' builds titles and summary locally in milliseconds
+PROCESSING_MODES = ('full', 'fast')
+# After a fast result, queue the full pipeline so the LLM result replaces it in the cache;
+# full requests that fell back to fast mode are queued once a provider is available again
+FAST_MODE_UPGRADE = os.getenv('FAST_MODE_UPGRADE', 'True') == 'True'
+FAST_MODE_FALLBACK_REASON = 'LLM providers unavailable, fast mode'
+
+# On-demand section summaries: neighbours summarized in the background after a section is opened
+SECTION_PREFETCH_AHEAD = int(os.getenv('SECTION_PREFETCH_AHEAD', '2'))
+SECTION_PREFETCH_BEHIND = int(os.getenv('SECTION_PREFETCH_BEHIND', '1'))
+SECTION_PREFETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SECTION_PREFETCH_WORKERS', '2')), thread_name_prefix='section-prefetch'
+)
+
+# Part of the pipeline deadline kept back for the final summary call (seconds)
+SUMMARY_RESERVE_SECONDS = float(os.getenv('SUMMARY_RESERVE_SECONDS', '30'))
+
+# Watch-page downloads run alongside transcript fetches
+WATCH_PAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('WATCH_PAGE_WORKERS', '8')), thread_name_prefix='watch-page'
+)
+
+def parse_title_list(response: str, count: int) -> Optional[List[Optional[str]]]:
+    """Titles for sections 1..count from an LLM reply, None where one is missing; None if unusable
+
+    Accepts a JSON array (optionally inside a code fence or surrounding prose)
+    of strings or {"title": ...} objects, objects keyed by {"section": n}, or
+    a numbered list. Titles are assigned by position only when the reply has
+    exactly count of them, so a reply that skips a section cannot shift the
+    rest onto the wrong sections; numbered or keyed titles may leave gaps.
+    """
+    text = re.sub(r'```(?:json)?', '', response).strip()
+
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            keyed = [item for item in items if isinstance(item, dict) and isinstance(item.get('section'), int)]
+            if items and len(keyed) == len(items):
+                return _titles_by_number([(item['section'], item.get('title')) for item in keyed], count)
+            if len(items) != count:
+                return None
+            return [item.get('title') if isinstance(item, dict) else item for item in items]
+
+    numbered = re.findall(r'^\s*(\d+)[.):\-]\s*(.+)$', text, re.MULTILINE)
+    if numbered:
+        return _titles_by_number([(int(number), title.strip()) for number, title in numbered], count)
+
+    return None
+
+def _titles_by_number(numbered: List[Tuple[int, Any]], count: int) -> Optional[List]:
+    """Titles placed by section number; None if a number repeats or is out of range"""
+    titles = [None] * count
+    for number, title in numbered:
+        if not 1 <= number <= count or titles[number - 1] is not None:
+            return None
+        titles[number - 1] = title
+    return titles
+
+_transcript_api = None
+
+def get_transcript_api() -> YouTubeTranscriptApi:
+    """Process-wide transcript API client sharing the pooled HTTP session"""
+    global _transcript_api
+    if _transcript_api is None:
+        _transcript_api = YouTubeTranscriptApi(http_client=get_session())
+    return _transcript_api
 
 @dataclass
 class Timestamp:
@@ -61,12 +141,29 @@ class VideoInfo:
     duration: str
     channel: str
     upload_date: str
+    chapters: List[Dict] = field(default_factory=list)
+
+@dataclass
+class WatchPage:
+    """What we parse out of one watch page download"""
+    fetched: bool = False
+    playability_status: Optional[str] = None
+    playability_reason: str = ''
+    restriction: Optional[str] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    chapters: List[Dict] = field(default_factory=list)
+    error_type: Optional[str] = None
+    error_message: Optional[str] = None
 
 class YouTubeSummarizer:
-    def __init__(self):
-        self.llm_handler = MultiLLMHandler()
-        self.text_formatter = TextFormatter()
+    def __init__(self, segmentation_strategy: Optional[str] = None):
+        self.llm_handler = get_llm_handler()
         self.stop_words = get_stop_words()
+        self.segmenter = get_segmenter(segmentation_strategy)
+        self.transcript_cache = get_transcript_cache()
+        self.result_cache = get_result_cache()
+        self.extractive = ExtractiveSummarizer()
         
     def extract_video_id(self, url: str) -> str:
         """Extract video ID from YouTube URL"""
@@ -84,105 +181,151 @@ class YouTubeSummarizer:
         
         raise ValueError("Invalid YouTube URL format")
 
-    def check_video_accessibility(self, url: str) -> Dict:
-        """Check if video is accessible before processing"""
+    def fetch_watch_page(self, video_id: str) -> WatchPage:
+        """Download the watch page once and parse everything later stages need from it"""
+        url = f"https://www.youtube.com/watch?v={video_id}"
         try:
-            response = requests.get(url, timeout=10)
-            content = response.text.lower()
-            
-            # Check for common restriction patterns
-            if "video is restricted" in content:
-                return {
-                    'accessible': False,
-                    'error_type': 'restricted',
-                    'error_message': 'Video is restricted by network/administrator policies'
-                }
-            elif "video unavailable" in content:
-                return {
-                    'accessible': False,
-                    'error_type': 'unavailable',
-                    'error_message': 'Video is unavailable or has been removed'
-                }
-            elif "private video" in content:
-                return {
-                    'accessible': False,
-                    'error_type': 'private',
-                    'error_message': 'Video is private'
-                }
-            elif "age-restricted" in content:
-                return {
-                    'accessible': False,
-                    'error_type': 'age_restricted',
-                    'error_message': 'Video is age-restricted'
-                }
-            else:
-                return {
-                    'accessible': True,
-                    'error_type': None,
-                    'error_message': None
-                }
-        
+            response = get_session().get(url)
+            return self._parse_watch_page(response.text)
         except requests.exceptions.RequestException as e:
+            return WatchPage(error_type='network_error', error_message=f'Network error: {str(e)}')
+        except Exception as e:
+            return WatchPage(error_type='unknown_error', error_message=f'Unknown error: {str(e)}')
+
+    async def fetch_watch_page_async(self, video_id: str) -> WatchPage:
+        """fetch_watch_page on the pooled async client"""
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        try:
+            response = await get_async_client().get(url)
+            return self._parse_watch_page(response.text)
+        except httpx.HTTPError as e:
+            return WatchPage(error_type='network_error', error_message=f'Network error: {str(e)}')
+        except Exception as e:
+            return WatchPage(error_type='unknown_error', error_message=f'Unknown error: {str(e)}')
+
+    def _parse_watch_page(self, content: str) -> WatchPage:
+        """Extract playability, title, author and chapters from watch page HTML"""
+        page = WatchPage(fetched=True)
+
+        status_match = re.search(r'"playabilityStatus":\{"status":"(\w+)"(?:,"reason":"((?:[^"\\]|\\.)*)")?', content)
+        if status_match:
+            page.playability_status = status_match.group(1)
+            page.playability_reason = self._unescape(status_match.group(2) or '')
+
+        # Check for common restriction patterns
+        lowered = content.lower()
+        if "video is restricted" in lowered:
+            page.restriction = 'restricted'
+        elif page.playability_status not in (None, 'OK'):
+            reason = page.playability_reason.lower()
+            if "private" in reason:
+                page.restriction = 'private'
+            elif "age" in reason or "inappropriate" in reason:
+                page.restriction = 'age_restricted'
+            elif page.playability_status in ('ERROR', 'UNPLAYABLE'):
+                page.restriction = 'unavailable'
+        elif page.playability_status is None:
+            # Older page layouts: fall back to plain text markers
+            if "video unavailable" in lowered:
+                page.restriction = 'unavailable'
+            elif "private video" in lowered:
+                page.restriction = 'private'
+            elif "age-restricted" in lowered:
+                page.restriction = 'age_restricted'
+
+        # Extract title and channel from page
+        title_match = re.search(r'"title":"([^"]*)"', content)
+        if title_match:
+            page.title = self._unescape(title_match.group(1))
+        channel_match = re.search(r'"author":"([^"]*)"', content)
+        if channel_match:
+            page.author = self._unescape(channel_match.group(1))
+
+        # Chapters appear once per renderer; keep the first occurrence of each start time
+        seen_starts = set()
+        for chapter_title, start_ms in re.findall(
+                r'"chapterRenderer":\{"title":\{"simpleText":"((?:[^"\\]|\\.)*)"\},"timeRangeStartMillis":(\d+)', content):
+            start_seconds = int(start_ms) / 1000
+            if start_seconds not in seen_starts:
+                seen_starts.add(start_seconds)
+                page.chapters.append({'title': self._unescape(chapter_title), 'start_time': start_seconds})
+        page.chapters.sort(key=lambda chapter: chapter['start_time'])
+
+        return page
+
+    @staticmethod
+    def _unescape(value: str) -> str:
+        try:
+            return value.encode().decode('unicode_escape')
+        except UnicodeDecodeError:
+            return value
+
+    def check_video_accessibility(self, url: str, page: Optional[WatchPage] = None) -> Dict:
+        """Check if video is accessible, reusing an already fetched watch page if given"""
+        if page is None:
+            page = self.fetch_watch_page(self.extract_video_id(url))
+
+        if page.error_type:
             return {
                 'accessible': False,
-                'error_type': 'network_error',
-                'error_message': f'Network error: {str(e)}'
+                'error_type': page.error_type,
+                'error_message': page.error_message
             }
-        except Exception as e:
+
+        messages = {
+            'restricted': 'Video is restricted by network/administrator policies',
+            'unavailable': 'Video is unavailable or has been removed',
+            'private': 'Video is private',
+            'age_restricted': 'Video is age-restricted'
+        }
+        if page.restriction:
             return {
                 'accessible': False,
-                'error_type': 'unknown_error',
-                'error_message': f'Unknown error: {str(e)}'
+                'error_type': page.restriction,
+                'error_message': messages[page.restriction]
             }
+        return {
+            'accessible': True,
+            'error_type': None,
+            'error_message': None
+        }
 
-    def get_video_metadata(self, video_id: str, transcript_data: List[Dict] = None) -> VideoInfo:
+    def get_video_metadata(self, video_id: str, transcript_data: Union[TranscriptIndex, List[Dict], None] = None,
+                           page: Optional[WatchPage] = None) -> VideoInfo:
         """Get video metadata using available information"""
         try:
             # Calculate duration from transcript data if available
             duration_str = "Unknown"
-            if transcript_data:
+            if transcript_data is not None and len(transcript_data):
                 try:
-                    # Handle both dict and object formats
-                    max_time = 0
-                    for entry in transcript_data:
-                        if isinstance(entry, dict):
-                            max_time = max(max_time, entry['start'] + entry['duration'])
-                        else:
-                            max_time = max(max_time, entry.start + entry.duration)
+                    if isinstance(transcript_data, TranscriptIndex):
+                        max_time = transcript_data.duration
+                    else:
+                        # Handle both dict and object formats
+                        max_time = 0
+                        for entry in transcript_data:
+                            if isinstance(entry, dict):
+                                max_time = max(max_time, entry['start'] + entry['duration'])
+                            else:
+                                max_time = max(max_time, entry.start + entry.duration)
                     duration_str = f"{int(max_time // 60)}:{int(max_time % 60):02d}"
                 except Exception as e:
                     logger.warning(f"Could not calculate duration: {e}")
                     duration_str = "Unknown"
             
-            # Try to get additional metadata from YouTube
-            try:
-                url = f"https://www.youtube.com/watch?v={video_id}"
-                response = requests.get(url, timeout=10)
-                content = response.text
-                
-                # Extract title from page
-                title_match = re.search(r'"title":"([^"]*)"', content)
-                title = title_match.group(1) if title_match else "Unknown Title"
-                
-                # Extract channel from page
-                channel_match = re.search(r'"author":"([^"]*)"', content)
-                channel = channel_match.group(1) if channel_match else "Unknown Channel"
-                
-                # Clean up extracted data
-                title = title.encode().decode('unicode_escape')
-                channel = channel.encode().decode('unicode_escape')
-                
-            except Exception as e:
-                logger.warning(f"Could not extract metadata from page: {e}")
-                title = "Unknown Title"
-                channel = "Unknown Channel"
+            # Title, channel and chapters come from the shared watch page
+            if page is None:
+                page = self.fetch_watch_page(video_id)
+            if not page.fetched:
+                logger.warning(f"Could not extract metadata from page: {page.error_message}")
             
             return VideoInfo(
                 video_id=video_id,
-                title=title,
+                title=page.title or "Unknown Title",
                 duration=duration_str,
-                channel=channel,
-                upload_date="Unknown Date"
+                channel=page.author or "Unknown Channel",
+                upload_date="Unknown Date",
+                chapters=page.chapters
             )
             
         except Exception as e:
@@ -195,82 +338,147 @@ class YouTubeSummarizer:
                 upload_date="Unknown Date"
             )
 
+    def _accessibility_error(self, accessibility: Dict) -> Dict:
+        logger.error(f"Video accessibility error: {accessibility['error_message']}")
+        return {
+            'success': False,
+            'error_code': accessibility['error_type'].upper(),
+            'error_message': accessibility['error_message'],
+            'suggestions': self._get_error_suggestions(accessibility['error_type'])
+        }
 
-    def extract_subtitles(self, video_url: str) -> Dict:
+    def extract_subtitles(self, video_url: str, language: str = 'en') -> Dict:
         """Extract subtitles using youtube-transcript-api with proper error handling"""
+        return run_steps(self._extract_subtitles_steps(video_url, language))
+
+    async def extract_subtitles_async(self, video_url: str, language: str = 'en') -> Dict:
+        """extract_subtitles on asyncio: the watch page comes from the async client
+
+        youtube-transcript-api only speaks requests, so the transcript download
+        and the CPU-bound index build run in worker threads.
+        """
+        return await run_steps_async(self._extract_subtitles_steps(video_url, language))
+
+    def _extract_subtitles_steps(self, video_url: str, language: str) -> Steps:
         logger.info("Extracting subtitles...")
         start_time = time.time()
 
         try:
-            # Check video accessibility first
-            accessibility = self.check_video_accessibility(video_url)
-            if not accessibility['accessible']:
-                logger.error(f"Video accessibility error: {accessibility['error_message']}")
-                return {
-                    'success': False,
-                    'error_code': accessibility['error_type'].upper(),
-                    'error_message': accessibility['error_message'],
-                    'suggestions': self._get_error_suggestions(accessibility['error_type'])
-                }
-
             # Extract video ID
             video_id = self.extract_video_id(video_url)
 
-            # Get transcript
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            # Serve repeat requests from the transcript cache
+            cached_result = yield Call(self._get_cached_subtitles, video_id, language, start_time)
+            if cached_result is not None:
+                return cached_result
+
+            # Fetch the watch page in the background while the transcript downloads
+            page_handle = yield Start(
+                WATCH_PAGE_EXECUTOR, self.fetch_watch_page, video_id, async_fn=self.fetch_watch_page_async
+            )
 
-            # Try to get English transcript first
             try:
-                transcript = transcript_list.find_transcript(['en'])
+                transcript, transcript_list, transcript_data = yield Call(self._fetch_transcript, video_id, language)
+            except Exception:
+                # A restricted or private page explains the failure better than the transcript error
+                page = yield from self._watch_page_steps(page_handle)
+                accessibility = self.check_video_accessibility(video_url, page)
+                if not accessibility['accessible']:
+                    return self._accessibility_error(accessibility)
+                raise
+
+            page = yield from self._watch_page_steps(page_handle)
+            return (yield Call(
+                self._finish_subtitles, video_url, video_id, language, page,
+                transcript, transcript_list, transcript_data, start_time
+            ))
+
+        except Exception as e:
+            return self._subtitle_error(e, language)
+
+    def _watch_page_steps(self, page_handle) -> Steps:
+        """The background watch page, or an empty one if the deadline runs out first"""
+        deadline = current_deadline()
+        try:
+            return (yield Wait(page_handle, deadline.timeout()))
+        except TimeoutError:
+            deadline.degrade('watch page timed out, metadata unavailable')
+            return WatchPage()
+
+    def _get_cached_subtitles(self, video_id: str, language: str, start_time: float) -> Optional[Dict]:
+        if self.transcript_cache is None:
+            return None
+        cached_entry = self.transcript_cache.get(video_id, language)
+        if cached_entry is None:
+            return None
+        processing_time = time.time() - start_time
+        logger.info(f"Subtitles served from cache in {processing_time:.3f}s")
+        get_metrics().observe('summarizer_stage_duration_seconds', processing_time, stage='subtitles')
+        return self._build_subtitle_result(cached_entry, processing_time, from_cache=True)
+
+    def _fetch_transcript(self, video_id: str, language: str) -> Tuple:
+        """Download the best matching transcript; returns (transcript, transcript_list, data)"""
+        # Get transcript
+        transcript_list = get_transcript_api().list(video_id)
+
+        # Try the requested language first, then its regional variants
+        language_codes = self._language_codes(language)
+        try:
+            transcript = transcript_list.find_transcript(language_codes[:1])
+        except NoTranscriptFound:
+            try:
+                transcript = transcript_list.find_transcript(language_codes[1:])
             except NoTranscriptFound:
-                try:
-                    transcript = transcript_list.find_transcript(['en-US', 'en-GB'])
-                except NoTranscriptFound:
-                    available_transcripts = list(transcript_list)
-                    if not available_transcripts:
-                        raise NoTranscriptFound("No transcripts available")
-                    transcript = available_transcripts[0]
-
-            # Fetch transcript data
-            transcript_data = transcript.fetch()
-
-            # Get video metadata
-            video_info = self.get_video_metadata(video_id, transcript_data)
-
-            # Format transcript
-            formatted_transcript = self.text_formatter.format_transcript(transcript_data)
-
-            # Convert to list format for processing
-            structured_transcript = []
-            for entry in transcript_data:
-                # Handle both dict and object formats
-                if isinstance(entry, dict):
-                    structured_transcript.append({
-                        'text': entry['text'],
-                        'start': entry['start'],
-                        'duration': entry['duration']
-                    })
-                else:
-                    # Handle object format
-                    structured_transcript.append({
-                        'text': entry.text,
-                        'start': entry.start,
-                        'duration': entry.duration
-                    })
+                available_transcripts = list(transcript_list)
+                if not available_transcripts:
+                    raise NoTranscriptFound(video_id, language_codes, transcript_list)
+                transcript = available_transcripts[0]
+
+        # Fetch transcript data
+        return transcript, transcript_list, transcript.fetch()
+
+    def _finish_subtitles(self, video_url: str, video_id: str, language: str, page: WatchPage,
+                          transcript, transcript_list, transcript_data, start_time: float) -> Dict:
+        """Check accessibility, index the transcript, attach metadata and cache the entry"""
+        accessibility = self.check_video_accessibility(video_url, page)
+        if not accessibility['accessible']:
+            return self._accessibility_error(accessibility)
+
+        # Keep one compact copy: text blob plus timing arrays
+        transcript_index = TranscriptIndex(
+            [entry['text'] if isinstance(entry, dict) else entry.text for entry in transcript_data],
+            [entry['start'] if isinstance(entry, dict) else entry.start for entry in transcript_data],
+            [entry['duration'] if isinstance(entry, dict) else entry.duration for entry in transcript_data]
+        )
+        del transcript_data
+
+        # Get video metadata
+        video_info = self.get_video_metadata(video_id, transcript_index, page)
+
+        cache_entry = {
+            'transcript': transcript_index,
+            'video_info': asdict(video_info),
+            'language': transcript.language_code,
+            'available_languages': [t.language_code for t in transcript_list]
+        }
+        # A page skipped for the deadline would pin placeholder metadata in the cache
+        if self.transcript_cache is not None and len(transcript_index) and page.fetched:
+            self.transcript_cache.set(video_id, language, cache_entry)
 
-            processing_time = time.time() - start_time
-            logger.info(f"Subtitles extracted in {processing_time:.2f}s")
+        processing_time = time.time() - start_time
+        logger.info(f"Subtitles extracted in {processing_time:.2f}s")
+        get_metrics().observe('summarizer_stage_duration_seconds', processing_time, stage='subtitles')
 
-            return {
-                'success': True,
-                'video_info': video_info,
-                'transcript_data': transcript_data,
-                'transcript_text': formatted_transcript,
-                'transcript_list': structured_transcript,
-                'processing_time': processing_time
-            }
+        return self._build_subtitle_result(cache_entry, processing_time, from_cache=False)
+
+    @staticmethod
+    def _language_codes(language: str) -> List[str]:
+        """Transcript languages tried for a requested one, in order"""
+        return [language, f'{language}-US', f'{language}-GB']
 
-        except TranscriptsDisabled:
+    def _subtitle_error(self, e: Exception, language: str = 'en') -> Dict:
+        """Map a subtitle extraction failure to an error response"""
+        if isinstance(e, TranscriptsDisabled):
             logger.error("Transcripts are disabled for this video.")
             return {
                 'success': False,
@@ -278,15 +486,18 @@ class YouTubeSummarizer:
                 'error_message': 'This video has transcripts disabled',
                 'suggestions': ['Try finding similar content with enabled subtitles']
             }
-        except NoTranscriptFound:
+        elif isinstance(e, NoTranscriptFound):
             logger.error("No transcripts found for this video.")
             return {
                 'success': False,
                 'error_code': 'NO_TRANSCRIPTS',
-                'error_message': 'No English transcripts found for this video',
-                'suggestions': ['Try videos with English subtitles']
+                'error_message': (
+                    f"No transcripts found for this video in the requested language "
+                    f"({', '.join(self._language_codes(language))})"
+                ),
+                'suggestions': [f"Try another language or a video with '{language}' subtitles"]
             }
-        except VideoUnavailable:
+        elif isinstance(e, VideoUnavailable):
             logger.error("Video is unavailable or restricted.")
             return {
                 'success': False,
@@ -294,7 +505,7 @@ class YouTubeSummarizer:
                 'error_message': 'Video is unavailable or restricted',
                 'suggestions': ['Check if video is public and accessible']
             }
-        except ValueError as e:
+        elif isinstance(e, ValueError):
             logger.error(f"Invalid URL: {e}")
             return {
                 'success': False,
@@ -302,10 +513,8 @@ class YouTubeSummarizer:
                 'error_message': str(e),
                 'suggestions': ['Check the YouTube URL format']
             }
-        except Exception as e:
-            import traceback
-            logger.error(f"Exception during subtitle extraction: {repr(e)}")
-            logger.error(traceback.format_exc())
+        else:
+            logger.error(f"Exception during subtitle extraction: {repr(e)}", exc_info=e)
             error_msg = str(e)
             if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"HTTP response content: {e.response.content}")
@@ -329,7 +538,20 @@ class YouTubeSummarizer:
                     'suggestions': ['Check if the video is available and public']
                 }
 
-
+    def _build_subtitle_result(self, cache_entry: Dict, processing_time: float, from_cache: bool) -> Dict:
+        """Build the extract_subtitles response from a transcript cache entry"""
+        transcript_index = cache_entry['transcript']
+        return {
+            'success': True,
+            'video_info': VideoInfo(**cache_entry['video_info']),
+            'transcript_index': transcript_index,
+            # Same string object as the index text, not a copy
+            'transcript_text': transcript_index.text,
+            'language': cache_entry['language'],
+            'available_languages': cache_entry['available_languages'],
+            'from_cache': from_cache,
+            'processing_time': processing_time
+        }
 
     def _get_error_suggestions(self, error_type: str) -> List[str]:
         """Get error-specific suggestions"""
@@ -362,132 +584,234 @@ class YouTubeSummarizer:
         }
         return suggestions.get(error_type, ["Try a different video URL"])
 
-    def analyze_content_structure(self, transcript_list: List[Dict]) -> List[Dict]:
+    def analyze_content_structure(self, transcript: Union[TranscriptIndex, List[Dict]]) -> List[Dict]:
         """Analyze transcript to identify topic boundaries and key concepts"""
         logger.info("🧠 Analyzing content structure...")
         
-        # Extract text and timing information
-        sentences = []
-        
-        for entry in transcript_list:
-            text = entry['text']
-            start_time = entry['start']
-            duration = entry['duration']
-            
-            # Split into sentences
-            for sentence in simple_sentence_tokenize(text):
-                sentences.append({
-                    'text': sentence,
-                    'start_time': start_time,
-                    'end_time': start_time + duration,
-                    'word_count': len(simple_word_tokenize(sentence))
-                })
+        # Sentences are split and mapped back to segments by the index
+        index = TranscriptIndex.ensure(transcript)
         
         # Calculate topic boundaries using content analysis
-        topic_boundaries = self._detect_topic_boundaries(sentences)
+        with self._stage_timer('segmentation'):
+            topic_boundaries = self._detect_topic_boundaries(index)
         
         return topic_boundaries
 
-    def _detect_topic_boundaries(self, sentences: List[Dict]) -> List[Dict]:
-        """Detect topic boundaries using NLP techniques"""
-        boundaries = []
-        
-        # Simple approach: look for significant content shifts
-        for i in range(1, len(sentences)):
-            prev_sentence = sentences[i-1]
-            curr_sentence = sentences[i]
-            
-            # Calculate similarity/difference metrics
-            prev_words = set(simple_word_tokenize(prev_sentence['text'].lower()))
-            curr_words = set(simple_word_tokenize(curr_sentence['text'].lower()))
-            
-            # Remove stop words
-            prev_words = prev_words - self.stop_words
-            curr_words = curr_words - self.stop_words
-            
-            # Calculate Jaccard similarity
-            intersection = len(prev_words & curr_words)
-            union = len(prev_words | curr_words)
-            similarity = intersection / union if union > 0 else 0
-            
-            # Detect boundary if similarity is low and time gap is significant
-            time_gap = curr_sentence['start_time'] - prev_sentence['end_time']
-            
-            if similarity < 0.3 and time_gap > 2.0:  # Low similarity and >2s gap
-                boundaries.append({
-                    'index': i,
-                    'start_time': curr_sentence['start_time'],
-                    'confidence': 1 - similarity
-                })
-        
-        # Ensure we have reasonable number of boundaries (8-12)
-        if len(boundaries) < 8:
-            # Add more boundaries based on time intervals
-            total_duration = sentences[-1]['end_time'] if sentences else 0
-            target_sections = 10
-            interval = total_duration / target_sections
-            
-            for i in range(1, target_sections):
-                target_time = i * interval
-                # Find closest sentence to this time
-                closest_idx = min(range(len(sentences)), 
-                                key=lambda x: abs(sentences[x]['start_time'] - target_time))
-                boundaries.append({
-                    'index': closest_idx,
-                    'start_time': sentences[closest_idx]['start_time'],
-                    'confidence': 0.5
-                })
-        
-        # Sort and deduplicate
-        boundaries = sorted(boundaries, key=lambda x: x['start_time'])
-        unique_boundaries = []
-        for boundary in boundaries:
-            if not unique_boundaries or boundary['start_time'] - unique_boundaries[-1]['start_time'] > 30:
-                unique_boundaries.append(boundary)
-        
-        return unique_boundaries[:12]  # Limit to 12 sections
-
-    def generate_timestamps(self, transcript_list: List[Dict]) -> List[Timestamp]:
-        """Generate intelligent timestamps with descriptive titles"""
+    def _detect_topic_boundaries(self, index: TranscriptIndex) -> List[Dict]:
+        """Detect topic boundaries with the configured segmentation strategy"""
+        return self.segmenter.detect_boundaries(index)
+
+    def generate_timestamps(self, transcript: Union[TranscriptIndex, List[Dict]], mode: str = 'full') -> List[Timestamp]:
+        """Generate intelligent timestamps with descriptive titles (keyphrase titles in fast mode)"""
+        return run_steps(self._timestamps_steps(transcript, mode))
+
+    async def generate_timestamps_async(self, transcript: Union[TranscriptIndex, List[Dict]],
+                                        mode: str = 'full') -> List[Timestamp]:
+        """generate_timestamps on asyncio; segmentation runs in a worker thread"""
+        return await run_steps_async(self._timestamps_steps(transcript, mode))
+
+    def _timestamps_steps(self, transcript: Union[TranscriptIndex, List[Dict]], mode: str) -> Steps:
         logger.info("⏰ Generating intelligent timestamps...")
         start_time = time.time()
         
-        # Analyze content structure
-        boundaries = self.analyze_content_structure(transcript_list)
+        index = TranscriptIndex.ensure(transcript)
         
+        # Analyze content structure; boundary indices are segment indices
+        boundaries = yield Call(self.analyze_content_structure, index)
+        
+        # Generate titles using AI
+        with self._stage_timer('titles', mode):
+            if mode == 'fast':
+                titles = yield Call(self._extractive_titles, index, boundaries)
+            else:
+                titles = yield from self._section_titles_steps(self._section_contexts(index, boundaries))
+                titles = yield Call(self._fill_missing_titles, index, boundaries, titles)
+
+        timestamps = self._build_timestamps(index, boundaries, titles)
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Timestamps generated in {processing_time:.2f}s")
+        
+        return timestamps
+
+    def _stage_timer(self, stage: str, mode: str = 'full'):
+        """Context manager recording a stage's duration in the stage histogram"""
+        # Fast-mode stages take milliseconds; kept apart so they do not skew the LLM timings
+        return get_metrics().time(
+            'summarizer_stage_duration_seconds', stage=f"{stage}_extractive" if mode == 'fast' else stage
+        )
+
+    def _section_contexts(self, index: TranscriptIndex, boundaries: List[Dict]) -> List[str]:
+        """Text around each boundary for title generation"""
+        return [
+            index.text_range(boundary['index'] - 2, boundary['index'] + 3)
+            for boundary in boundaries
+        ]
+
+    def _section_texts(self, index: TranscriptIndex, boundaries: List[Dict]) -> List[str]:
+        return [
+            index.text_range(boundary['index'], boundaries[i + 1]['index'] if i + 1 < len(boundaries) else len(index))
+            for i, boundary in enumerate(boundaries)
+        ]
+
+    def _extractive_titles(self, index: TranscriptIndex, boundaries: List[Dict]) -> List[str]:
+        return self.extractive.section_titles(self._section_texts(index, boundaries))
+
+    def _fill_missing_titles(self, index: TranscriptIndex, boundaries: List[Dict],
+                             titles: List[Optional[str]]) -> List[str]:
+        """Keyphrase titles for the sections the LLM did not title (None)"""
+        missing = [i for i, title in enumerate(titles) if title is None]
+        if not missing:
+            return titles
+        current_deadline().degrade('extractive section titles')
+        extractive_titles = dict(zip(
+            missing, self.extractive.section_titles(self._section_texts(index, boundaries), only=missing)
+        ))
+        return [extractive_titles.get(i, title) for i, title in enumerate(titles)]
+
+    def _build_timestamps(self, index: TranscriptIndex, boundaries: List[Dict], titles: List[str]) -> List[Timestamp]:
         timestamps = []
         for i, boundary in enumerate(boundaries):
-            # Get text around this boundary for title generation
-            start_idx = max(0, boundary['index'] - 2)
-            end_idx = min(len(transcript_list), boundary['index'] + 3)
-            
-            context_text = " ".join([entry['text'] for entry in transcript_list[start_idx:end_idx]])
-            
-            # Generate title using AI
-            title = self._generate_section_title(context_text, i + 1)
-            
             # Convert time to MM:SS format
             time_str = self._seconds_to_timestamp(boundary['start_time'])
             
             timestamp = Timestamp(
                 time=time_str,
-                title=title,
+                title=titles[i],
                 section_id=i + 1,
                 start_index=boundary['index'],
-                end_index=boundaries[i + 1]['index'] if i + 1 < len(boundaries) else len(transcript_list)
+                end_index=boundaries[i + 1]['index'] if i + 1 < len(boundaries) else len(index)
             )
             timestamps.append(timestamp)
-        
-        processing_time = time.time() - start_time
-        logger.info(f"Timestamps generated in {processing_time:.2f}s")
-        
         return timestamps
-    def _generate_section_title(self, context_text: str, section_num: int) -> str:
-        """Generate a concise and descriptive title for a section using the LLM"""
+
+    def _section_titles_steps(self, contexts: List[str]) -> Steps:
+        """Generate all section titles, batched into one LLM call when possible; None for sections left untitled"""
+        if not contexts:
+            return []
+
+        section_nums = list(range(1, len(contexts) + 1))
+        if not self._has_title_budget():
+            return self._fallback_titles(section_nums)
+        if TITLE_MODE != 'batch':
+            return (yield from self._parallel_titles_steps(contexts, section_nums))
+
+        titles = yield from self._title_batch_steps(contexts)
+        if titles is None:
+            logger.warning("Batched title generation failed, falling back to per-section calls")
+            if not self._has_title_budget():
+                return self._fallback_titles(section_nums)
+            return (yield from self._parallel_titles_steps(contexts, section_nums))
+
+        # Retry only the sections the model skipped, once as a smaller batch
+        missing = [i for i, title in enumerate(titles) if not title]
+        if missing and not self._has_title_budget():
+            return titles
+        if missing:
+            logger.info(f"Retrying {len(missing)} missing section titles")
+            retried = (yield from self._title_batch_steps([contexts[i] for i in missing])) or []
+            for i, title in zip(missing, retried):
+                titles[i] = title
+
+        # Anything still missing gets its own call
+        missing = [i for i, title in enumerate(titles) if not title]
+        if missing and not self._has_title_budget():
+            return titles
+        if missing:
+            fallback_titles = yield from self._parallel_titles_steps(
+                [contexts[i] for i in missing], [i + 1 for i in missing]
+            )
+            for i, title in zip(missing, fallback_titles):
+                titles[i] = title
+
+        return titles
+
+    def _has_title_budget(self) -> bool:
+        return current_deadline().has_time(DEADLINE_MIN_CALL_SECONDS)
+
+    def _fallback_titles(self, section_nums: List[int]) -> List[None]:
+        """No titles when the deadline leaves no time for title calls (see _fill_missing_titles)"""
+        return [None] * len(section_nums)
+
+    def _build_title_batch_prompt(self, contexts: List[str]) -> str:
+        """One prompt asking for every section title as a JSON array, each excerpt fitted to the budget"""
+        empty_prompt = self._format_title_batch_prompt([''] * len(contexts))
+        available = self.llm_handler.prompt_token_budget(TITLE_PROMPT_TOKENS) - count_tokens(empty_prompt)
+        per_section = max(0, min(TITLE_CONTEXT_TOKENS, available // max(1, len(contexts))))
+        return self._format_title_batch_prompt([
+            fit_transcript(context_text.strip(), per_section).replace('\n', ' ') for context_text in contexts
+        ])
+
+    def _format_title_batch_prompt(self, excerpts: List[str]) -> str:
+        sections = "\n\n".join(
+            f"Section {i}:\n\"\"\"{excerpt}\"\"\""
+            for i, excerpt in enumerate(excerpts, 1)
+        )
+
+        prompt = f"""You are an educational content assistant.
+
+Below are excerpts from {len(excerpts)} consecutive sections of an educational video. For each section, generate a clear, concise, and academic section title in **less than 8 words**.
+
+{sections}
+
+Rules:
+- Be specific to the topic of each section
+- Avoid generic words like 'Section' or 'Part'
+- No quotes or punctuation at the end of a title
+
+Respond only with a JSON array of exactly {len(excerpts)} strings, one title per section, in order.
+Example: ["First section title", "Second section title"]"""
+        return prompt
+
+    def _parse_title_batch(self, response: Optional[str], count: int) -> Optional[List[Optional[str]]]:
+        """Cleaned titles from a batched reply, None where missing; None if unusable"""
+        if not response:
+            return None
+
+        raw_titles = parse_title_list(response, count)
+        if raw_titles is None:
+            logger.warning(f"Batched title response is not {count} titles in order, discarding it")
+            return None
+        return [self._clean_title(title) if isinstance(title, str) else None for title in raw_titles]
+
+    def _title_batch_steps(self, contexts: List[str]) -> Steps:
+        """Ask for every section title in one prompt; None if the reply is unusable"""
         try:
-            trimmed_text = context_text.strip()[:500].replace('\n', ' ')
-            
-            prompt = f"""You are an educational content assistant.
+            response = yield self._llm_call(self._build_title_batch_prompt(contexts), task_type="title")
+        except Exception as e:
+            logger.warning(f"Batched title request failed: {e}")
+            return None
+        return self._parse_title_batch(response, len(contexts))
+
+    def _parallel_titles_steps(self, contexts: List[str], section_nums: List[int]) -> Steps:
+        """Generate section titles one call each, at most TITLE_CONCURRENCY at a time, keeping them in order (None on failure)"""
+        stage_deadline = current_deadline()
+
+        def failed(i: int, error: BaseException) -> None:
+            if isinstance(error, TimeoutError):
+                logger.warning(f"Title generation timed out for section {section_nums[i]}")
+                stage_deadline.degrade('extractive section titles')
+            else:
+                logger.warning(f"Failed to generate title for section {section_nums[i]}: {error}")
+            return None
+
+        return (yield Gather(
+            [partial(self._section_title_steps, context_text, section_num)
+             for context_text, section_num in zip(contexts, section_nums)],
+            TITLE_CONCURRENCY, failed, timeout=TITLE_TIMEOUT, thread_name_prefix='section-title'
+        ))
+
+    def _clean_title(self, title: str) -> Optional[str]:
+        """Sanitize a model-produced title; None if nothing usable is left"""
+        title = title.strip().strip('"\'')
+        title = title.split('\n')[0]
+        title = re.sub(r'[^\w\s\-]', '', title).strip()  # Remove special characters
+        return title or None
+
+    def _build_section_title_prompt(self, context_text: str) -> str:
+        trimmed_text = fit_transcript(context_text.strip(), TITLE_CONTEXT_TOKENS).replace('\n', ' ')
+        
+        prompt = f"""You are an educational content assistant.
 
 Based on the following video section content, generate a clear, concise, and academic section title in **less than 8 words**.
 
@@ -500,51 +824,23 @@ Rules:
 - No quotes or punctuation at the end
 
 Only respond with the section title."""
+        return prompt
 
-            title = self.llm_handler.generate_content(prompt)
-
-            if title:
-                # Clean and sanitize
-                title = title.strip().strip('"\'')
-                title = title.split('\n')[0]
-                title = re.sub(r'[^\w\s\-]', '', title)  # Remove special characters
-                return title if title else f"Section {section_num}"
-            else:
-                return f"Section {section_num}"
-
+    def _section_title_steps(self, context_text: str, section_num: int) -> Steps:
+        """Generate a concise and descriptive title for a section using the LLM; None if it gave none"""
+        try:
+            title = yield self._llm_call(self._build_section_title_prompt(context_text), task_type="title")
         except Exception as e:
             logger.warning(f"Failed to generate title for section {section_num}: {e}")
-            return f"Section {section_num}"
+            return None
+        return self._clean_title(title) if title else None
 
-    # def _generate_section_title(self, context_text: str, section_num: int) -> str:
-    #     """Generate descriptive title for a section using AI"""
-    #     try:
-    #         prompt = f"""
-    #         Generate a concise, descriptive title (max 8 words) for this video section based on the content:
-            
-    #         Content: {context_text[:500]}...
-            
-    #         Requirements:
-    #         - Be specific and educational
-    #         - Use clear, academic language
-    #         - Focus on the main topic or concept
-    #         - Keep it under 8 words
-            
-    #         Title:"""
-            
-    #         title = self.llm_handler.generate_content(prompt, task_type="title")
-            
-    #         if title:
-    #             # Clean up the title
-    #             title = re.sub(r'^["\']|["\']$', '', title)  # Remove quotes
-    #             title = title.split('\n')[0]  # Take first line only
-    #             return title if title else f"Section {section_num}"
-    #         else:
-    #             return f"Section {section_num}"
-            
-    #     except Exception as e:
-    #         logger.warning(f"Failed to generate title for section {section_num}: {e}")
-    #         return f"Section {section_num}"
+    def _llm_call(self, prompt: str, task_type: str) -> Call:
+        """A generate_content step; on asyncio the handler's async client, if it has one"""
+        return Call(
+            self.llm_handler.generate_content, prompt, task_type=task_type,
+            async_fn=getattr(self.llm_handler, 'generate_content_async', None)
+        )
 
     def _seconds_to_timestamp(self, seconds: float) -> str:
         """Convert seconds to MM:SS format"""
@@ -552,7 +848,7 @@ Only respond with the section title."""
         secs = int(seconds % 60)
         return f"{minutes}:{secs:02d}"
 
-    def summarize_section(self, transcript_list: List[Dict], section_id: int, timestamps: List[Timestamp]) -> str:
+    def summarize_section(self, transcript: Union[TranscriptIndex, List[Dict]], section_id: int, timestamps: List[Timestamp]) -> str:
         """Summarize a specific timestamp section"""
         logger.info(f"📝 Summarizing section {section_id}...")
         
@@ -562,15 +858,150 @@ Only respond with the section title."""
             return "Section not found"
         
         # Extract section text
-        section_text = " ".join([
-            entry['text'] for entry in transcript_list[timestamp.start_index:timestamp.end_index]
-        ])
+        index = TranscriptIndex.ensure(transcript)
+        section_text = index.text_range(timestamp.start_index, timestamp.end_index)
         
-        # Generate summary
+        summary = run_steps(self._section_text_summary_steps(timestamp.title, section_text))
+        return summary if summary else f"Summary failed for section {section_id}"
+
+    def get_section_summary(self, video_id: str, section_id: int, timestamps: Optional[List[Timestamp]] = None,
+                            prefetch: bool = True, language: str = 'en') -> Dict:
+        """One section's summary on demand, cached, with its neighbours prefetched in the background
+
+        timestamps and language are those of the result the user is looking
+        at (stored with it in their session); without timestamps the cached
+        pipeline result's sections are used. Sections are never generated
+        here, so a video that was not processed yet gets SECTIONS_NOT_READY.
+        """
+        return run_steps(self._section_summary_steps(video_id, section_id, timestamps, prefetch, language))
+
+    async def get_section_summary_async(self, video_id: str, section_id: int,
+                                        timestamps: Optional[List[Timestamp]] = None, prefetch: bool = True,
+                                        language: str = 'en') -> Dict:
+        """get_section_summary on asyncio; prefetching still runs on background threads"""
+        return await run_steps_async(self._section_summary_steps(video_id, section_id, timestamps, prefetch, language))
+
+    def _section_summary_steps(self, video_id: str, section_id: int, timestamps: Optional[List[Timestamp]],
+                               prefetch: bool, language: str) -> Steps:
+        start_time = time.time()
+        subtitle_result = yield from self._extract_subtitles_steps(
+            f"https://www.youtube.com/watch?v={video_id}", language
+        )
+        if not subtitle_result['success']:
+            return subtitle_result
+        index = subtitle_result['transcript_index']
+        timestamps = timestamps or (yield Call(self._cached_timestamps, subtitle_result))
+        if timestamps is None:
+            return self._sections_not_ready_error(video_id)
+
+        timestamp = next((ts for ts in timestamps if ts.section_id == section_id), None)
+        if timestamp is None:
+            return self._section_not_found_error(section_id)
+        section_text = index.text_range(timestamp.start_index, timestamp.end_index)
+
+        cached = yield Call(self.result_cache.get, self._section_cache_key(timestamp.title, section_text))
+        summary = cached if cached is not None else (
+            yield from self._coalesced_section_summary_steps(timestamp.title, section_text)
+        )
+        prefetching = (yield Call(self._prefetch_sections, index, timestamps, section_id)) if prefetch else []
+        return self._section_response(timestamp, section_text, summary, cached is not None,
+                                      prefetching, start_time)
+
+    def _cached_timestamps(self, subtitle_result: Dict) -> Optional[List[Timestamp]]:
+        """Sections of the cached pipeline result for this transcript, if there is one"""
+        cached_result = self.result_cache.get(self._result_cache_key(subtitle_result))
+        if cached_result is None:
+            return None
+        return [Timestamp(**entry) for entry in cached_result['timestamps']]
+
+    def _coalesced_section_summary_steps(self, title: str, section_text: str) -> Steps:
+        """Summarize one section, sharing a run already in flight (a click on a section being prefetched)"""
+        single_flight = get_single_flight()
+        run = partial(self._section_text_summary_steps, title, section_text)
+        if single_flight is None:
+            return (yield from run())
+        # Wait no longer for a shared run than the caller's own deadline allows
+        summary, _ = yield Coalesce(
+            single_flight, self._section_cache_key(title, section_text), run, timeout=current_deadline().timeout()
+        )
+        return summary
+
+    def _prefetch_sections(self, index: TranscriptIndex, timestamps: List[Timestamp], section_id: int) -> List[int]:
+        """Queue summaries of the sections around section_id that are not cached yet; returns their ids"""
+        position = next(i for i, ts in enumerate(timestamps) if ts.section_id == section_id)
+        neighbours = (
+            timestamps[position + 1:position + 1 + SECTION_PREFETCH_AHEAD]
+            + timestamps[max(0, position - SECTION_PREFETCH_BEHIND):position]
+        )
+        queued = []
+        for timestamp in neighbours:
+            section_text = index.text_range(timestamp.start_index, timestamp.end_index)
+            if self.result_cache.get(self._section_cache_key(timestamp.title, section_text)) is not None:
+                continue
+            SECTION_PREFETCH_EXECUTOR.submit(self._prefetch_section, timestamp.title, section_text)
+            queued.append(timestamp.section_id)
+        return queued
+
+    def _prefetch_section(self, title: str, section_text: str):
+        try:
+            run_steps(self._coalesced_section_summary_steps(title, section_text))
+        except Exception as e:
+            logger.warning(f"Prefetching section \"{title}\" failed: {e}")
+
+    def _section_response(self, timestamp: Timestamp, section_text: str, summary: Optional[str],
+                          cached: bool, prefetching: List[int], start_time: float) -> Dict:
+        degraded = []
+        if not summary:
+            # Providers failed: the section's top sentences are better than nothing
+            _, section_sentences = self.extractive.summarize([section_text])
+            summary = "\n".join(f"- {sentence}" for sentence in section_sentences[0])
+            degraded.append({'stage': 'section', 'reason': 'extractive summary'})
+        return {
+            'success': True,
+            'section_id': timestamp.section_id,
+            'time': timestamp.time,
+            'title': timestamp.title,
+            'summary': summary,
+            'cached': cached,
+            'prefetching': prefetching,
+            'processing_time': time.time() - start_time,
+            'degraded': degraded
+        }
+
+    def _sections_not_ready_error(self, video_id: str) -> Dict:
+        return {
+            'success': False,
+            'error_code': 'SECTIONS_NOT_READY',
+            'error_message': f"Video {video_id} has not been processed yet",
+            'suggestions': ['Process the video first, then open its sections']
+        }
+
+    def _section_not_found_error(self, section_id: int) -> Dict:
+        return {
+            'success': False,
+            'error_code': 'SECTION_NOT_FOUND',
+            'error_message': f"Section {section_id} not found",
+            'suggestions': ['Process the video again to refresh its sections']
+        }
+
+    def _section_cache_key(self, title: str, section_text: str) -> str:
+        return self.result_cache.make_section_key(
+            hash_text(f"{title}\n{section_text}"),
+            PROMPT_TEMPLATE_VERSION,
+            self.llm_handler.get_model_signature()
+        )
+
+    def _build_section_summary_prompt(self, title: str, section_text: str) -> str:
+        return self._fill_prompt(
+            lambda excerpt: self._format_section_summary_prompt(title, excerpt),
+            section_text, SECTION_PROMPT_TOKENS
+        )
+
+    def _format_section_summary_prompt(self, title: str, excerpt: str) -> str:
         prompt = f"""
-        Create a detailed, educational summary of this video section titled "{timestamp.title}":
+        Create a detailed, educational summary of this video section titled "{title}":
         
-        {section_text}
+        {excerpt}
         
         Requirements:
         - Maintain academic tone
@@ -580,19 +1011,132 @@ Only respond with the section title."""
         - Structure with bullet points for clarity
         
         Summary:"""
-        
+        return prompt
+
+    def _section_text_summary_steps(self, title: str, section_text: str) -> Steps:
+        """Summarize one section's text, reusing a cached summary of identical content"""
+        cache_key = self._section_cache_key(title, section_text)
+        cached_summary = yield Call(self.result_cache.get, cache_key)
+        if cached_summary is not None:
+            return cached_summary
+
+        # Generate summary
         try:
-            summary = self.llm_handler.generate_content(prompt, task_type="summary")
-            return summary if summary else f"Summary failed for section {section_id}"
+            summary = yield self._llm_call(self._build_section_summary_prompt(title, section_text), task_type="summary")
         except Exception as e:
-            logger.error(f"Failed to summarize section {section_id}: {e}")
-            return f"Summary failed for section {section_id}"
-
-    def summarize_full_video(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo) -> str:
-        """Generate comprehensive full video summary"""
-        logger.info("🎯 Generating full video summary...")
-        start_time = time.time()
+            logger.error(f"Failed to summarize section \"{title}\": {e}")
+            return None
+        if summary:
+            yield Call(self.result_cache.set, cache_key, summary)
+        return summary
+
+    def _section_summaries_steps(self, index: TranscriptIndex, timestamps: List[Timestamp]) -> Steps:
+        """Map step: summarize every section, at most SUMMARY_MAP_CONCURRENCY at a time, keeping section order"""
+        stage_deadline = current_deadline()
+
+        def failed(i: int, error: BaseException) -> None:
+            if isinstance(error, TimeoutError):
+                logger.warning(f"Summary of section {timestamps[i].section_id} timed out")
+                stage_deadline.degrade('section summaries timed out')
+            else:
+                logger.warning(f"Failed to summarize section {timestamps[i].section_id}: {error}")
+            return None
+
+        return (yield Gather(
+            [partial(self._section_text_summary_steps, ts.title, index.text_range(ts.start_index, ts.end_index))
+             for ts in timestamps],
+            SUMMARY_MAP_CONCURRENCY, failed, thread_name_prefix='section-summary'
+        ))
+
+    def _build_reduce_prompt(self, timestamps: List[Timestamp], section_summaries: List[Optional[str]], video_info: VideoInfo) -> str:
+        """Reduce step prompt: combine per-section summaries into the full summary"""
+        sections = []
+        for timestamp, section_summary in zip(timestamps, section_summaries):
+            sections.append(f"## {timestamp.time} - {timestamp.title}")
+            sections.append(section_summary or "(No summary available for this section)")
+        
+        prompt = f"""
+        Create a comprehensive summary of this educational video: "{video_info.title}"
+        
+        Video Information:
+        - Channel: {video_info.channel}
+        - Duration: {video_info.duration}
+        
+        The video has already been summarized section by section. Combine these section summaries into one summary of the whole video:
+        
+        {chr(10).join(sections)}
+        
+        Requirements:
+        1. Create an executive summary (2-3 sentences) of the entire video
+        2. Structure the summary using the provided timestamps as section headers
+        3. Include key concepts, important facts, and main takeaways
+        4. Maintain logical flow between sections
+        5. Use academic tone suitable for students
+        6. Preserve technical terminology and definitions
+        7. Focus on educational value and learning outcomes
         
+        Format the response with:
+        - Executive Summary at the top
+        - Detailed sections following the timestamp structure
+        - Key takeaways at the end
+        """
+        return prompt
+
+    def _full_summary_prompt_steps(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                                   transcript_index: Optional[TranscriptIndex] = None) -> Steps:
+        """Pick one-shot or map-reduce based on transcript length and return the final prompt"""
+        map_deadline = self._map_step_deadline(transcript_text, timestamps, transcript_index)
+        if map_deadline is not None:
+            logger.info(f"Long transcript ({len(transcript_text)} chars): using map-reduce summarization")
+            with deadline_scope(map_deadline):
+                section_summaries = yield from self._section_summaries_steps(transcript_index, timestamps)
+            if any(section_summaries):
+                return self._build_reduce_prompt(timestamps, section_summaries, video_info)
+            logger.warning("All section summaries failed, falling back to one-shot summary")
+        return self._build_full_summary_prompt(transcript_text, timestamps, video_info, transcript_index)
+
+    def _uses_map_reduce(self, transcript_text: str, timestamps: List[Timestamp],
+                         transcript_index: Optional[TranscriptIndex]) -> bool:
+        if transcript_index is None or not timestamps:
+            return False
+        return count_tokens(transcript_text) > self.llm_handler.prompt_token_budget(SUMMARY_PROMPT_TOKENS)
+
+    def _map_step_deadline(self, transcript_text: str, timestamps: List[Timestamp],
+                           transcript_index: Optional[TranscriptIndex]) -> Optional[Deadline]:
+        """Deadline for the map step, keeping SUMMARY_RESERVE_SECONDS for the reduce call; None to skip it"""
+        if not self._uses_map_reduce(transcript_text, timestamps, transcript_index):
+            return None
+        deadline = current_deadline()
+        if not deadline.has_time(SUMMARY_RESERVE_SECONDS + DEADLINE_MIN_CALL_SECONDS):
+            deadline.degrade('map step skipped, one-shot summary')
+            return None
+        return deadline.stage('section_summaries', deadline.remaining() - SUMMARY_RESERVE_SECONDS)
+
+    def _fill_prompt(self, build: Callable[[str], str], text: str, task_tokens: int, **fit_options) -> str:
+        """build(excerpt) with as much of text as the prompt budget leaves room for"""
+        budget = self.llm_handler.prompt_token_budget(task_tokens)
+        available = budget - count_tokens(build(''))
+        return build(fit_transcript(text, max(0, available), **fit_options))
+
+    def _build_full_summary_prompt(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                                   transcript_index: Optional[TranscriptIndex] = None) -> str:
+        """Prompt for the one-shot full video summary
+
+        A transcript over budget is cut down to the start of every section plus
+        its most informative caption lines, rather than to its opening.
+        """
+        fit_options = {}
+        if transcript_index is not None:
+            fit_options = {
+                'units': [transcript_index.segment_text(i) for i in range(len(transcript_index))],
+                'lead_positions': [timestamp.start_index for timestamp in timestamps] or [0]
+            }
+        return self._fill_prompt(
+            lambda excerpt: self._format_full_summary_prompt(excerpt, timestamps, video_info),
+            transcript_text, SUMMARY_PROMPT_TOKENS, **fit_options
+        )
+
+    def _format_full_summary_prompt(self, excerpt: str, timestamps: List[Timestamp], video_info: VideoInfo) -> str:
         # Create structured summary using timestamps
         timestamp_summaries = []
         for timestamp in timestamps:
@@ -609,7 +1153,7 @@ Only respond with the section title."""
         {chr(10).join(timestamp_summaries)}
         
         Full Transcript:
-        {transcript_text[:8000]}...
+        {excerpt}
         
         Requirements:
         1. Create an executive summary (2-3 sentences) of the entire video
@@ -625,81 +1169,364 @@ Only respond with the section title."""
         - Detailed sections following the timestamp structure
         - Key takeaways at the end
         """
+        return prompt
+
+    def summarize_full_video(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                             transcript_index: Optional[TranscriptIndex] = None) -> str:
+        """Generate comprehensive full video summary"""
+        return run_steps(self._full_summary_steps(transcript_text, timestamps, video_info, transcript_index))
+
+    async def summarize_full_video_async(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                                         transcript_index: Optional[TranscriptIndex] = None) -> str:
+        """summarize_full_video on asyncio"""
+        return await run_steps_async(self._full_summary_steps(transcript_text, timestamps, video_info, transcript_index))
+
+    def _full_summary_steps(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                            transcript_index: Optional[TranscriptIndex]) -> Steps:
+        logger.info("🎯 Generating full video summary...")
+        start_time = time.time()
+        
+        prompt = yield from self._full_summary_prompt_steps(transcript_text, timestamps, video_info, transcript_index)
         
         try:
-            summary = self.llm_handler.generate_content(prompt, task_type="summary")
-            
-            if summary:
-                processing_time = time.time() - start_time
-                logger.info(f"Full summary generated in {processing_time:.2f}s")
-                return summary
-            else:
-                return "Summary generation failed: All LLM providers unavailable"
-                
+            summary = yield self._llm_call(prompt, task_type="summary")
         except Exception as e:
             logger.error(f"Failed to generate full summary: {e}")
-            return f"Summary generation failed: {str(e)}"
+            summary = None
+        if not summary:
+            return (yield Call(self._summary_fallback, transcript_text, timestamps, transcript_index))
 
-    def process_video(self, video_url: str) -> Dict:
-        """Main processing pipeline for video summarization"""
+        processing_time = time.time() - start_time
+        logger.info(f"Full summary generated in {processing_time:.2f}s")
+        return summary
+
+    def _summary_fallback(self, transcript_text: str, timestamps: List[Timestamp],
+                          transcript_index: Optional[TranscriptIndex] = None) -> str:
+        """Extractive summary when the LLM summary failed or ran out of time"""
+        deadline = current_deadline()
+        if deadline.has_time(DEADLINE_MIN_CALL_SECONDS):
+            logger.warning("All LLM providers failed, using an extractive summary")
+        else:
+            logger.warning("Out of time for the LLM summary, using an extractive summary")
+        deadline.degrade('extractive summary')
+        return self._extractive_summary(transcript_text, timestamps, transcript_index)
+
+    def _extractive_summary(self, transcript_text: str, timestamps: List[Timestamp],
+                            transcript_index: Optional[TranscriptIndex] = None) -> str:
+        """Summary from the transcript's top-ranked sentences: an overview, then each section"""
+        if transcript_index is not None and timestamps:
+            section_texts = [transcript_index.text_range(ts.start_index, ts.end_index) for ts in timestamps]
+        else:
+            section_texts = [transcript_text]
+        overview, section_sentences = self.extractive.summarize(section_texts)
+
+        lines = ["## Overview"] + overview
+        if transcript_index is not None:
+            for timestamp, sentences in zip(timestamps, section_sentences):
+                lines.append(f"## {timestamp.time} - {timestamp.title}")
+                lines.extend(f"- {sentence}" for sentence in sentences)
+        return "\n".join(lines)
+
+    def summarize_full_video_stream(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                                    transcript_index: Optional[TranscriptIndex] = None) -> Iterator[str]:
+        """Stream the full video summary as the LLM produces it"""
+        logger.info("🎯 Streaming full video summary...")
+        # For long videos the map step runs first; only the reduce call is streamed
+        prompt = run_steps(self._full_summary_prompt_steps(transcript_text, timestamps, video_info, transcript_index))
+        return self.llm_handler.generate_content_stream(prompt, task_type="summary")
+
+    async def summarize_full_video_stream_async(self, transcript_text: str, timestamps: List[Timestamp], video_info: VideoInfo,
+                                                transcript_index: Optional[TranscriptIndex] = None) -> AsyncIterator[str]:
+        """summarize_full_video_stream on asyncio"""
+        logger.info("🎯 Streaming full video summary...")
+        prompt = await run_steps_async(
+            self._full_summary_prompt_steps(transcript_text, timestamps, video_info, transcript_index)
+        )
+        async for chunk in self.llm_handler.generate_content_stream_async(prompt, task_type="summary"):
+            yield chunk
+
+    def process_video(self, video_url: str, progress_callback: Optional[Callable[[str, float], None]] = None,
+                      deadline: Optional[Deadline] = None, mode: str = 'full') -> Dict:
+        """Main processing pipeline for video summarization
+
+        progress_callback, if given, is called with (stage, fraction done) as
+        each step starts. deadline bounds the whole run (PIPELINE_DEADLINE_SECONDS
+        by default); stages short on time degrade rather than overrun, and the
+        response lists what was degraded. mode 'fast' skips the LLMs and queues
+        the full pipeline to replace the result later; 'full' falls back to it
+        when no provider is available. Concurrent calls for the same video and
+        mode, in this process or another worker, share one run; callers in this
+        process get its progress, callers in other workers only its result.
+        """
+        return run_steps(self._process_video_steps(video_url, progress_callback, deadline, mode))
+
+    async def process_video_async(self, video_url: str,
+                                  progress_callback: Optional[Callable[[str, float], None]] = None,
+                                  deadline: Optional[Deadline] = None, mode: str = 'full') -> Dict:
+        """process_video on asyncio: network waits yield the event loop instead of a worker"""
+        return await run_steps_async(self._process_video_steps(video_url, progress_callback, deadline, mode))
+
+    def _process_video_steps(self, video_url: str, progress_callback: Optional[Callable[[str, float], None]],
+                             deadline: Optional[Deadline], mode: str) -> Steps:
+        total_start_time = time.time()
+        deadline = deadline or self._pipeline_deadline()
+        if mode not in PROCESSING_MODES:
+            return self._invalid_mode_error(mode)
+
+        single_flight = get_single_flight()
+        flight_key = self._flight_key(video_url, mode)
+        if single_flight is None or flight_key is None:
+            response = yield from self._pipeline_steps(video_url, progress_callback, deadline, mode)
+        else:
+            # Whichever caller leads reports progress to every caller of this video in the process
+            run = partial(self._pipeline_steps, video_url, single_flight.reporter(flight_key), deadline, mode)
+            if progress_callback is not None:
+                single_flight.watch(flight_key, progress_callback)
+            try:
+                result, shared = yield Coalesce(single_flight, flight_key, run, timeout=deadline.timeout())
+            finally:
+                if progress_callback is not None:
+                    single_flight.unwatch(flight_key, progress_callback)
+            response = self._shared_response(result, total_start_time) if shared else result
+        self._record_pipeline_metrics(response, mode, total_start_time)
+        return response
+
+    def _pipeline_steps(self, video_url: str, progress_callback: Optional[Callable[[str, float], None]],
+                        deadline: Deadline, mode: str) -> Steps:
         logger.info("Starting video processing pipeline...")
         total_start_time = time.time()
+        report = progress_callback or (lambda stage, progress: None)
         
         try:
             # Step 1: Extract subtitles
-            subtitle_result = self.extract_subtitles(video_url)
+            report('subtitles', 0.05)
+            with deadline_scope(deadline.stage('subtitles')):
+                subtitle_result = yield from self._extract_subtitles_steps(video_url, 'en')
             if not subtitle_result['success']:
                 return subtitle_result
             
             video_info = subtitle_result['video_info']
-            transcript_list = subtitle_result['transcript_list']
+            transcript_index = subtitle_result['transcript_index']
             transcript_text = subtitle_result['transcript_text']
+
+            # Repeat requests for the same transcript, prompts and models skip the LLM entirely
+            cache_key = yield Call(self._result_cache_key, subtitle_result)
+            requested_mode = mode
+            mode = yield Call(self._effective_mode, mode, deadline, video_url)
+            cached_result = yield Call(self.result_cache.get, cache_key)
+            if cached_result is not None and self._serves_cached(cached_result, mode):
+                response = self._cached_response(cached_result, subtitle_result, total_start_time)
+                if requested_mode == 'fast' and response['mode'] == 'fast':
+                    # The earlier upgrade has not replaced it yet; attaches to that job while it runs
+                    response = dict(response, upgrade_job_id=(yield Call(self._schedule_upgrade, video_url)))
+                return response
             
-            # Step 2: Generate timestamps
-            timestamps = self.generate_timestamps(transcript_list)
+            # Step 2: Generate timestamps, leaving time for the summary
+            report('timestamps', 0.25)
+            with deadline_scope(self._timestamps_deadline(deadline)):
+                timestamps = yield from self._timestamps_steps(transcript_index, mode)
             
             # Step 3: Generate full summary
-            full_summary = self.summarize_full_video(transcript_text, timestamps, video_info)
-            
-            # Step 4: Create executive summary
-            executive_summary = self._extract_executive_summary(full_summary)
-            
-            # Step 5: Prepare response
-            total_time = time.time() - total_start_time
+            report('summary', 0.5)
+            with deadline_scope(deadline.stage('summary')), self._stage_timer('summary', mode):
+                if mode == 'fast':
+                    full_summary = yield Call(self._extractive_summary, transcript_text, timestamps, transcript_index)
+                else:
+                    full_summary = yield from self._full_summary_steps(
+                        transcript_text, timestamps, video_info, transcript_index
+                    )
             
-            response = {
-                'success': True,
-                'video_id': video_info.video_id,
-                'title': video_info.title,
-                'duration': video_info.duration,
-                'channel': video_info.channel,
-                'upload_date': video_info.upload_date,
-                'timestamps': [
-                    {
-                        'time': ts.time,
-                        'title': ts.title,
-                        'section_id': ts.section_id,
-                        'start_index': ts.start_index,
-                        'end_index': ts.end_index
-                    } for ts in timestamps
-                ],
-                'executive_summary': executive_summary,
-                'full_summary': full_summary,
-                'processing_time': total_time,
-                'subtitle_extraction_time': subtitle_result['processing_time']
-            }
+            # Step 4: Create executive summary and response
+            response = self._build_response(
+                subtitle_result, timestamps, full_summary, total_start_time, deadline.get_degraded(), mode
+            )
+
+            # Only cache complete results so failed or degraded summaries are retried next time
+            if self._is_cacheable(response):
+                yield Call(self.result_cache.set, cache_key, response)
+            if requested_mode == 'fast':
+                response = dict(response, upgrade_job_id=(yield Call(self._schedule_upgrade, video_url)))
             
-            logger.info(f"Video processing completed in {total_time:.2f}s")
+            logger.info(f"Video processing completed in {response['processing_time']:.2f}s")
             return response
             
         except Exception as e:
-            logger.error(f"Processing failed: {e}")
-            return {
-                'success': False,
-                'error_code': 'PROCESSING_ERROR',
-                'error_message': f'Video processing failed: {str(e)}',
-                'suggestions': ['Check video URL and try again']
-            }
+            return self._processing_error(e)
+
+    def _pipeline_deadline(self) -> Deadline:
+        # PIPELINE_DEADLINE_SECONDS=0 disables the budget
+        return Deadline(PIPELINE_DEADLINE_SECONDS or None)
+
+    def _timestamps_deadline(self, deadline: Deadline) -> Deadline:
+        return deadline.stage('timestamps', deadline.remaining() - SUMMARY_RESERVE_SECONDS)
+
+    def _flight_key(self, video_url: str, mode: str) -> Optional[str]:
+        """Single-flight key for a request, None when the URL has no video id"""
+        try:
+            return f"video:{self.extract_video_id(video_url)}:{mode}"
+        except ValueError:
+            return None
+
+    def _shared_response(self, result: Dict, total_start_time: float) -> Dict:
+        """A concurrent run's result as this caller's response"""
+        if not result.get('success'):
+            return result
+        logger.info("Served by an in-flight run for the same video")
+        return dict(result, processing_time=time.time() - total_start_time, coalesced=True)
+
+    def _record_pipeline_metrics(self, response: Dict, mode: str, total_start_time: float):
+        """Count a finished request by outcome; latency and degradations only for runs made by this request"""
+        metrics = get_metrics()
+        if not response.get('success'):
+            outcome = 'error'
+        elif response.get('cached'):
+            outcome = 'cached'
+        elif response.get('coalesced'):
+            outcome = 'coalesced'
+        elif response.get('degraded'):
+            outcome = 'degraded'
+        else:
+            outcome = 'complete'
+        metrics.inc('summarizer_pipeline_requests_total', mode=mode, outcome=outcome)
+        if outcome in ('complete', 'degraded'):
+            # Cache hits, shared results and errors would drag the pipeline latency down
+            metrics.observe('summarizer_stage_duration_seconds', time.time() - total_start_time, stage='pipeline')
+        if outcome == 'degraded':
+            for entry in response['degraded']:
+                metrics.inc('summarizer_degraded_total', stage=entry['stage'], reason=entry['reason'])
+
+    def _effective_mode(self, mode: str, deadline: Deadline, video_url: str) -> str:
+        """Fast mode instead of full when every LLM provider is down
+
+        The video is deferred for a full run, queued by the first request that
+        finds a provider available again.
+        """
+        if mode != 'full':
+            return mode
+        if not self.llm_handler.has_available_provider():
+            logger.warning("No LLM provider available, processing in fast mode")
+            deadline.degrade(FAST_MODE_FALLBACK_REASON)
+            self._defer_upgrade(video_url)
+            return 'fast'
+        self._submit_deferred_upgrades()
+        return mode
+
+    def _serves_cached(self, cached_result: Dict, mode: str) -> bool:
+        # A fast result answers fast requests only; full requests replace it
+        return mode == 'fast' or cached_result.get('mode', 'full') == 'full'
+
+    def _is_cacheable(self, response: Dict) -> bool:
+        """Complete results only; failed LLM steps degrade, so they are retried next time
+
+        The fallback to fast mode is not counted: that result is complete for
+        what fast mode does, until a full result replaces it.
+        """
+        return not any(entry['reason'] != FAST_MODE_FALLBACK_REASON for entry in response['degraded'])
+
+    def _schedule_upgrade(self, video_url: str) -> Optional[str]:
+        """Queue the full pipeline so its result replaces a fast one; the job id, or None"""
+        if not FAST_MODE_UPGRADE or not self.llm_handler.has_available_provider():
+            return None
+        self._submit_deferred_upgrades()
+        try:
+            return get_job_queue().submit(video_url)
+        except Exception as e:
+            logger.warning(f"Could not queue full processing: {e}")
+            return None
+
+    def _defer_upgrade(self, video_url: str):
+        """Hold a full request served in fast mode until a provider recovers"""
+        if not FAST_MODE_UPGRADE:
+            return
+        try:
+            get_job_queue().defer(video_url)
+        except Exception as e:
+            logger.warning(f"Could not defer full processing: {e}")
+
+    def _submit_deferred_upgrades(self):
+        """Queue the full runs deferred while every provider was down"""
+        if not FAST_MODE_UPGRADE:
+            return
+        try:
+            job_ids = get_job_queue().submit_deferred()
+        except Exception as e:
+            logger.warning(f"Could not queue deferred full processing: {e}")
+            return
+        if job_ids:
+            logger.info(f"Queued {len(job_ids)} full runs deferred while providers were down")
+
+    def _invalid_mode_error(self, mode: str) -> Dict:
+        return {
+            'success': False,
+            'error_code': 'INVALID_MODE',
+            'error_message': f"Unknown processing mode '{mode}'",
+            'suggestions': [f"Use one of: {', '.join(PROCESSING_MODES)}"]
+        }
+
+    def _result_cache_key(self, subtitle_result: Dict) -> str:
+        return self.result_cache.make_key(
+            subtitle_result['video_info'].video_id,
+            hash_transcript(subtitle_result['transcript_index']),
+            PROMPT_TEMPLATE_VERSION,
+            self.llm_handler.get_model_signature()
+        )
+
+    def _cached_response(self, cached_result: Dict, subtitle_result: Dict, total_start_time: float) -> Dict:
+        response = dict(cached_result)
+        response['processing_time'] = time.time() - total_start_time
+        response['subtitle_extraction_time'] = subtitle_result['processing_time']
+        response['cached'] = True
+        response.setdefault('degraded', [])
+        response.setdefault('mode', 'full')
+        logger.info(f"Served cached result in {response['processing_time']:.3f}s")
+        return response
+
+    def _build_response(self, subtitle_result: Dict, timestamps: List[Timestamp], full_summary: str,
+                        total_start_time: float, degraded: Optional[List[Dict]] = None, mode: str = 'full') -> Dict:
+        """Assemble the process_video response"""
+        video_info = subtitle_result['video_info']
+        executive_summary = self._extract_executive_summary(full_summary)
+        total_time = time.time() - total_start_time
+        
+        return {
+            'success': True,
+            'video_id': video_info.video_id,
+            'title': video_info.title,
+            'duration': video_info.duration,
+            'channel': video_info.channel,
+            'upload_date': video_info.upload_date,
+            'chapters': video_info.chapters,
+            'timestamps': [
+                {
+                    'time': ts.time,
+                    'title': ts.title,
+                    'section_id': ts.section_id,
+                    'start_index': ts.start_index,
+                    'end_index': ts.end_index
+                } for ts in timestamps
+            ],
+            'executive_summary': executive_summary,
+            'full_summary': full_summary,
+            'processing_time': total_time,
+            'subtitle_extraction_time': subtitle_result['processing_time'],
+            # Transcript language, so section requests reload the same transcript
+            'language': subtitle_result['language'],
+            'cached': False,
+            # True when the result came from a concurrent run for the same video
+            'coalesced': False,
+            'mode': mode,
+            # Stages that took a shortcut to stay within the deadline
+            'degraded': degraded or []
+        }
+
+    def _processing_error(self, e: Exception) -> Dict:
+        logger.error(f"Processing failed: {e}")
+        return {
+            'success': False,
+            'error_code': 'PROCESSING_ERROR',
+            'error_message': f'Video processing failed: {str(e)}',
+            'suggestions': ['Check video URL and try again']
+        }
 
     def _extract_executive_summary(self, full_summary: str) -> str:
         """Extract executive summary from full summary"""
@@ -769,10 +1596,15 @@ def summarize_full_video(transcript: str, timestamps: List[Dict], video_info: Di
     ]
     return summarizer.summarize_full_video(transcript, timestamp_objects, video_info_obj)
 
-def process_video(video_url: str) -> Dict:
+def process_video(video_url: str, mode: str = 'full') -> Dict:
     """Main function to process video and return complete summary"""
     summarizer = YouTubeSummarizer()
-    return summarizer.process_video(video_url)
+    return summarizer.process_video(video_url, mode=mode)
+
+async def process_video_async(video_url: str, mode: str = 'full') -> Dict:
+    """Async process_video for ASGI views and other asyncio callers"""
+    summarizer = YouTubeSummarizer()
+    return await summarizer.process_video_async(video_url, mode=mode)
 
 
 if __name__ == "__main__":
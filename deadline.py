@@ -0,0 +1,85 @@
+import os
+import math
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# End-to-end budget for one process_video call (seconds)
+PIPELINE_DEADLINE_SECONDS = float(os.getenv('PIPELINE_DEADLINE_SECONDS', '120'))
+# An LLM call is not started with less time than this left
+DEADLINE_MIN_CALL_SECONDS = float(os.getenv('DEADLINE_MIN_CALL_SECONDS', '2'))
+
+class DeadlineExceeded(Exception):
+    """Not enough of the request's time budget is left to start the operation"""
+
+class Deadline:
+    """Absolute time budget for one request, shared by every stage it passes through
+
+    Stages take child deadlines that never outlive their parent and share its
+    list of degradations, so the response can report every shortcut taken.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, stage: str = 'pipeline',
+                 parent: Optional['Deadline'] = None):
+        expires_at = time.monotonic() + seconds if seconds is not None else math.inf
+        if parent is not None:
+            expires_at = min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+        self.stage_name = stage
+        self.degraded = parent.degraded if parent is not None else []
+        self._lock = parent._lock if parent is not None else threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has_time(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def cap(self, seconds: float) -> float:
+        """The smaller of ``seconds`` and the time left"""
+        return min(seconds, self.remaining())
+
+    def timeout(self) -> Optional[float]:
+        """Time left as a timeout argument (None when unlimited)"""
+        return None if math.isinf(self.expires_at) else self.remaining()
+
+    def stage(self, name: str, seconds: Optional[float] = None) -> 'Deadline':
+        """Child deadline for one stage, optionally with a tighter budget"""
+        return Deadline(seconds, stage=name, parent=self)
+
+    def degrade(self, reason: str):
+        """Record that this stage took a shortcut"""
+        entry = {'stage': self.stage_name, 'reason': reason}
+        with self._lock:
+            if entry not in self.degraded:
+                self.degraded.append(entry)
+
+    def get_degraded(self) -> List[Dict]:
+        with self._lock:
+            return list(self.degraded)
+
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+def current_deadline() -> Deadline:
+    """Deadline of the running request, or an unlimited one outside a deadline scope"""
+    deadline = _current_deadline.get()
+    return deadline if deadline is not None else Deadline()
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """Make ``deadline`` current for the enclosed code (and tasks/threads started with its context)"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+def submit_with_deadline(executor, fn, *args, **kwargs):
+    """executor.submit that carries the current deadline into the worker thread"""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,210 @@
+import os
+import re
+import logging
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from text_utils import get_stop_words
+from prompt_budget import split_units
+
+logger = logging.getLogger(__name__)
+
+# Sentences taken for the overview and for each section
+EXTRACTIVE_OVERVIEW_SENTENCES = int(os.getenv('EXTRACTIVE_OVERVIEW_SENTENCES', '3'))
+EXTRACTIVE_SECTION_SENTENCES = int(os.getenv('EXTRACTIVE_SECTION_SENTENCES', '2'))
+EXTRACTIVE_TITLE_WORDS = int(os.getenv('EXTRACTIVE_TITLE_WORDS', '6'))
+# Transcript characters read for titles and summaries; longer transcripts are sampled
+EXTRACTIVE_SAMPLE_CHARS = int(os.getenv('EXTRACTIVE_SAMPLE_CHARS', '60000'))
+# Caption lines per sampled run, long enough to keep most sentences whole
+SAMPLE_BLOCK_LINES = 12
+
+# Spoken filler that is not in the stop word list but never makes a good keyphrase
+FILLER_WORDS = {
+    'um', 'uh', 'like', 'yeah', 'okay', 'ok', 'really', 'going', 'gonna', 'know', 'right', 'actually',
+    'basically', 'thing', 'things', 'get', 'got', 'let', 'lets', 'say', 'said', 'see', 'want', 'also',
+    'one', 'well', 'lot', 'way', 'kind', 'sort', 'here', 'there', 'what', 'which', 'who', 'our', 'us',
+    'me', 'my', 'do', 'does', 'did', 'have', 'had', 'been', 'were', 'being', 'about', 'into', 'out',
+    'up', 'down', 'over', 'again', 'because', 'would', 'could', 'make', 'made', 'go', 'look', 'think',
+    'much', 'many', 'something', 'anything', 'everything', 'dont', 'im', 'its', 'thats', 'youre'
+}
+
+class ExtractiveSummarizer:
+    """LLM-free titles and summaries from the transcript itself
+
+    Titles are the highest TF-IDF keyphrases of each section (IDF taken across
+    sections, so words shared by the whole video do not win). Summary sentences
+    are ranked with TextRank over hashed TF-IDF vectors; above ``max_units``
+    sentences the similarity graph gets too large, so sentences are scored by
+    similarity to the transcript centroid instead. Long transcripts are read
+    through evenly spaced runs of caption lines, about ``sample_chars`` in
+    all, so the cost stays flat however long the video is.
+    """
+
+    def __init__(self, n_features: int = 1024, max_units: int = 600, damping: float = 0.85,
+                 iterations: int = 30, sample_chars: int = EXTRACTIVE_SAMPLE_CHARS):
+        self.n_features = n_features
+        self.max_units = max_units
+        self.sample_chars = sample_chars
+        self.damping = damping
+        self.iterations = iterations
+        self.ignored_words = get_stop_words() | FILLER_WORDS
+        self._word_re = re.compile(r"[a-z][a-z0-9'-]*")
+
+    def _words(self, text: str) -> List[str]:
+        return [word.replace("'", '') for word in self._word_re.findall(text.lower())]
+
+    def section_titles(self, section_texts: Sequence[str], only: Optional[Sequence[int]] = None) -> List[str]:
+        """One keyphrase title per section, "Section N" where nothing stands out
+
+        With only (section positions), just those sections are titled, in that
+        order; the others still count towards how distinctive each word is.
+        """
+        budget = self._section_budget(len(section_texts))
+        samples = ['\n'.join(_sample_blocks(text, budget)) for text in section_texts]
+        positions = range(len(samples)) if only is None else only
+        phrase_lists = {i: self._candidate_phrases(samples[i]) for i in positions}
+        document_frequency = Counter(
+            word for i, sample in enumerate(samples)
+            for word in (
+                {word for phrase in phrase_lists[i] for word in phrase} if i in phrase_lists
+                else self._content_words(sample)
+            )
+        )
+        n_sections = len(section_texts)
+
+        titles = {}
+        for i, phrases in phrase_lists.items():
+            counts = Counter(word for phrase in phrases for word in phrase)
+            weights = {
+                word: count * (np.log((1 + n_sections) / (1 + document_frequency[word])) + 1.0)
+                for word, count in counts.items()
+            }
+            titles[i] = self._title_from_phrases(phrases, weights) or f"Section {i + 1}"
+        return [titles[i] for i in positions]
+
+    def _is_content_word(self, word: str) -> bool:
+        return len(word) > 2 and word not in self.ignored_words and not word.isdigit()
+
+    def _content_words(self, text: str) -> set:
+        return {word for word in self._words(text) if self._is_content_word(word)}
+
+    def _candidate_phrases(self, text: str) -> List[Tuple[str, ...]]:
+        """Runs of up to three content words between ignored words"""
+        phrases = []
+        run = []
+        for word in self._words(text) + ['']:
+            if self._is_content_word(word):
+                run.append(word)
+                continue
+            for size in range(1, 4):
+                phrases.extend(tuple(run[j:j + size]) for j in range(len(run) - size + 1))
+            run = []
+        return phrases
+
+    def _title_from_phrases(self, phrases: List[Tuple[str, ...]], weights: dict) -> str:
+        if not phrases:
+            return ''
+        frequency = Counter(phrases)
+        # Weight of the words, a bonus for phrases said more than once, and a mild preference for length
+        scored = sorted(
+            set(phrases),
+            key=lambda phrase: (sum(weights[word] for word in phrase) * (1 + 0.5 * (frequency[phrase] - 1))
+                                / (1 + 0.3 * (len(phrase) - 1))),
+            reverse=True
+        )
+        best = scored[0]
+        title_words = list(best)
+        if len(title_words) == 1:
+            # A lone word reads better paired with the next distinct keyphrase
+            for phrase in scored[1:]:
+                if not set(phrase) & set(title_words) and len(title_words) + 1 + len(phrase) <= EXTRACTIVE_TITLE_WORDS:
+                    title_words += ['and'] + list(phrase)
+                    break
+        return ' '.join(word if word == 'and' else word.capitalize() for word in title_words)
+
+    def summarize(self, section_texts: Sequence[str], overview_count: int = EXTRACTIVE_OVERVIEW_SENTENCES,
+                  section_count: int = EXTRACTIVE_SECTION_SENTENCES) -> Tuple[List[str], List[List[str]]]:
+        """Top-ranked sentences for the whole video and for each section, in transcript order"""
+        budget = self._section_budget(len(section_texts))
+        units = []
+        unit_sections = []
+        for section_id, text in enumerate(section_texts):
+            # Caption lines break sentences across newlines; runs are split apart so no unit spans a gap
+            section_units = [
+                unit for block in _sample_blocks(text, budget) for unit in split_units(' '.join(block.split()))
+            ]
+            units.extend(section_units)
+            unit_sections.extend([section_id] * len(section_units))
+        if not units:
+            return [], [[] for _ in section_texts]
+
+        scores = self.rank(units)
+        unit_sections = np.asarray(unit_sections)
+
+        overview = np.sort(np.argsort(-scores, kind='stable')[:overview_count])
+        per_section = []
+        for section_id in range(len(section_texts)):
+            members = np.flatnonzero(unit_sections == section_id)
+            top = np.sort(members[np.argsort(-scores[members], kind='stable')[:section_count]])
+            per_section.append([units[i] for i in top])
+        return [units[i] for i in overview], per_section
+
+    def _section_budget(self, n_sections: int) -> int:
+        return max(self.sample_chars // max(n_sections, 1), 2000)
+
+    def rank(self, units: Sequence[str]) -> np.ndarray:
+        """TextRank centrality of each unit (centroid similarity for very long transcripts)"""
+        rows, cols, values = self._tfidf_entries(units)
+        if len(units) > self.max_units:
+            centroid = np.bincount(cols, weights=values, minlength=self.n_features) / len(units)
+            return np.bincount(rows, weights=values * centroid[cols], minlength=len(units)).astype(np.float32)
+
+        matrix = np.zeros((len(units), self.n_features), dtype=np.float32)
+        matrix[rows, cols] = values
+        similarity = matrix @ matrix.T
+        np.fill_diagonal(similarity, 0.0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        # Units sharing no terms with anything link uniformly
+        transition = np.where(row_sums > 0, similarity / np.maximum(row_sums, 1e-9), 1.0 / len(units))
+        scores = np.full(len(units), 1.0 / len(units), dtype=np.float32)
+        for _ in range(self.iterations):
+            updated = (1 - self.damping) / len(units) + self.damping * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < 1e-6:
+                scores = updated
+                break
+            scores = updated
+        return scores
+
+    def _tfidf_entries(self, units: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Nonzero (row, column, value) entries of the row-normalized unit x hashed-term TF-IDF matrix"""
+        vocabulary = {}
+        rows = []
+        cols = []
+        for i, unit in enumerate(units):
+            for word in self._words(unit):
+                if word not in self.ignored_words:
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(word, len(vocabulary)) % self.n_features)
+
+        # One entry per (unit, term) with its count as the term frequency
+        cells, counts = np.unique(
+            np.asarray(rows, dtype=np.int64) * self.n_features + np.asarray(cols, dtype=np.int64),
+            return_counts=True
+        )
+        rows, cols = np.divmod(cells, self.n_features)
+        document_frequency = np.bincount(cols, minlength=self.n_features)
+        values = counts * (np.log((1 + len(units)) / (1 + document_frequency[cols])) + 1.0)
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(units)))
+        return rows, cols, values / np.maximum(norms[rows], 1e-9)
+
+def _sample_blocks(text: str, max_chars: int) -> List[str]:
+    """text as one block if within max_chars, otherwise evenly spaced runs of whole lines totalling about that"""
+    if len(text) <= max_chars:
+        return [text]
+    lines = text.split('\n')
+    starts = range(0, len(lines), SAMPLE_BLOCK_LINES)
+    keep = max(1, len(starts) * max_chars // len(text))
+    picks = np.unique(np.linspace(0, len(starts) - 1, keep).round().astype(np.int64))
+    return ['\n'.join(lines[starts[i]:starts[i] + SAMPLE_BLOCK_LINES]) for i in picks]
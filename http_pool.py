@@ -0,0 +1,119 @@
+import os
+import asyncio
+import threading
+import weakref
+import logging
+from typing import Dict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing and default timeouts for outbound YouTube and Together.ai traffic
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # distinct hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+# The async client serves many concurrent requests from one process, so it gets a larger pool
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv('HTTP_ASYNC_MAX_CONNECTIONS', '100'))
+
+class _PoolStats:
+    """Process-wide request and connection counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            reused = max(0, self.requests - self.connections_opened)
+            return {
+                'requests': self.requests,
+                'connections_opened': self.connections_opened,
+                'connections_reused': reused,
+                'reuse_ratio': reused / self.requests if self.requests else 0.0
+            }
+
+_stats = _PoolStats()
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _stats.record_connection()
+        return super()._new_conn()
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _stats.record_connection()
+        return super()._new_conn()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with default connect/read timeouts and connection reuse counting"""
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        _stats.record_request()
+        return super().send(request, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+def create_session() -> requests.Session:
+    """Build a keep-alive session with the configured pool size and timeouts"""
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session shared by all outbound YouTube and Together.ai requests"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def get_pool_stats() -> Dict:
+    return _stats.snapshot()
+
+# httpx connections belong to the event loop that opened them, so clients are kept per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled keep-alive httpx client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            follow_redirects=True
+        )
+        _async_clients[loop] = client
+    return client
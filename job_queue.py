@@ -0,0 +1,167 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import storage_codec
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Background processing: in-node worker threads fed by a local queue
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_TTL = int(os.getenv('JOB_TTL', str(24 * 3600)))  # finished jobs stay fetchable this long
+# A running job not updated for this long belonged to a worker that died
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '900'))
+# How often the SSE progress feed re-reads a job record
+JOB_EVENT_POLL_INTERVAL = float(os.getenv('JOB_EVENT_POLL_INTERVAL', '0.5'))
+JOB_SCHEMA_VERSION = 1
+DEFERRED_PREFIX = 'deferred:'
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+class JobQueue:
+    """Runs process_video jobs in background threads and records them in a shared store
+
+    Job records live in SQLite, so any worker process on the node can report a
+    job's status or result, and finished results survive restarts until JOB_TTL.
+    """
+
+    def __init__(self, store: SQLiteStore, runner: Callable[[str, Callable, str], Dict],
+                 workers: int = JOB_WORKERS, ttl: float = JOB_TTL):
+        self.store = store
+        self.runner = runner
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+
+    def submit(self, video_url: str, mode: str = 'full') -> str:
+        """Queue a video in a processing mode and return its job id immediately
+
+        A video already queued or running in the same mode returns that job
+        instead, so duplicate submissions share its progress feed and result.
+        """
+        active_job = self._active_job(video_url, mode)
+        if active_job is not None:
+            logger.info(f"Attached to job {active_job['job_id']} for {video_url}")
+            return active_job['job_id']
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._save({
+            'job_id': job_id,
+            'video_url': video_url,
+            'mode': mode,
+            'status': JOB_QUEUED,
+            'stage': JOB_QUEUED,
+            'progress': 0.0,
+            'created_at': now,
+            'updated_at': now,
+            'result': None,
+            'error': None
+        })
+        self.store.set(self._video_key(video_url, mode), job_id.encode('utf-8'), ttl=self.ttl)
+        self._executor.submit(self._run, job_id, video_url, mode)
+        logger.info(f"Queued {mode} job {job_id} for {video_url}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current job record, or None for unknown or expired jobs"""
+        payload = self.store.get(job_id)
+        if payload is None:
+            return None
+        try:
+            job = storage_codec.decode(payload, schema=JOB_SCHEMA_VERSION)
+        except storage_codec.CodecError as e:
+            logger.warning(f"Discarding unreadable job record {job_id}: {e}")
+            return None
+        if job['status'] not in JOB_FINISHED_STATES and time.time() - job['updated_at'] > JOB_STALE_SECONDS:
+            job = self._update(job, status=JOB_FAILED, error='Job was interrupted, please resubmit')
+        return job
+
+    def defer(self, video_url: str):
+        """Hold a video until submit_deferred, for work that cannot run yet
+
+        Deferring the same video again keeps a single entry; entries not
+        submitted within JOB_TTL are dropped.
+        """
+        self.store.set(self._deferred_key(video_url), video_url.encode('utf-8'), ttl=self.ttl)
+
+    def submit_deferred(self) -> List[str]:
+        """Queue every deferred video in full mode and return the job ids"""
+        job_ids = []
+        for key, payload in self.store.items(DEFERRED_PREFIX):
+            # Deleted first so each entry is queued once; a worker racing for it attaches to the same job
+            self.store.delete(key)
+            job_ids.append(self.submit(payload.decode('utf-8')))
+        return job_ids
+
+    @staticmethod
+    def _video_key(video_url: str, mode: str) -> str:
+        return f"video:{mode}:{video_url}"
+
+    @staticmethod
+    def _deferred_key(video_url: str) -> str:
+        return f"{DEFERRED_PREFIX}{video_url}"
+
+    def _active_job(self, video_url: str, mode: str) -> Optional[Dict]:
+        """The unfinished job for a video in a mode, if any"""
+        payload = self.store.get(self._video_key(video_url, mode))
+        if payload is None:
+            return None
+        job = self.get(payload.decode('utf-8'))
+        return job if job is not None and job['status'] not in JOB_FINISHED_STATES else None
+
+    def _run(self, job_id: str, video_url: str, mode: str):
+        job = self.get(job_id)
+        if job is None:
+            return
+        job = self._update(job, status=JOB_RUNNING)
+
+        def report_progress(stage: str, progress: float):
+            nonlocal job
+            job = self._update(job, stage=stage, progress=progress)
+
+        try:
+            result = self.runner(video_url, report_progress, mode)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self._update(job, status=JOB_FAILED, error=f'Video processing failed: {str(e)}')
+            return
+
+        if result.get('success'):
+            self._update(job, status=JOB_COMPLETED, stage='complete', progress=1.0, result=result)
+        else:
+            self._update(job, status=JOB_FAILED, result=result,
+                         error=result.get('error_message', 'Failed to process video'))
+        logger.info(f"Job {job_id} finished")
+
+    def _update(self, job: Dict, **changes) -> Dict:
+        job = dict(job, **changes, updated_at=time.time())
+        self._save(job)
+        return job
+
+    def _save(self, job: Dict):
+        self.store.set(job['job_id'], storage_codec.encode(job, schema=JOB_SCHEMA_VERSION), ttl=self.ttl)
+
+def _process_video(video_url: str, progress_callback: Callable, mode: str) -> Dict:
+    from core_summarizer import YouTubeSummarizer
+    return YouTubeSummarizer().process_video(video_url, progress_callback=progress_callback, mode=mode)
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(SQLiteStore('jobs', default_ttl=JOB_TTL), _process_video)
+    return _job_queue
@@ -1,20 +1,175 @@
 import os
+import json
+import math
 import time
+import asyncio
+import threading
 import logging
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError, wait
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
+import requests
 import together
+import together.utils
+
+from http_pool import HTTP_CONNECT_TIMEOUT, get_session
+from sqlite_store import SQLiteStore
+from rate_limiter import RateLimitExceeded, estimate_tokens, get_rate_limiter
+from prompt_budget import MODEL_OUTPUT_TOKENS, get_token_counter, prompt_token_budget
+from deadline import DEADLINE_MIN_CALL_SECONDS, DeadlineExceeded, current_deadline, submit_with_deadline
+from metrics import get_metrics
 
 # Load environment variables 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Longest single provider call; the request's deadline can shorten it further
+LLM_CALL_TIMEOUT = float(os.getenv('LLM_CALL_TIMEOUT', '60'))
+# Mistral stream tokens are read here so a stalled stream is given up on time; its
+# connection is then closed, which ends the read still waiting in the worker
+LLM_CALL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LLM_CALL_WORKERS', '32')), thread_name_prefix='llm-call'
+)
+
+# Adaptive routing: prefer the provider with the lowest latency per successful call
+LLM_ADAPTIVE_ROUTING = os.getenv('LLM_ADAPTIVE_ROUTING', 'True') == 'True'
+LLM_EWMA_ALPHA = float(os.getenv('LLM_EWMA_ALPHA', '0.2'))
+LLM_PRIOR_LATENCY = float(os.getenv('LLM_PRIOR_LATENCY', '5'))  # assumed seconds until measured
+LLM_MIN_SAMPLES = int(os.getenv('LLM_MIN_SAMPLES', '5'))
+# Stats older than this are ignored so a provider that was slow gets tried again
+LLM_STATS_STALE_SECONDS = float(os.getenv('LLM_STATS_STALE_SECONDS', '900'))
+
+# Hedging: send the prompt to the next provider too if the first is slower than its p95
+LLM_HEDGING = os.getenv('LLM_HEDGING', 'False') == 'True'
+LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '1'))
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '10'))  # before p95 is known
+HEDGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LLM_HEDGE_WORKERS', '32')), thread_name_prefix='llm-hedge'
+)
+
+class ProviderState:
+    """Per-provider quota and performance state shared by every worker process on the node
+
+    A quota hit recorded by one worker is seen by all the others, so they skip
+    the exhausted provider instead of each paying for a failing call; latency
+    and error-rate EWMAs are pooled the same way. Falls back to process memory
+    if the SQLite store cannot be opened.
+    """
+
+    DEFAULTS = {
+        'quota_exceeded': False,
+        'last_error_time': 0,
+        'latency_ewma': None,
+        'latency_var': 0.0,
+        'error_rate': 0.0,
+        'samples': 0,
+        'stats_updated_at': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'token_calls': 0
+    }
+
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        self.store = store
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> Dict:
+        if self.store is not None:
+            try:
+                payload = self.store.get(provider)
+                return dict(self.DEFAULTS, **json.loads(payload)) if payload else dict(self.DEFAULTS)
+            except Exception as e:
+                logger.warning(f"Provider state read failed: {e}")
+        with self._lock:
+            return dict(self.DEFAULTS, **self._memory.get(provider, {}))
+
+    def modify(self, provider: str, change: Callable[[Dict], None]):
+        """Apply change(state), which edits the state in place, as one atomic read-modify-write
+
+        With the SQLite store the read and write share one write transaction, so
+        workers and threads recording at the same moment never overwrite each
+        other; the in-memory fallback holds the lock for the whole step.
+        """
+        def apply(payload: Optional[bytes]):
+            state = dict(self.DEFAULTS, **json.loads(payload)) if payload else dict(self.DEFAULTS)
+            change(state)
+            return json.dumps(state).encode('utf-8'), None
+
+        if self.store is not None:
+            try:
+                self.store.update(provider, apply)
+                return
+            except Exception as e:
+                logger.warning(f"Provider state update failed: {e}")
+        with self._lock:
+            state = dict(self.DEFAULTS, **self._memory.get(provider, {}))
+            change(state)
+            self._memory[provider] = state
+
+    def update(self, provider: str, **changes):
+        self.modify(provider, lambda state: state.update(changes))
+
+    def record_call(self, provider: str, latency: float, success: bool, alpha: float = LLM_EWMA_ALPHA):
+        """Fold one call into the provider's latency and error-rate EWMAs"""
+        self.modify(provider, lambda state: self._fold_call(state, latency, success, alpha))
+
+    @staticmethod
+    def _fold_call(state: Dict, latency: float, success: bool, alpha: float):
+        now = time.time()
+        if now - state['stats_updated_at'] > LLM_STATS_STALE_SECONDS:
+            state.update(latency_ewma=None, latency_var=0.0, error_rate=0.0, samples=0)
+
+        state['error_rate'] = (1 - alpha) * state['error_rate'] + alpha * (0.0 if success else 1.0)
+        if success:
+            # Latency of failed calls says little about a healthy response, so only successes count
+            if state['latency_ewma'] is None:
+                state['latency_ewma'] = latency
+            else:
+                diff = latency - state['latency_ewma']
+                increment = alpha * diff
+                state['latency_ewma'] += increment
+                state['latency_var'] = (1 - alpha) * (state['latency_var'] + diff * increment)
+        state['samples'] += 1
+        state['stats_updated_at'] = now
+
+    def record_tokens(self, provider: str, prompt_tokens: int, completion_tokens: int):
+        """Add one call's token usage to the provider's running totals"""
+        def add(state: Dict):
+            state['prompt_tokens'] += prompt_tokens
+            state['completion_tokens'] += completion_tokens
+            state['token_calls'] += 1
+
+        self.modify(provider, add)
+
+_provider_state = None
+_provider_state_lock = threading.Lock()
+
+def get_provider_state() -> ProviderState:
+    """Process-wide view of the node's shared provider state"""
+    global _provider_state
+    if _provider_state is None:
+        with _provider_state_lock:
+            if _provider_state is None:
+                try:
+                    store = SQLiteStore('llm_provider_state')
+                except Exception as e:
+                    logger.warning(f"Shared provider state unavailable, using process memory: {e}")
+                    store = None
+                _provider_state = ProviderState(store)
+    return _provider_state
+
 class MultiLLMHandler:
     """Handles multiple LLM providers with automatic fallback"""
 
-    def __init__(self):
+    def __init__(self, provider_state: Optional[ProviderState] = None):
+        # Quota flags live in the shared store rather than on the instance
+        self.provider_state = provider_state or get_provider_state()
+        # Requests are paced against per-provider, per-key buckets shared by all workers
+        self.rate_limiter = get_rate_limiter()
+
         # Initialize Gemini
         self.gemini_api_key = os.getenv('GOOGLE_API_KEY')
         if self.gemini_api_key:
@@ -33,15 +188,29 @@ class MultiLLMHandler:
             self.together_model = None
             logger.warning("No Together API key found. Mistral-7B will not be available.")
 
-        # Track usage and errors
-        self.gemini_quota_exceeded = False
-        self.gemini_last_error_time = 0
-        self.together_quota_exceeded = False
-        self.together_last_error_time = 0
-
         # Quota reset time (24 hours)
         self.quota_reset_hours = 24
 
+    @property
+    def gemini_quota_exceeded(self) -> bool:
+        return self.provider_state.get('gemini')['quota_exceeded']
+
+    @property
+    def gemini_last_error_time(self) -> float:
+        return self.provider_state.get('gemini')['last_error_time']
+
+    @property
+    def together_quota_exceeded(self) -> bool:
+        return self.provider_state.get('mistral')['quota_exceeded']
+
+    @property
+    def together_last_error_time(self) -> float:
+        return self.provider_state.get('mistral')['last_error_time']
+
+    def _mark_quota_exceeded(self, provider: str):
+        self.provider_state.update(provider, quota_exceeded=True, last_error_time=time.time())
+        get_metrics().inc('summarizer_llm_quota_exhausted_total', provider=provider)
+
     def _is_quota_reset(self, last_error_time: float) -> bool:
         if last_error_time == 0:
             return True
@@ -49,40 +218,256 @@ class MultiLLMHandler:
         return hours_since_error >= self.quota_reset_hours
 
     def _reset_quota_flags(self):
-        current_time = time.time()
-
-        if self.gemini_quota_exceeded and self._is_quota_reset(self.gemini_last_error_time):
-            self.gemini_quota_exceeded = False
+        gemini = self.provider_state.get('gemini')
+        if gemini['quota_exceeded'] and self._is_quota_reset(gemini['last_error_time']):
+            self.provider_state.update('gemini', quota_exceeded=False)
             logger.info("Gemini quota reset - will try again")
 
-        if self.together_quota_exceeded and self._is_quota_reset(self.together_last_error_time):
-            self.together_quota_exceeded = False
+        mistral = self.provider_state.get('mistral')
+        if mistral['quota_exceeded'] and self._is_quota_reset(mistral['last_error_time']):
+            self.provider_state.update('mistral', quota_exceeded=False)
             logger.info("Together.ai quota reset - will try again")
 
+    def _providers(self) -> List[Dict]:
+        """Configured providers in static priority order"""
+        return [
+            {
+                'name': 'gemini', 'label': 'Gemini',
+                'available': bool(self.gemini_model) and not self.gemini_quota_exceeded,
+                'call': self._call_gemini, 'call_async': self._call_gemini_async,
+                'stream': self._stream_gemini, 'stream_async': self._stream_gemini_async
+            },
+            {
+                'name': 'mistral', 'label': 'Mistral-7B',
+                'available': bool(self.together_model) and not self.together_quota_exceeded,
+                'call': self._call_mistral, 'call_async': self._call_mistral_async,
+                'stream': self._stream_mistral, 'stream_async': self._stream_mistral_async
+            },
+        ]
+
+    def has_available_provider(self) -> bool:
+        """Whether any provider is configured and not out of quota"""
+        self._reset_quota_flags()
+        return any(provider['available'] for provider in self._providers())
+
+    def _provider_stats(self, provider: str) -> Dict:
+        """Mean and p95 latency and error rate, with priors for unmeasured or stale providers"""
+        state = self.provider_state.get(provider)
+        fresh = time.time() - state['stats_updated_at'] <= LLM_STATS_STALE_SECONDS
+        measured = fresh and state['latency_ewma'] is not None and state['samples'] >= LLM_MIN_SAMPLES
+        mean = state['latency_ewma'] if measured else LLM_PRIOR_LATENCY
+        return {
+            'mean_latency': mean,
+            # Normal approximation from the EWMA variance
+            'p95_latency': mean + 1.645 * math.sqrt(max(state['latency_var'], 0.0)) if measured else None,
+            'error_rate': state['error_rate'] if fresh else 0.0,
+            'samples': state['samples'] if fresh else 0
+        }
+
+    def _ranked_providers(self) -> List[Dict]:
+        """Available providers, cheapest expected time to a good answer first
+
+        Expected cost is mean latency divided by success rate; the sort is stable,
+        so with no measurements the static Gemini-then-Mistral order is kept.
+        """
+        providers = [provider for provider in self._providers() if provider['available']]
+        if not LLM_ADAPTIVE_ROUTING:
+            return providers
+
+        def expected_cost(provider: Dict) -> float:
+            stats = self._provider_stats(provider['name'])
+            return stats['mean_latency'] / max(0.05, 1.0 - stats['error_rate'])
+
+        return sorted(providers, key=expected_cost)
+
+    def _hedge_delay(self, provider: str) -> float:
+        p95 = self._provider_stats(provider)['p95_latency']
+        return max(LLM_HEDGE_MIN_DELAY, p95) if p95 is not None else LLM_HEDGE_DEFAULT_DELAY
+
+    def _api_key(self, provider: str) -> Optional[str]:
+        return self.gemini_api_key if provider == 'gemini' else self.together_api_key
+
+    def prompt_token_budget(self, task_tokens: int) -> int:
+        """Prompt size that fits every provider the call could be routed or fall back to"""
+        return prompt_token_budget(
+            [provider['name'] for provider in self._providers() if provider['available']], task_tokens
+        )
+
+    def _record_usage(self, provider: str, prompt: str, response_text: str,
+                      prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+        """Record one call's token counts, using provider-reported usage when there is any"""
+        counter = get_token_counter()
+        if prompt_tokens:
+            # Reported sizes keep the local counter calibrated to the provider's tokenizer
+            counter.calibrate(counter.count_raw(prompt), prompt_tokens)
+        else:
+            prompt_tokens = counter.count(prompt)
+        if not completion_tokens:
+            completion_tokens = counter.count(response_text)
+        logger.info(f"{provider} call: {prompt_tokens} prompt + {completion_tokens} completion tokens")
+        self.provider_state.record_tokens(provider, prompt_tokens, completion_tokens)
+        metrics = get_metrics()
+        metrics.inc('summarizer_llm_tokens_total', prompt_tokens, provider=provider, kind='prompt')
+        metrics.inc('summarizer_llm_tokens_total', completion_tokens, provider=provider, kind='completion')
+
+    def _record_gemini_usage(self, prompt: str, response) -> str:
+        text = response.text.strip()
+        usage = getattr(response, 'usage_metadata', None)
+        self._record_usage(
+            'gemini', prompt, text,
+            getattr(usage, 'prompt_token_count', None), getattr(usage, 'candidates_token_count', None)
+        )
+        return text
+
+    def _call_timeout(self) -> float:
+        """Seconds the next provider call may take; raises DeadlineExceeded if too little is left"""
+        deadline = current_deadline()
+        if not deadline.has_time(DEADLINE_MIN_CALL_SECONDS):
+            raise DeadlineExceeded(f"Only {deadline.remaining():.1f}s left for {deadline.stage_name}")
+        return deadline.cap(LLM_CALL_TIMEOUT)
+
+    def _rate_wait_budget(self) -> float:
+        # Queueing for capacity must leave time for the call itself
+        return min(self.rate_limiter.max_wait, current_deadline().remaining() - DEADLINE_MIN_CALL_SECONDS)
+
+    def _retry_allowed(self, wait_time: float) -> bool:
+        """Whether another attempt after wait_time still fits the deadline; records the skip if not"""
+        deadline = current_deadline()
+        if deadline.has_time(wait_time + DEADLINE_MIN_CALL_SECONDS):
+            return True
+        deadline.degrade('LLM retries skipped')
+        return False
+
+    def _acquire_rate(self, provider: str, prompt: str) -> float:
+        """Wait for rate limit capacity within the deadline; returns the timeout for the call
+
+        Raises RateLimitExceeded if capacity would take too long and
+        DeadlineExceeded if the deadline leaves no time for the call.
+        """
+        self._call_timeout()
+        self.rate_limiter.acquire(provider, self._api_key(provider), estimate_tokens(prompt), self._rate_wait_budget())
+        return self._call_timeout()
+
+    async def _acquire_rate_async(self, provider: str, prompt: str) -> float:
+        self._call_timeout()
+        await self.rate_limiter.acquire_async(
+            provider, self._api_key(provider), estimate_tokens(prompt), self._rate_wait_budget()
+        )
+        return self._call_timeout()
+
+    def _timed_call(self, provider: Dict, prompt: str) -> Optional[str]:
+        """Call one provider and record its latency and outcome"""
+        started = time.time()
+        try:
+            result = provider['call'](prompt)
+        except DeadlineExceeded as e:
+            # Out of time budget, not a provider failure: leave the stats alone
+            logger.warning(f"{e}, skipping {provider['label']}")
+            current_deadline().degrade('LLM calls skipped')
+            return None
+        except RateLimitExceeded as e:
+            # Our own pacing, not a provider failure: leave the stats alone
+            logger.warning(f"{e}, skipping {provider['label']}")
+            return None
+        except Exception as e:
+            logger.error(f"{provider['label']} error: {e}")
+            result = None
+        self._record_call(provider['name'], time.time() - started, bool(result))
+        return result
+
+    async def _timed_call_async(self, provider: Dict, prompt: str) -> Optional[str]:
+        started = time.time()
+        try:
+            result = await provider['call_async'](prompt)
+        except DeadlineExceeded as e:
+            logger.warning(f"{e}, skipping {provider['label']}")
+            current_deadline().degrade('LLM calls skipped')
+            return None
+        except RateLimitExceeded as e:
+            logger.warning(f"{e}, skipping {provider['label']}")
+            return None
+        except Exception as e:
+            logger.error(f"{provider['label']} error: {e}")
+            result = None
+        self._record_call(provider['name'], time.time() - started, bool(result))
+        return result
+
+    def _record_call(self, provider: str, latency: float, success: bool):
+        self.provider_state.record_call(provider, latency, success)
+        get_metrics().observe(
+            'summarizer_llm_call_duration_seconds', latency, provider=provider,
+            outcome='success' if success else 'failure'
+        )
+
+    def _record_retry(self, provider: str):
+        get_metrics().inc('summarizer_llm_retries_total', provider=provider)
+
+    def _record_fallback(self, provider: str, next_provider: Optional[str]):
+        """Count a failed call and where the request went next (None: nowhere)"""
+        get_metrics().inc('summarizer_llm_fallbacks_total', provider=provider, to=next_provider or 'none')
+
+    def _gemini_retry_delay(self, error: Exception, attempt: int, max_retries: int) -> Optional[float]:
+        """Record a failed Gemini call; seconds to wait before retrying, or None to give up"""
+        error_str = str(error) or type(error).__name__
+        if "429" in error_str and "quota" in error_str.lower():
+            self._mark_quota_exceeded('gemini')
+            logger.warning(f"Gemini quota exceeded: {error_str}")
+            return None
+        elif "rate limit" in error_str.lower():
+            # Drain the shared bucket so every worker holds off, instead of sleeping here
+            wait_time = 2 ** attempt
+            logger.warning(f"Gemini rate limited, backing off {wait_time}s...")
+            self.rate_limiter.backoff('gemini', self.gemini_api_key, wait_time)
+            return 0
+        else:
+            logger.error(f"Gemini error (attempt {attempt + 1}): {error_str}")
+            if attempt == max_retries - 1:
+                return None
+            return 1
+
     def _call_gemini(self, prompt: str, max_retries: int = 2) -> Optional[str]:
         if not self.gemini_model or self.gemini_quota_exceeded:
             return None
 
         for attempt in range(max_retries):
+            timeout = self._acquire_rate('gemini', prompt)
             try:
-                response = self.gemini_model.generate_content(prompt)
-                return response.text.strip()
+                response = self.gemini_model.generate_content(prompt, request_options={'timeout': timeout})
+                return self._record_gemini_usage(prompt, response)
             except Exception as e:
-                error_str = str(e)
-                if "429" in error_str and "quota" in error_str.lower():
-                    self.gemini_quota_exceeded = True
-                    self.gemini_last_error_time = time.time()
-                    logger.warning(f"Gemini quota exceeded: {error_str}")
+                wait_time = self._gemini_retry_delay(e, attempt, max_retries)
+                if wait_time is None:
                     return None
-                elif "rate limit" in error_str.lower():
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Gemini rate limited, waiting {wait_time}s...")
+                if attempt < max_retries - 1 and not self._retry_allowed(wait_time):
+                    return None
+                if attempt < max_retries - 1:
+                    self._record_retry('gemini')
+                if wait_time:
                     time.sleep(wait_time)
-                else:
-                    logger.error(f"Gemini error (attempt {attempt + 1}): {error_str}")
-                    if attempt == max_retries - 1:
-                        return None
-                    time.sleep(1)
+
+        return None
+
+    async def _call_gemini_async(self, prompt: str, max_retries: int = 2) -> Optional[str]:
+        if not self.gemini_model or self.gemini_quota_exceeded:
+            return None
+
+        for attempt in range(max_retries):
+            timeout = await self._acquire_rate_async('gemini', prompt)
+            try:
+                response = await asyncio.wait_for(
+                    self.gemini_model.generate_content_async(prompt, request_options={'timeout': timeout}), timeout
+                )
+                return self._record_gemini_usage(prompt, response)
+            except Exception as e:
+                wait_time = self._gemini_retry_delay(e, attempt, max_retries)
+                if wait_time is None:
+                    return None
+                if attempt < max_retries - 1 and not self._retry_allowed(wait_time):
+                    return None
+                if attempt < max_retries - 1:
+                    self._record_retry('gemini')
+                if wait_time:
+                    await asyncio.sleep(wait_time)
 
         return None
 
@@ -90,86 +475,424 @@ class MultiLLMHandler:
         if not self.together_model or self.together_quota_exceeded:
             return None
 
-        formatted_prompt = f"<s>[INST] {prompt} [/INST]"
-
         for attempt in range(max_retries):
+            timeout = self._acquire_rate('mistral', prompt)
             try:
-                response = together.Complete.create(
-                    prompt=formatted_prompt,
-                    model=self.together_model,
-                    max_tokens=2048,
-                    temperature=0.7,
-                    top_p=0.9,
-                    top_k=50,
-                    repetition_penalty=1.1
-                )
+                response = self._together_request(self._mistral_payload(prompt), timeout).json()
                 response_text = response['output']['choices'][0]['text'].strip()
+                usage = response['output'].get('usage') or response.get('usage') or {}
+                self._record_usage(
+                    'mistral', prompt, response_text, usage.get('prompt_tokens'), usage.get('completion_tokens')
+                )
                 return response_text
             except Exception as e:
-                error_str = str(e)
-                if "quota" in error_str.lower() or "limit" in error_str.lower():
-                    self.together_quota_exceeded = True
-                    self.together_last_error_time = time.time()
+                error_str = str(e) or type(e).__name__
+                # Checked before the quota test: "rate limit" also contains "limit"
+                if isinstance(e, together.RateLimitError) or "rate limit" in error_str.lower():
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Together.ai rate limited, backing off {wait_time}s...")
+                    self.rate_limiter.backoff('mistral', self.together_api_key, wait_time)
+                    if attempt < max_retries - 1 and not self._retry_allowed(wait_time):
+                        return None
+                    if attempt < max_retries - 1:
+                        self._record_retry('mistral')
+                elif "quota" in error_str.lower() or "limit" in error_str.lower():
+                    self._mark_quota_exceeded('mistral')
                     logger.warning(f"Together.ai quota exceeded: {error_str}")
                     return None
-                elif "rate limit" in error_str.lower():
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Together.ai rate limited, waiting {wait_time}s...")
-                    time.sleep(wait_time)
                 else:
                     logger.error(f"Together.ai error (attempt {attempt + 1}): {error_str}")
-                    if attempt == max_retries - 1:
+                    if attempt == max_retries - 1 or not self._retry_allowed(1):
                         return None
+                    self._record_retry('mistral')
                     time.sleep(1)
 
         return None
 
+    def _mistral_payload(self, prompt: str, **options) -> Dict:
+        return {
+            'model': self.together_model,
+            'prompt': f"<s>[INST] {prompt} [/INST]",
+            'max_tokens': MODEL_OUTPUT_TOKENS['mistral'],
+            'temperature': 0.7,
+            'top_p': 0.9,
+            'top_k': 50,
+            'repetition_penalty': 1.1,
+            **options
+        }
+
+    def _together_request(self, payload: Dict, timeout: float, stream: bool = False) -> requests.Response:
+        """POST to Together's completion API on the pooled session
+
+        together 0.2 sends its requests without a timeout, so the call is made
+        here instead: timeout bounds connecting and every read, which for a
+        reply that arrives all at once is the whole call.
+        """
+        response = get_session().post(
+            together.api_base_complete, headers=together.utils.get_headers(), json=payload,
+            timeout=(min(HTTP_CONNECT_TIMEOUT, timeout), timeout), stream=stream
+        )
+        together.utils.response_status_exception(response)
+        return response
+
+    @staticmethod
+    def _together_tokens(response: requests.Response) -> Iterator[str]:
+        """Text of each event of a Together stream, as together.Complete.create_streaming parses them"""
+        for event in together.utils.sse_client(response).events():
+            if event.data == '[DONE]':
+                return
+            data = json.loads(event.data)
+            if 'error' in data:
+                raise together.ResponseError(data['error'])
+            yield data['choices'][0]['text']
+
+    async def _call_mistral_async(self, prompt: str) -> Optional[str]:
+        # together 0.2 has no async client, so the blocking call runs in a worker thread
+        # (to_thread carries the deadline along)
+        return await asyncio.to_thread(self._call_mistral, prompt)
+
     def generate_content(self, prompt: str, task_type: Optional[str] = None) -> Optional[str]:
+        """Generate with the best-performing provider, falling back (or hedging) to the others"""
+        self._reset_quota_flags()
 
+        providers = self._ranked_providers()
+        if LLM_HEDGING and len(providers) >= 2:
+            result = self._generate_hedged(prompt, providers[0], providers[1], self._next_name(providers, 2))
+            if result:
+                return result
+            providers = providers[2:]
+
+        for i, provider in enumerate(providers):
+            logger.info(f"Trying {provider['label']}...")
+            result = self._timed_call(provider, prompt)
+            if result:
+                logger.info(f"{provider['label']} successful")
+                return result
+            logger.warning(f"{provider['label']} failed")
+            self._record_fallback(provider['name'], providers[i + 1]['name'] if i + 1 < len(providers) else None)
+
+        logger.error("All LLM providers failed")
+        return None
+
+    def _generate_hedged(self, prompt: str, primary: Dict, secondary: Dict,
+                         next_provider: Optional[str]) -> Optional[str]:
+        """Start the primary; if it has not answered by its p95, race the secondary against it
+
+        next_provider is where the request goes if both fail, for the fallback count.
+        """
+        delay = self._hedge_delay(primary['name'])
+        logger.info(f"Trying {primary['label']} (hedging with {secondary['label']} after {delay:.1f}s)...")
+        primary_future = submit_with_deadline(HEDGE_EXECUTOR, self._timed_call, primary, prompt)
+        try:
+            result = primary_future.result(timeout=delay)
+        except FuturesTimeoutError:
+            logger.info(f"{primary['label']} slower than {delay:.1f}s, sending hedge to {secondary['label']}")
+            hedge_future = submit_with_deadline(HEDGE_EXECUTOR, self._timed_call, secondary, prompt)
+            pending = {primary_future, hedge_future}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result:
+                        # The slower call finishes in the background and only updates the stats
+                        return self._hedge_won(primary, secondary, future is hedge_future, result)
+            return self._hedge_failed(primary, secondary, next_provider)
+
+        if result:
+            logger.info(f"{primary['label']} successful")
+            return result
+        logger.warning(f"{primary['label']} failed, trying {secondary['label']}...")
+        self._record_fallback(primary['name'], secondary['name'])
+        result = self._timed_call(secondary, prompt)
+        if not result:
+            self._record_fallback(secondary['name'], next_provider)
+        return result
+
+    def _hedge_won(self, primary: Dict, secondary: Dict, by_hedge: bool, result: str) -> str:
+        """A race's answer; one from the hedge counts as a fallback from the slow primary"""
+        winner = secondary if by_hedge else primary
+        logger.info(f"{winner['label']} successful")
+        if by_hedge:
+            self._record_fallback(primary['name'], secondary['name'])
+        return result
+
+    def _hedge_failed(self, primary: Dict, secondary: Dict, next_provider: Optional[str]) -> None:
+        logger.warning(f"{primary['label']} and {secondary['label']} both failed")
+        self._record_fallback(primary['name'], secondary['name'])
+        self._record_fallback(secondary['name'], next_provider)
+        return None
+
+    @staticmethod
+    def _next_name(providers: List[Dict], position: int) -> Optional[str]:
+        return providers[position]['name'] if position < len(providers) else None
+
+    async def generate_content_async(self, prompt: str, task_type: Optional[str] = None) -> Optional[str]:
+        """Async generate_content with the same routing, fallback and hedging"""
         self._reset_quota_flags()
 
-        if self.gemini_model and not self.gemini_quota_exceeded:
-            logger.info("Trying Gemini...")
-            result = self._call_gemini(prompt)
+        providers = self._ranked_providers()
+        if LLM_HEDGING and len(providers) >= 2:
+            result = await self._generate_hedged_async(
+                prompt, providers[0], providers[1], self._next_name(providers, 2)
+            )
             if result:
-                logger.info("Gemini successful")
                 return result
-            else:
-                logger.warning("Gemini failed, trying Mistral-7B...")
+            providers = providers[2:]
 
-        if self.together_model and not self.together_quota_exceeded:
-            logger.info("Trying Mistral-7B via Together.ai...")
-            result = self._call_mistral(prompt)
+        for i, provider in enumerate(providers):
+            logger.info(f"Trying {provider['label']}...")
+            result = await self._timed_call_async(provider, prompt)
             if result:
-                logger.info("Mistral-7B successful")
+                logger.info(f"{provider['label']} successful")
                 return result
-            else:
-                logger.warning("Mistral-7B failed")
+            logger.warning(f"{provider['label']} failed")
+            self._record_fallback(provider['name'], providers[i + 1]['name'] if i + 1 < len(providers) else None)
 
         logger.error("All LLM providers failed")
         return None
 
+    async def _generate_hedged_async(self, prompt: str, primary: Dict, secondary: Dict,
+                                     next_provider: Optional[str]) -> Optional[str]:
+        delay = self._hedge_delay(primary['name'])
+        logger.info(f"Trying {primary['label']} (hedging with {secondary['label']} after {delay:.1f}s)...")
+        primary_task = asyncio.ensure_future(self._timed_call_async(primary, prompt))
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            result = primary_task.result()
+            if result:
+                logger.info(f"{primary['label']} successful")
+                return result
+            logger.warning(f"{primary['label']} failed, trying {secondary['label']}...")
+            self._record_fallback(primary['name'], secondary['name'])
+            result = await self._timed_call_async(secondary, prompt)
+            if not result:
+                self._record_fallback(secondary['name'], next_provider)
+            return result
+
+        logger.info(f"{primary['label']} slower than {delay:.1f}s, sending hedge to {secondary['label']}")
+        hedge_task = asyncio.ensure_future(self._timed_call_async(secondary, prompt))
+        pending = {primary_task, hedge_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result:
+                        return self._hedge_won(primary, secondary, task is hedge_task, result)
+            return self._hedge_failed(primary, secondary, next_provider)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _record_stream_call(self, provider: str, started: float, success: bool,
+                            error: Optional[Exception] = None):
+        """Latency and outcome of a whole stream, as _timed_call records a blocking call"""
+        if isinstance(error, (RateLimitExceeded, DeadlineExceeded)):
+            # Our own pacing or time budget, not a provider failure: leave the stats alone
+            return
+        self._record_call(provider, time.time() - started, success)
+
+    def _record_stream_error(self, provider: str, error: Exception):
+        """Apply the same quota bookkeeping as the blocking calls to a failed stream"""
+        error_str = str(error)
+        if isinstance(error, (RateLimitExceeded, DeadlineExceeded)):
+            logger.warning(error_str)
+        elif "rate limit" in error_str.lower():
+            logger.warning(f"{provider} rate limited, backing off 1s")
+            self.rate_limiter.backoff(provider, self._api_key(provider), 1)
+        elif provider == 'gemini' and "429" in error_str and "quota" in error_str.lower():
+            self._mark_quota_exceeded('gemini')
+            logger.warning(f"Gemini quota exceeded: {error_str}")
+        elif provider == 'mistral' and ("quota" in error_str.lower() or "limit" in error_str.lower()):
+            self._mark_quota_exceeded('mistral')
+            logger.warning(f"Together.ai quota exceeded: {error_str}")
+        else:
+            logger.error(f"{provider} stream error: {error_str}")
+
+    def _stream_gemini(self, prompt: str) -> Iterator[str]:
+        timeout = self._acquire_rate('gemini', prompt)
+        response = self.gemini_model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+        for chunk in response:
+            text = chunk.text
+            if text:
+                yield text
+
+    def _stream_mistral(self, prompt: str) -> Iterator[str]:
+        timeout = self._acquire_rate('mistral', prompt)
+        give_up_at = time.monotonic() + timeout
+        response = self._together_request(self._mistral_payload(prompt, stream_tokens=True), timeout, stream=True)
+        tokens = self._together_tokens(response)
+        # The read timeout bounds each wait for data, not the whole stream: tokens are read
+        # on the call executor and the stream is given up once the call's time is up
+        done = object()
+        try:
+            while True:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Mistral stream exceeded {timeout:.1f}s")
+                try:
+                    token = LLM_CALL_EXECUTOR.submit(next, tokens, done).result(timeout=remaining)
+                except FuturesTimeoutError:
+                    raise TimeoutError(f"Mistral stream exceeded {timeout:.1f}s") from None
+                if token is done:
+                    return
+                if token:
+                    yield token
+        finally:
+            response.close()
+
+    async def _stream_gemini_async(self, prompt: str) -> AsyncIterator[str]:
+        timeout = await self._acquire_rate_async('gemini', prompt)
+        response = await self.gemini_model.generate_content_async(
+            prompt, stream=True, request_options={'timeout': timeout}
+        )
+        async for chunk in response:
+            text = chunk.text
+            if text:
+                yield text
+
+    async def _stream_mistral_async(self, prompt: str) -> AsyncIterator[str]:
+        # No async client in together 0.2: pull each token from the sync stream in a worker thread
+        tokens = self._stream_mistral(prompt)
+        done = object()
+        while True:
+            token = await asyncio.to_thread(next, tokens, done)
+            if token is done:
+                return
+            yield token
+
+    def generate_content_stream(self, prompt: str, task_type: Optional[str] = None) -> Iterator[str]:
+        """Yield text chunks as the provider produces them
+
+        Falls back to the next provider only if the current one fails before
+        producing its first chunk; once text has been sent it cannot be retracted,
+        so a mid-stream failure is raised to the caller.
+        """
+        self._reset_quota_flags()
+
+        providers = self._ranked_providers()
+        for i, provider in enumerate(providers):
+            label = provider['label']
+            stream = provider['stream']
+            next_provider = providers[i + 1]['name'] if i + 1 < len(providers) else None
+            logger.info(f"Streaming from {label}...")
+            started = time.time()
+            chunks = []
+            try:
+                for chunk in stream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                self._record_stream_call(provider['name'], started, False, e)
+                if chunks:
+                    logger.error(f"{label} stream failed mid-response: {e}")
+                    raise
+                self._record_stream_error(provider['name'], e)
+                logger.warning(f"{label} failed before first token, trying next provider")
+                self._record_fallback(provider['name'], next_provider)
+                continue
+            self._record_stream_call(provider['name'], started, bool(chunks))
+            if chunks:
+                logger.info(f"{label} stream complete")
+                self._record_usage(provider['name'], prompt, ''.join(chunks))
+                return
+            logger.warning(f"{label} returned an empty stream, trying next provider")
+            self._record_fallback(provider['name'], next_provider)
 
+        logger.error("All LLM providers failed")
+
+    async def generate_content_stream_async(self, prompt: str, task_type: Optional[str] = None) -> AsyncIterator[str]:
+        """Async generate_content_stream with the same before-first-chunk fallback rule"""
+        self._reset_quota_flags()
+
+        providers = self._ranked_providers()
+        for i, provider in enumerate(providers):
+            label = provider['label']
+            stream = provider['stream_async']
+            next_provider = providers[i + 1]['name'] if i + 1 < len(providers) else None
+            logger.info(f"Streaming from {label}...")
+            started = time.time()
+            chunks = []
+            try:
+                async for chunk in stream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                self._record_stream_call(provider['name'], started, False, e)
+                if chunks:
+                    logger.error(f"{label} stream failed mid-response: {e}")
+                    raise
+                self._record_stream_error(provider['name'], e)
+                logger.warning(f"{label} failed before first token, trying next provider")
+                self._record_fallback(provider['name'], next_provider)
+                continue
+            self._record_stream_call(provider['name'], started, bool(chunks))
+            if chunks:
+                logger.info(f"{label} stream complete")
+                self._record_usage(provider['name'], prompt, ''.join(chunks))
+                return
+            logger.warning(f"{label} returned an empty stream, trying next provider")
+            self._record_fallback(provider['name'], next_provider)
+
+        logger.error("All LLM providers failed")
+
+    def get_model_signature(self) -> str:
+        """Identify the configured provider chain, e.g. for cache keys"""
+        providers = []
+        if self.gemini_model:
+            providers.append(f"gemini={self.gemini_model.model_name}")
+        if self.together_model:
+            providers.append(f"mistral={self.together_model}")
+        return ",".join(providers) or "none"
 
     def get_status(self) -> Dict:
+        gemini = self.provider_state.get('gemini')
+        mistral = self.provider_state.get('mistral')
         return {
             'gemini': {
                 'available': self.gemini_model is not None,
-                'quota_exceeded': self.gemini_quota_exceeded,
-                'last_error_time': self.gemini_last_error_time,
-                'api_key_configured': bool(self.gemini_api_key)
+                'quota_exceeded': gemini['quota_exceeded'],
+                'last_error_time': gemini['last_error_time'],
+                'api_key_configured': bool(self.gemini_api_key),
+                'performance': self._provider_stats('gemini'),
+                'tokens': {
+                    'prompt_tokens': gemini['prompt_tokens'],
+                    'completion_tokens': gemini['completion_tokens'],
+                    'calls': gemini['token_calls']
+                }
             },
             'mistral': {
                 'available': self.together_model is not None,
-                'quota_exceeded': self.together_quota_exceeded,
-                'last_error_time': self.together_last_error_time,
-                'api_key_configured': bool(self.together_api_key)
-            }
+                'quota_exceeded': mistral['quota_exceeded'],
+                'last_error_time': mistral['last_error_time'],
+                'api_key_configured': bool(self.together_api_key),
+                'performance': self._provider_stats('mistral'),
+                'tokens': {
+                    'prompt_tokens': mistral['prompt_tokens'],
+                    'completion_tokens': mistral['completion_tokens'],
+                    'calls': mistral['token_calls']
+                }
+            },
+            'token_counting': get_token_counter().method,
+            'routing_order': [provider['name'] for provider in self._ranked_providers()],
+            'hedging': LLM_HEDGING
         }
 
 def create_llm_handler() -> MultiLLMHandler:
     return MultiLLMHandler()
 
+_llm_handler = None
+_llm_handler_lock = threading.Lock()
+
+def get_llm_handler() -> MultiLLMHandler:
+    """Process-wide handler, so providers are configured once per worker"""
+    global _llm_handler
+    if _llm_handler is None:
+        with _llm_handler_lock:
+            if _llm_handler is None:
+                _llm_handler = MultiLLMHandler()
+    return _llm_handler
+
 def test_llm_providers():
     handler = create_llm_handler()
 
@@ -205,7 +928,8 @@ def test_llm_providers():
 
     print("\n📊 Provider Status:")
     status = handler.get_status()
-    for provider, info in status.items():
+    for provider in ('gemini', 'mistral'):
+        info = status[provider]
         print(f"  {provider.title()}: {'✅' if info['available'] else '❌'} "
               f"(Quota exceeded: {'Yes' if info['quota_exceeded'] else 'No'})")
 
@@ -0,0 +1,257 @@
+import os
+import time
+import atexit
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+METRICS_DISABLED = os.getenv('METRICS_DISABLED', 'False') == 'True'
+# Each worker adds its counts to the shared table this often (and before serving /metrics)
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Histogram upper bounds in seconds: cache hits and local stages at the low end, LLM calls at the top
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name -> (type, help); every recorded metric must be declared here
+METRICS = {
+    'summarizer_stage_duration_seconds': (
+        'histogram',
+        'Time spent in each pipeline stage (subtitles, segmentation, titles, summary); '
+        'pipeline covers whole runs, not cache hits, shared results or errors'
+    ),
+    'summarizer_pipeline_requests_total': ('counter', 'Pipeline requests by mode and outcome'),
+    'summarizer_degraded_total': ('counter', 'Pipeline steps that degraded to a cheaper result, by stage and reason'),
+    'summarizer_llm_call_duration_seconds': ('histogram', 'Provider call latency, retries included, by outcome'),
+    'summarizer_llm_retries_total': ('counter', 'Provider call retries after an error or rate limit'),
+    'summarizer_llm_fallbacks_total': (
+        'counter', 'Failed provider calls by provider and the one tried next ("none" if none was left)'
+    ),
+    'summarizer_llm_quota_exhausted_total': ('counter', 'Times a provider was marked out of quota'),
+    'summarizer_llm_tokens_total': ('counter', 'Tokens sent to and received from each provider'),
+    'summarizer_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss)'),
+    'summarizer_cache_hit_ratio': ('gauge', 'Share of cache lookups that hit, over all workers'),
+    'summarizer_llm_provider_available': ('gauge', 'Whether a provider is configured and not out of quota'),
+}
+
+class MetricsRegistry:
+    """Counters, histograms and gauges summed over every worker process on the node
+
+    Each process buffers its increments in memory and adds them to a shared
+    SQLite table in one transaction every METRICS_FLUSH_INTERVAL seconds, so
+    recording a sample never touches the disk and any worker can render the
+    node-wide totals. Samples are keyed by their exposition line (name plus
+    labels) and histogram buckets are stored cumulative, so rendering is a
+    straight read. Without the table (store=None) totals are per process.
+    Gauges are set at scrape time by the caller and are not shared.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore], flush_interval: float = METRICS_FLUSH_INTERVAL,
+                 enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, float] = {}
+        self._totals: Dict[str, float] = {}  # used when there is no shared table
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """Add amount to a counter"""
+        self._check(name, 'counter')
+        self._add({_sample_key(name, labels): amount})
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one histogram observation"""
+        self._check(name, 'histogram')
+        deltas = {
+            _sample_key(f"{name}_bucket", dict(labels, le=_format_value(bound))): 1.0
+            for bound in LATENCY_BUCKETS if value <= bound
+        }
+        deltas[_sample_key(f"{name}_bucket", dict(labels, le='+Inf'))] = 1.0
+        deltas[_sample_key(f"{name}_sum", labels)] = value
+        deltas[_sample_key(f"{name}_count", labels)] = 1.0
+        self._add(deltas)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of the with-block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self._check(name, 'gauge')
+        with self._lock:
+            self._gauges[_sample_key(name, labels)] = float(value)
+
+    def _check(self, name: str, kind: str):
+        if METRICS.get(name, (None,))[0] != kind:
+            raise ValueError(f"{name} is not a declared {kind}")
+
+    def _after_fork(self):
+        """In a forked worker, drop the parent's unflushed counts and flusher thread (lock held)"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._pending.clear()
+            self._flusher = None
+
+    def _add(self, deltas: Dict[str, float]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._after_fork()
+            target = self._pending if self.store is not None else self._totals
+            for key, delta in deltas.items():
+                target[key] = target.get(key, 0.0) + delta
+            if self.store is not None and self._flusher is None:
+                self._start_flusher()
+
+    def _start_flusher(self):
+        """Background flush loop for this process (lock held)"""
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+
+        self._flusher = threading.Thread(target=loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def flush(self):
+        """Add this process's buffered increments to the shared table"""
+        if self.store is None:
+            return
+        with self._lock:
+            self._after_fork()
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.store.increment_many(pending)
+        except Exception as e:
+            # Keep the counts for the next attempt rather than losing them
+            logger.warning(f"Metrics flush failed: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] = self._pending.get(key, 0.0) + delta
+
+    def collect(self) -> Dict[str, float]:
+        """Current value of every counter and histogram sample, node-wide when shared"""
+        if self.store is None:
+            with self._lock:
+                return dict(self._totals)
+        self.flush()
+        try:
+            return {key: float(value) for key, value in self.store.items()}
+        except Exception as e:
+            logger.warning(f"Metrics read failed: {e}")
+            return {}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        samples = self.collect()
+        self._set_hit_ratios(samples)
+        with self._lock:
+            samples.update(self._gauges)
+
+        families: Dict[str, List[Tuple[str, float]]] = {name: [] for name in METRICS}
+        for key, value in samples.items():
+            family = _family(key)
+            if family is not None:
+                families[family].append((key, value))
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if not families[name]:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(families[name], key=lambda sample: _sort_key(sample[0])):
+                lines.append(f"{key} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _set_hit_ratios(self, samples: Dict[str, float]):
+        lookups: Dict[str, List[float]] = {}
+        for key, value in samples.items():
+            if key.startswith('summarizer_cache_requests_total{'):
+                labels = _parse_labels(key)
+                counts = lookups.setdefault(labels.get('cache', ''), [0.0, 0.0])
+                counts[0 if labels.get('result') == 'hit' else 1] += value
+        for cache, (hits, misses) in lookups.items():
+            if hits + misses:
+                self.set_gauge('summarizer_cache_hit_ratio', hits / (hits + misses), cache=cache)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _unescape(value: str) -> str:
+    return value.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
+
+def _sample_key(name: str, labels: Dict) -> str:
+    """Exposition name of a sample, e.g. name{a="1",b="2"}; labels sorted so keys are stable"""
+    if not labels:
+        return name
+    pairs = ','.join(f'{label}="{_escape(str(value))}"' for label, value in sorted(labels.items()))
+    return f"{name}{{{pairs}}}"
+
+def _parse_labels(key: str) -> Dict[str, str]:
+    labels = {}
+    body = key[key.index('{') + 1:-1] if '{' in key else ''
+    while body:
+        label, rest = body.split('="', 1)
+        end = 0
+        while rest[end] != '"':
+            end += 2 if rest[end] == '\\' else 1
+        labels[label] = _unescape(rest[:end])
+        body = rest[end + 2:]
+    return labels
+
+def _family(key: str) -> Optional[str]:
+    name = key.split('{', 1)[0]
+    if name in METRICS:
+        return name
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and METRICS.get(name[:-len(suffix)], (None,))[0] == 'histogram':
+            return name[:-len(suffix)]
+    return None
+
+def _sort_key(key: str):
+    """Group a histogram's series together with buckets in ascending le, then _sum and _count"""
+    labels = _parse_labels(key)
+    le = labels.pop('le', None)
+    name = key.split('{', 1)[0]
+    order = 0 if name.endswith('_bucket') else 1 if name.endswith('_sum') else 2
+    return sorted(labels.items()), order, float(le) if le is not None else 0.0
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide registry over the node's shared metrics table (records nothing when disabled)"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                store = None
+                if not METRICS_DISABLED:
+                    try:
+                        store = SQLiteStore('metrics')
+                    except Exception as e:
+                        logger.warning(f"Metrics table unavailable, counting per process: {e}")
+                _metrics = MetricsRegistry(store, enabled=not METRICS_DISABLED)
+                atexit.register(_metrics.flush)
+    return _metrics
@@ -0,0 +1,234 @@
+import os
+import math
+import threading
+import logging
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+
+from text_utils import simple_sentence_tokenize, simple_word_tokenize, get_stop_words
+
+logger = logging.getLogger(__name__)
+
+# Token counting: tiktoken when its encoding can be loaded, otherwise characters per token
+PROMPT_TOKENIZER_ENCODING = os.getenv('PROMPT_TOKENIZER_ENCODING', 'cl100k_base')
+CHARS_PER_TOKEN = float(os.getenv('CHARS_PER_TOKEN', '4'))
+# Counts are corrected towards provider-reported usage with this smoothing factor
+TOKEN_CALIBRATION_ALPHA = float(os.getenv('TOKEN_CALIBRATION_ALPHA', '0.2'))
+
+# Context window and reply reservation per provider (tokens)
+MODEL_CONTEXT_TOKENS = {
+    'gemini': int(os.getenv('GEMINI_CONTEXT_TOKENS', '1000000')),
+    'mistral': int(os.getenv('MISTRAL_CONTEXT_TOKENS', '32768')),
+}
+MODEL_OUTPUT_TOKENS = {
+    'gemini': int(os.getenv('GEMINI_OUTPUT_TOKENS', '8192')),
+    'mistral': int(os.getenv('MISTRAL_OUTPUT_TOKENS', '2048')),
+}
+# Headroom for counting error, as a fraction of the window
+PROMPT_SAFETY_MARGIN = float(os.getenv('PROMPT_SAFETY_MARGIN', '0.1'))
+
+# Per-task prompt caps: filling a 1M-token window would cost latency for no better summary
+SUMMARY_PROMPT_TOKENS = int(os.getenv('SUMMARY_PROMPT_TOKENS', '12000'))
+SECTION_PROMPT_TOKENS = int(os.getenv('SECTION_PROMPT_TOKENS', '4000'))
+TITLE_PROMPT_TOKENS = int(os.getenv('TITLE_PROMPT_TOKENS', '3000'))
+TITLE_CONTEXT_TOKENS = int(os.getenv('TITLE_CONTEXT_TOKENS', '120'))  # per section
+
+# Pieces (caption lines or sentences) at the start of each section that are kept before anything else
+SECTION_LEAD_UNITS = int(os.getenv('SECTION_LEAD_UNITS', '3'))
+# Unpunctuated text is split into runs of this many words instead of sentences
+FALLBACK_UNIT_WORDS = int(os.getenv('FALLBACK_UNIT_WORDS', '40'))
+GAP_MARKER = '...'
+
+class TokenCounter:
+    """Counts prompt tokens with tiktoken, or a characters-per-token estimate without it
+
+    Neither matches Gemini's or Mistral's tokenizer exactly, so counts are
+    scaled by a correction factor learned from the prompt sizes the providers
+    report back. The encoding loads in a background thread (tiktoken downloads
+    it when it is not cached locally); counts are estimated until it is ready.
+    """
+
+    def __init__(self, encoding_name: str = PROMPT_TOKENIZER_ENCODING, chars_per_token: float = CHARS_PER_TOKEN):
+        self.encoding_name = encoding_name
+        self.chars_per_token = chars_per_token
+        self.scale = 1.0
+        self._encoding = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Start loading the tiktoken encoding in the background, once"""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._load_encoding, name='tiktoken-load', daemon=True).start()
+
+    def _load_encoding(self):
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding(self.encoding_name)
+        except Exception as e:
+            # The encoding file is downloaded on first use, which fails offline
+            logger.warning(f"tiktoken unavailable, estimating tokens from characters: {e}")
+            return
+        with self._lock:
+            self._encoding = encoding
+            # The correction learned for the estimate does not apply to tiktoken counts
+            self.scale = 1.0
+        logger.info(f"tiktoken encoding {self.encoding_name} loaded")
+
+    @property
+    def encoding(self):
+        """The tiktoken encoding, or None while it loads or when it cannot be loaded"""
+        if not self._loading:
+            self.preload()
+        return self._encoding
+
+    @property
+    def method(self) -> str:
+        return 'tiktoken' if self.encoding is not None else 'estimate'
+
+    def count_raw(self, text: str) -> int:
+        """Uncalibrated count"""
+        if not text:
+            return 0
+        encoding = self.encoding
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def count(self, text: str) -> int:
+        return math.ceil(self.count_raw(text) * self.scale)
+
+    def calibrate(self, raw_count: int, reported_count: int, alpha: float = TOKEN_CALIBRATION_ALPHA):
+        """Move the correction factor towards a provider-reported prompt size"""
+        if raw_count <= 0 or reported_count <= 0:
+            return
+        ratio = min(2.0, max(0.5, reported_count / raw_count))
+        with self._lock:
+            self.scale = (1 - alpha) * self.scale + alpha * ratio
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens, cut at a word boundary"""
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        raw_tokens = int(max_tokens / self.scale)
+        encoding = self.encoding
+        if encoding is not None:
+            prefix = encoding.decode(encoding.encode(text, disallowed_special=())[:raw_tokens])
+        else:
+            prefix = text[:int(raw_tokens * self.chars_per_token)]
+        return prefix.rsplit(' ', 1)[0] if ' ' in prefix else prefix
+
+_token_counter = None
+_token_counter_lock = threading.Lock()
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide token counter; its encoding starts loading when it is created"""
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter()
+                _token_counter.preload()
+    return _token_counter
+
+def count_tokens(text: str) -> int:
+    return get_token_counter().count(text)
+
+def prompt_token_budget(providers: Iterable[str], task_tokens: int) -> int:
+    """Largest prompt every given provider accepts with its reply reserved, capped at task_tokens"""
+    budget = task_tokens
+    for provider in providers:
+        if provider in MODEL_CONTEXT_TOKENS:
+            window = MODEL_CONTEXT_TOKENS[provider] - MODEL_OUTPUT_TOKENS.get(provider, 0)
+            budget = min(budget, int(window * (1 - PROMPT_SAFETY_MARGIN)))
+    return max(0, budget)
+
+def information_scores(units: Sequence[str]) -> List[float]:
+    """How much each piece says: IDF-weighted content words per sqrt(length)"""
+    stop_words = get_stop_words()
+    unit_words = [
+        [word for word in simple_word_tokenize(unit.lower()) if word.isalnum() and word not in stop_words]
+        for unit in units
+    ]
+    document_frequency = Counter(word for words in unit_words for word in set(words))
+    total = len(units) or 1
+    scores = []
+    for words in unit_words:
+        if not words:
+            scores.append(0.0)
+            continue
+        weight = sum(math.log(total / document_frequency[word]) + 1.0 for word in set(words))
+        scores.append(weight / math.sqrt(len(words)))
+    return scores
+
+def select_units(units: Sequence[str], max_tokens: int, lead_positions: Iterable[int] = (0,),
+                 lead_count: int = SECTION_LEAD_UNITS) -> str:
+    """Fill max_tokens with the most useful pieces of a transcript, kept in transcript order
+
+    The first lead_count pieces after each lead position (section starts) go
+    in first; the remaining budget goes to the highest-information pieces. Skipped stretches are marked with an ellipsis.
+    """
+    counter = get_token_counter()
+    if not units:
+        return ''
+
+    # Round-robin over sections so a tight budget still touches every one
+    positions = sorted(set(max(0, position) for position in lead_positions))
+    lead_order = [
+        position + offset
+        for offset in range(lead_count)
+        for position in positions
+        if position + offset < len(units)
+    ]
+    scores = information_scores(units)
+    ranked = sorted(range(len(units)), key=lambda i: scores[i], reverse=True)
+
+    chosen = set()
+    used = 0
+    # Every piece may need a gap marker and a separator
+    overhead = counter.count(f" {GAP_MARKER} ")
+    for i in lead_order + ranked:
+        if i in chosen:
+            continue
+        cost = counter.count(units[i]) + overhead
+        if used + cost > max_tokens:
+            continue
+        chosen.add(i)
+        used += cost
+
+    if not chosen:
+        # Not even one piece fits: fall back to a plain prefix
+        return counter.truncate(' '.join(units), max_tokens)
+
+    pieces = []
+    previous = None
+    for i in sorted(chosen):
+        if previous is not None and i != previous + 1:
+            pieces.append(GAP_MARKER)
+        pieces.append(units[i].strip())
+        previous = i
+    return ' '.join(pieces)
+
+def split_units(text: str) -> List[str]:
+    """Sentences of text, or fixed word runs when it has no sentence punctuation"""
+    sentences = simple_sentence_tokenize(text)
+    if len(sentences) > 1:
+        return [sentence + '.' for sentence in sentences]
+    words = text.split()
+    return [' '.join(words[i:i + FALLBACK_UNIT_WORDS]) for i in range(0, len(words), FALLBACK_UNIT_WORDS)]
+
+def fit_transcript(text: str, max_tokens: int, units: Optional[Sequence[str]] = None,
+                   lead_positions: Iterable[int] = (0,)) -> str:
+    """text unchanged if it fits, otherwise its highest-priority pieces within max_tokens
+
+    units are the pieces to choose from (e.g. caption lines, with section
+    starts as lead_positions); by default the text's sentences.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    return select_units(units if units is not None else split_units(text), max_tokens, lead_positions)
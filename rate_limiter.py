@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlite_store import SQLiteStore
+from prompt_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Client-side limits per provider and API key (0 disables a dimension)
+PROVIDER_RATE_LIMITS = {
+    'gemini': (int(os.getenv('GEMINI_RPM', '15')), int(os.getenv('GEMINI_TPM', '1000000'))),
+    'mistral': (int(os.getenv('MISTRAL_RPM', '60')), int(os.getenv('MISTRAL_TPM', '0'))),
+}
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '10'))  # longest queueing before falling through
+RATE_LIMIT_BURST_SECONDS = float(os.getenv('RATE_LIMIT_BURST_SECONDS', '10'))  # bucket size, in seconds of rate
+RATE_LIMIT_OUTPUT_TOKENS = int(os.getenv('RATE_LIMIT_OUTPUT_TOKENS', '1024'))  # reserved for the reply
+RATE_LIMIT_DISABLED = os.getenv('RATE_LIMIT_DISABLED', 'False') == 'True'
+
+class RateLimitExceeded(Exception):
+    """The provider's bucket cannot admit the call within the allowed wait"""
+
+def estimate_tokens(text: str) -> int:
+    """Prompt tokens plus the reply reservation"""
+    return count_tokens(text) + RATE_LIMIT_OUTPUT_TOKENS
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets per provider and API key
+
+    Buckets live in a shared SQLite table and are updated inside a write
+    transaction, so every worker process on the node draws from the same
+    budget. A call reserves its request and tokens up front, letting the bucket
+    go negative; the returned wait is its place in the queue. Calls that would
+    wait longer than ``max_wait`` reserve nothing and are refused instead.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore], limits: Dict[str, Tuple[int, int]] = PROVIDER_RATE_LIMITS,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.store = store
+        self.limits = limits
+        self.max_wait = max_wait
+        self.burst_seconds = burst_seconds
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket_key(provider: str, api_key: Optional[str]) -> str:
+        # Never store the key itself
+        key_id = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+        return f"{provider}:{key_id}"
+
+    def _rates(self, provider: str) -> Tuple[float, float]:
+        """Refill rates per second for requests and tokens (0 means unlimited)"""
+        rpm, tpm = self.limits.get(provider, (0, 0))
+        return rpm / 60.0, tpm / 60.0
+
+    def _refill(self, state: Optional[Dict], request_rate: float, token_rate: float, now: float) -> Dict:
+        request_capacity = max(1.0, request_rate * self.burst_seconds)
+        token_capacity = token_rate * self.burst_seconds
+        if state is None:
+            return {'requests': request_capacity, 'tokens': token_capacity, 'updated_at': now}
+        elapsed = max(0.0, now - state['updated_at'])
+        return {
+            'requests': min(request_capacity, state['requests'] + elapsed * request_rate),
+            'tokens': min(token_capacity, state['tokens'] + elapsed * token_rate),
+            'updated_at': now
+        }
+
+    def _modify(self, key: str, change):
+        """Apply change(state) -> (new_state, result) atomically, in SQLite or process memory"""
+        def apply(payload: Optional[bytes]):
+            new_state, result = change(json.loads(payload) if payload else None)
+            return (json.dumps(new_state).encode('utf-8') if new_state is not None else None), result
+
+        if self.store is not None:
+            try:
+                return self.store.update(key, apply)
+            except Exception as e:
+                logger.warning(f"Shared rate limit store failed, using process-local buckets: {e}")
+        with self._lock:
+            new_state, result = change(self._memory.get(key))
+            if new_state is not None:
+                self._memory[key] = new_state
+            return result
+
+    def reserve(self, provider: str, api_key: Optional[str], tokens: int,
+                max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve one request and ``tokens``; seconds to wait before sending, or None if refused"""
+        request_rate, token_rate = self._rates(provider)
+        if request_rate <= 0 and token_rate <= 0:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        def change(state):
+            now = time.time()
+            state = self._refill(state, request_rate, token_rate, now)
+            requests_left = state['requests'] - 1 if request_rate > 0 else 0.0
+            tokens_left = state['tokens'] - tokens if token_rate > 0 else 0.0
+            wait = max(
+                0.0,
+                -requests_left / request_rate if request_rate > 0 else 0.0,
+                -tokens_left / token_rate if token_rate > 0 else 0.0
+            )
+            if wait > max_wait:
+                return None, None
+            state['requests'] = requests_left
+            state['tokens'] = tokens_left
+            return state, wait
+
+        return self._modify(self.bucket_key(provider, api_key), change)
+
+    def acquire(self, provider: str, api_key: Optional[str], tokens: int, max_wait: Optional[float] = None):
+        """Block until the call may be sent; raises RateLimitExceeded past max_wait"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        wait = self.reserve(provider, api_key, tokens, max_wait)
+        if wait is None:
+            raise RateLimitExceeded(f"{provider} rate limit: no capacity within {max_wait:.0f}s")
+        if wait > 0:
+            logger.info(f"{provider} rate limit: queued for {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, provider: str, api_key: Optional[str], tokens: int,
+                            max_wait: Optional[float] = None):
+        max_wait = self.max_wait if max_wait is None else max_wait
+        wait = await asyncio.to_thread(self.reserve, provider, api_key, tokens, max_wait)
+        if wait is None:
+            raise RateLimitExceeded(f"{provider} rate limit: no capacity within {max_wait:.0f}s")
+        if wait > 0:
+            logger.info(f"{provider} rate limit: queued for {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def backoff(self, provider: str, api_key: Optional[str], seconds: float):
+        """After a 429, hold every worker's next request on this key for ``seconds``"""
+        request_rate, token_rate = self._rates(provider)
+        if request_rate <= 0:
+            return
+
+        def change(state):
+            state = self._refill(state, request_rate, token_rate, time.time())
+            state['requests'] = min(state['requests'], 1 - seconds * request_rate)
+            return state, None
+
+        self._modify(self.bucket_key(provider, api_key), change)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter over the node's shared buckets"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if RATE_LIMIT_DISABLED:
+                    _rate_limiter = RateLimiter(None, limits={})
+                else:
+                    try:
+                        store = SQLiteStore('rate_limits', default_ttl=24 * 3600)
+                    except Exception as e:
+                        logger.warning(f"Shared rate limit store unavailable, using process memory: {e}")
+                        store = None
+                    _rate_limiter = RateLimiter(store)
+    return _rate_limiter
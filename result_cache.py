@@ -0,0 +1,146 @@
+import os
+import time
+import hashlib
+import threading
+import logging
+from typing import Dict, List, Optional
+
+import storage_codec
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Django cache alias holding pipeline results (see CACHES in settings)
+RESULT_CACHE_ALIAS = os.getenv('RESULT_CACHE_ALIAS', 'results')
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', str(7 * 24 * 3600)))
+# Values are stored as storage_codec frames; bump when the cached result layout changes
+RESULT_CACHE_SCHEMA_VERSION = 1
+
+class LocalResultBackend:
+    """In-process stand-in with the subset of Django's cache API we use
+
+    Used when Django settings are not configured (CLI use) and in tests.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: str, value, timeout: Optional[float] = None):
+        expires_at = time.time() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def _default_backend():
+    """Django cache for RESULT_CACHE_ALIAS, or a local stand-in outside Django"""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            from django.core.cache import caches
+            alias = RESULT_CACHE_ALIAS if RESULT_CACHE_ALIAS in settings.CACHES else 'default'
+            return caches[alias]
+    except Exception as e:
+        logger.warning(f"Django cache unavailable, using local result cache: {e}")
+    return LocalResultBackend()
+
+def hash_transcript(transcript_index) -> str:
+    """Stable content hash of a TranscriptIndex (text and segment timings)"""
+    digest = hashlib.sha256(transcript_index.text.encode('utf-8'))
+    digest.update(transcript_index.starts.tobytes())
+    digest.update(transcript_index.durations.tobytes())
+    return digest.hexdigest()
+
+def hash_text(text: str) -> str:
+    """Content hash of a piece of text (used for per-section summaries)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """Whole-pipeline result cache keyed by video, transcript, prompt version and models"""
+
+    def __init__(self, backend=None, ttl: float = RESULT_CACHE_TTL):
+        self.backend = backend if backend is not None else _default_backend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(video_id: str, transcript_hash: str, prompt_version: str, model_signature: str) -> str:
+        # Keep keys short and memcached-safe regardless of model names
+        model_hash = hashlib.sha256(model_signature.encode('utf-8')).hexdigest()[:12]
+        return f"result:v{prompt_version}:{video_id}:{transcript_hash[:20]}:{model_hash}"
+
+    @staticmethod
+    def make_section_key(content_hash: str, prompt_version: str, model_signature: str) -> str:
+        """Key for a per-section (map step) summary"""
+        model_hash = hashlib.sha256(model_signature.encode('utf-8')).hexdigest()[:12]
+        return f"section:v{prompt_version}:{content_hash[:32]}:{model_hash}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Result cache read failed: {e}")
+            value = None
+        if isinstance(value, bytes):
+            try:
+                value = storage_codec.decode(value, schema=RESULT_CACHE_SCHEMA_VERSION)
+            except storage_codec.CodecError as e:
+                logger.warning(f"Discarding unreadable result cache entry {key}: {e}")
+                value = None
+        # Keys start with their kind (result, section, timestamps), reported as separate caches
+        cache = key.split(':', 1)[0]
+        if value is None:
+            self.misses += 1
+            get_metrics().inc('summarizer_cache_requests_total', cache=cache, result='miss')
+            return None
+        self.hits += 1
+        get_metrics().inc('summarizer_cache_requests_total', cache=cache, result='hit')
+        return value
+
+    def set(self, key: str, result: Dict):
+        try:
+            self.backend.set(key, storage_codec.encode(result, schema=RESULT_CACHE_SCHEMA_VERSION), timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Result cache write failed: {e}")
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
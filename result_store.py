@@ -0,0 +1,96 @@
+import os
+import hashlib
+import threading
+import logging
+from typing import Dict, Optional
+
+import storage_codec
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Server-side storage for finished results and in-progress view state; sessions only hold ids
+RESULT_STORE_TTL = int(os.getenv('RESULT_STORE_TTL', str(24 * 3600)))
+RESULT_STORE_MAX_BYTES = int(os.getenv('RESULT_STORE_MAX_MB', '256')) * 1024 * 1024
+RESULT_STORE_SCHEMA_VERSION = 1
+# Expired rows are purged and the size cap enforced once per this many writes
+RESULT_STORE_MAINTENANCE_INTERVAL = int(os.getenv('RESULT_STORE_MAINTENANCE_INTERVAL', '100'))
+
+class ResultStore:
+    """Compressed, content-addressed documents in a shared SQLite table
+
+    A document's id is the hash of its canonical JSON, so saving the same
+    result twice stores it once (and refreshes its expiry). Total size is
+    capped by dropping the least recently written documents.
+    """
+
+    def __init__(self, store: SQLiteStore, ttl: float = RESULT_STORE_TTL,
+                 max_bytes: int = RESULT_STORE_MAX_BYTES,
+                 maintenance_interval: int = RESULT_STORE_MAINTENANCE_INTERVAL):
+        self.store = store
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.maintenance_interval = maintenance_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def put(self, document: Dict) -> str:
+        """Store a JSON-serializable document and return its id"""
+        body = storage_codec.dumps(document, canonical=True)
+        document_id = hashlib.sha256(body).hexdigest()[:32]
+        self.store.set(document_id, storage_codec.pack(body, RESULT_STORE_SCHEMA_VERSION), ttl=self.ttl)
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.maintenance_interval == 0
+        if due:
+            self.maintain()
+        return document_id
+
+    def get(self, document_id: str) -> Optional[Dict]:
+        """The stored document, or None for unknown, expired or unreadable ids"""
+        try:
+            payload = self.store.get(document_id)
+        except Exception as e:
+            logger.warning(f"Result store read failed: {e}")
+            return None
+        if payload is None:
+            return None
+        try:
+            return storage_codec.decode(payload, schema=RESULT_STORE_SCHEMA_VERSION)
+        except storage_codec.CodecError as e:
+            logger.warning(f"Discarding unreadable stored result {document_id}: {e}")
+            self.store.delete(document_id)
+            return None
+
+    def delete(self, document_id: str):
+        self.store.delete(document_id)
+
+    def maintain(self) -> Dict:
+        """Purge expired documents, then trim to the size cap"""
+        expired = self.store.purge_expired()
+        trimmed = self.store.trim(self.max_bytes)
+        if expired or trimmed:
+            logger.info(f"Result store maintenance: {expired} expired, {trimmed} trimmed")
+        return {'expired': expired, 'trimmed': trimmed}
+
+    def get_stats(self) -> Dict:
+        entries, stored_bytes = self.store.size()
+        return {
+            'entries': entries,
+            'bytes': stored_bytes,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl
+        }
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+def get_result_store() -> ResultStore:
+    """Process-wide result store"""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                _result_store = ResultStore(SQLiteStore('stored_results', default_ttl=RESULT_STORE_TTL))
+    return _result_store
@@ -0,0 +1,247 @@
+import os
+import re
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from text_utils import simple_word_tokenize, get_stop_words
+from transcript_index import TranscriptIndex
+
+logger = logging.getLogger(__name__)
+
+# Default strategy for YouTubeSummarizer ('texttiling' or 'heuristic')
+SEGMENTATION_STRATEGY = os.getenv('SEGMENTATION_STRATEGY', 'texttiling')
+
+class SegmentationStrategy:
+    """Interface for topic boundary detection
+
+    Strategies work on the sentences of a TranscriptIndex and return boundaries
+    as dicts with 'index' (segment index into the transcript), 'start_time'
+    and 'confidence', sorted by time.
+    """
+
+    name = 'base'
+
+    def detect_boundaries(self, index: TranscriptIndex) -> List[Dict]:
+        raise NotImplementedError
+
+class HeuristicSegmenter(SegmentationStrategy):
+    """Original heuristic: adjacent-sentence Jaccard plus pause, padded with time slices"""
+
+    name = 'heuristic'
+
+    def __init__(self):
+        self.stop_words = get_stop_words()
+
+    def detect_boundaries(self, index: TranscriptIndex) -> List[Dict]:
+        """Detect topic boundaries using NLP techniques"""
+        boundaries = []
+        texts = index.sentence_texts
+        segments = index.sentence_segments
+        starts = index.sentence_starts.tolist()
+        ends = index.sentence_ends.tolist()
+
+        # Simple approach: look for significant content shifts
+        for i in range(1, len(texts)):
+            # Calculate similarity/difference metrics
+            prev_words = set(simple_word_tokenize(texts[i-1].lower()))
+            curr_words = set(simple_word_tokenize(texts[i].lower()))
+
+            # Remove stop words
+            prev_words = prev_words - self.stop_words
+            curr_words = curr_words - self.stop_words
+
+            # Calculate Jaccard similarity
+            intersection = len(prev_words & curr_words)
+            union = len(prev_words | curr_words)
+            similarity = intersection / union if union > 0 else 0
+
+            # Detect boundary if similarity is low and time gap is significant
+            time_gap = starts[i] - ends[i-1]
+
+            if similarity < 0.3 and time_gap > 2.0:  # Low similarity and >2s gap
+                boundaries.append({
+                    'index': int(segments[i]),
+                    'start_time': starts[i],
+                    'confidence': 1 - similarity
+                })
+
+        # Ensure we have reasonable number of boundaries (8-12)
+        if len(boundaries) < 8 and texts:
+            # Add more boundaries based on time intervals
+            total_duration = ends[-1]
+            target_sections = 10
+            interval = total_duration / target_sections
+
+            for i in range(1, target_sections):
+                target_time = i * interval
+                # Find closest sentence to this time
+                closest_idx = min(range(len(texts)),
+                                key=lambda x: abs(starts[x] - target_time))
+                boundaries.append({
+                    'index': int(segments[closest_idx]),
+                    'start_time': starts[closest_idx],
+                    'confidence': 0.5
+                })
+
+        # Sort and deduplicate
+        boundaries = sorted(boundaries, key=lambda x: x['start_time'])
+        unique_boundaries = []
+        for boundary in boundaries:
+            if not unique_boundaries or boundary['start_time'] - unique_boundaries[-1]['start_time'] > 30:
+                unique_boundaries.append(boundary)
+
+        return unique_boundaries[:12]  # Limit to 12 sections
+
+class TextTilingSegmenter(SegmentationStrategy):
+    """TextTiling-style segmentation on a hashed term matrix, fully vectorized
+
+    Sentences are grouped into at most ``max_units`` units so long lectures stay
+    cheap, block cosine similarity is taken across every gap from cumulative
+    term counts, and gaps are scored by depth (how far similarity dips below the
+    surrounding peaks) plus the speaker pause at the gap.
+    """
+
+    name = 'texttiling'
+
+    def __init__(self, block_size: int = 10, n_features: int = 1024, max_units: int = 2000,
+                 pause_weight: float = 0.3, min_section_seconds: float = 30.0,
+                 min_sections: int = 8, max_sections: int = 12):
+        self.block_size = block_size
+        self.n_features = n_features
+        self.max_units = max_units
+        self.pause_weight = pause_weight
+        self.min_section_seconds = min_section_seconds
+        self.min_sections = min_sections
+        self.max_sections = max_sections
+        self.stop_words = get_stop_words()
+        self._word_re = re.compile(r'\b\w+\b')
+
+    def detect_boundaries(self, index: TranscriptIndex) -> List[Dict]:
+        sentences = index.sentence_texts
+        segments = index.sentence_segments
+        n_sentences = len(sentences)
+        if n_sentences == 0:
+            return []
+
+        starts = index.sentence_starts
+        ends = index.sentence_ends
+
+        # Group sentences into units; unit u covers sentences [u * unit_size, (u + 1) * unit_size)
+        unit_size = -(-n_sentences // self.max_units)
+        n_units = -(-n_sentences // unit_size)
+        unit_first = np.arange(n_units) * unit_size
+        unit_last = np.minimum(unit_first + unit_size, n_sentences) - 1
+
+        boundaries = [{'index': int(segments[0]), 'start_time': float(starts[0]), 'confidence': 1.0}]
+        if n_units < 3:
+            return boundaries
+
+        matrix = self._term_matrix(sentences, unit_size, n_units)
+
+        # Block similarity across gap g (between unit g - 1 and unit g)
+        k = min(self.block_size, n_units // 2)
+        cumulative = np.zeros((n_units + 1, self.n_features), dtype=np.float32)
+        np.cumsum(matrix, axis=0, out=cumulative[1:])
+        gaps = np.arange(1, n_units)
+        left = cumulative[gaps] - cumulative[np.maximum(gaps - k, 0)]
+        right = cumulative[np.minimum(gaps + k, n_units)] - cumulative[gaps]
+        norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+        similarity = np.einsum('ij,ij->i', left, right) / np.maximum(norms, 1e-9)
+        del left, right, cumulative
+
+        # Light smoothing, then depth relative to the highest peak within k gaps on each side
+        if len(similarity) >= 3:
+            similarity = np.convolve(np.pad(similarity, 1, mode='edge'), np.ones(3) / 3, mode='valid')
+        padded = np.pad(similarity, k, mode='edge')
+        windows = np.lib.stride_tricks.sliding_window_view(padded, k + 1)
+        left_peak = windows[:-k].max(axis=1)
+        right_peak = windows[k:].max(axis=1)
+        depth = (left_peak - similarity) + (right_peak - similarity)
+
+        # Pause between the last sentence of the previous unit and the first of the next
+        pause = starts[unit_first[1:]] - ends[unit_last[:-1]]
+        pause_score = np.clip(pause / 2.0, 0.0, 1.0)
+        score = depth + self.pause_weight * pause_score
+
+        # Candidates: local maxima whose depth clears the usual TextTiling cutoff
+        is_peak = np.ones(len(score), dtype=bool)
+        is_peak[1:] &= score[1:] >= score[:-1]
+        is_peak[:-1] &= score[:-1] >= score[1:]
+        cutoff = depth.mean() - depth.std() / 2
+        candidates = np.flatnonzero(is_peak & (depth > cutoff))
+        candidates = candidates[np.argsort(-score[candidates], kind='stable')]
+
+        max_score = float(score.max()) if score.size and score.max() > 0 else 1.0
+        chosen_times = [float(starts[0])]
+        for gap_idx in candidates:
+            if len(boundaries) >= self.max_sections:
+                break
+            sentence_idx = int(unit_first[gap_idx + 1])
+            start_time = float(starts[sentence_idx])
+            if self._far_enough(start_time, chosen_times):
+                chosen_times.append(start_time)
+                boundaries.append({
+                    'index': int(segments[sentence_idx]),
+                    'start_time': start_time,
+                    'confidence': round(min(1.0, float(score[gap_idx]) / max_score), 3)
+                })
+
+        # Pad sparse results with evenly spaced boundaries, like the heuristic does
+        if len(boundaries) < self.min_sections:
+            target_sections = (self.min_sections + self.max_sections) // 2
+            target_times = np.arange(1, target_sections) * (ends[-1] / target_sections)
+            nearest = np.clip(np.searchsorted(starts, target_times), 1, n_sentences - 1)
+            closer_left = np.abs(starts[nearest - 1] - target_times) <= np.abs(starts[nearest] - target_times)
+            nearest = np.where(closer_left, nearest - 1, nearest)
+            for sentence_idx in nearest:
+                if len(boundaries) >= self.max_sections:
+                    break
+                start_time = float(starts[sentence_idx])
+                if self._far_enough(start_time, chosen_times):
+                    chosen_times.append(start_time)
+                    boundaries.append({
+                        'index': int(segments[sentence_idx]),
+                        'start_time': start_time,
+                        'confidence': 0.5
+                    })
+
+        return sorted(boundaries, key=lambda x: x['start_time'])
+
+    def _term_matrix(self, sentences: List[str], unit_size: int, n_units: int) -> np.ndarray:
+        """Unit x hashed-term count matrix, built with one bincount"""
+        vocabulary = {}
+        term_ids = []
+        counts = []
+        for sentence in sentences:
+            ids = [
+                vocabulary.setdefault(word, len(vocabulary))
+                for word in self._word_re.findall(sentence.lower())
+                if word not in self.stop_words
+            ]
+            term_ids.extend(ids)
+            counts.append(len(ids))
+
+        sentence_units = np.arange(len(sentences)) // unit_size
+        rows = np.repeat(sentence_units, counts)
+        cols = np.asarray(term_ids, dtype=np.int64) % self.n_features
+        flat = np.bincount(rows * self.n_features + cols, minlength=n_units * self.n_features)
+        return flat.reshape(n_units, self.n_features).astype(np.float32)
+
+    def _far_enough(self, start_time: float, chosen_times: List[float]) -> bool:
+        return all(abs(start_time - t) > self.min_section_seconds for t in chosen_times)
+
+SEGMENTATION_STRATEGIES = {
+    HeuristicSegmenter.name: HeuristicSegmenter,
+    TextTilingSegmenter.name: TextTilingSegmenter,
+}
+
+def get_segmenter(name: Optional[str] = None) -> SegmentationStrategy:
+    """Instantiate a segmentation strategy by name"""
+    name = name or SEGMENTATION_STRATEGY
+    strategy_class = SEGMENTATION_STRATEGIES.get(name)
+    if strategy_class is None:
+        logger.warning(f"Unknown segmentation strategy '{name}', using texttiling")
+        strategy_class = TextTilingSegmenter
+    return strategy_class()
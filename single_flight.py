@@ -0,0 +1,274 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import storage_codec
+from deadline import PIPELINE_DEADLINE_SECONDS
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Concurrent requests for the same work share one run
+SINGLE_FLIGHT_DISABLED = os.getenv('SINGLE_FLIGHT_DISABLED', 'False') == 'True'
+# A worker's claim on a key lapses after this long, so a crashed leader is taken over
+SINGLE_FLIGHT_LEASE_SECONDS = float(os.getenv(
+    'SINGLE_FLIGHT_LEASE_SECONDS', str(PIPELINE_DEADLINE_SECONDS + 30 if PIPELINE_DEADLINE_SECONDS else 600)
+))
+# Leaders publish their result for other workers' followers for this long
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '30'))
+SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv('SINGLE_FLIGHT_POLL_INTERVAL', '0.25'))
+SINGLE_FLIGHT_SCHEMA_VERSION = 1
+
+class SingleFlight:
+    """Runs a function once per key at a time and hands its result to every concurrent caller
+
+    Within a process, callers for a key already in flight wait on the leader's
+    future. Across processes, the leader holds a lease row in a shared SQLite
+    table and publishes its result there for a short while, and followers in
+    other workers that found the lease taken read it.
+    Without the table (store=None) only in-process callers are coalesced. A
+    follower that waits past its timeout (the lease length if none is given)
+    runs the function itself.
+    Progress sent through reporter(key) reaches every in-process caller that
+    watch()es the key; followers in other workers only get the result.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore], lease_seconds: float = SINGLE_FLIGHT_LEASE_SECONDS,
+                 result_ttl: float = SINGLE_FLIGHT_RESULT_TTL, poll_interval: float = SINGLE_FLIGHT_POLL_INTERVAL):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._calls: Dict[str, Future] = {}
+        self._watchers: Dict[str, List[Callable[[str, float], None]]] = {}
+        self._last_progress: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """The in-process future for key, and whether this caller created it (leads)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _wait_limit(self, timeout: Optional[float]) -> float:
+        """How long a follower waits; without a timeout, as long as a leader may hold the key"""
+        return timeout if timeout is not None else self.lease_seconds
+
+    def _count(self, role: str):
+        with self._lock:
+            setattr(self, role, getattr(self, role) + 1)
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+            self._last_progress.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def watch(self, key: str, callback: Callable[[str, float], None]):
+        """Send progress reported for key to callback, starting with the latest report if a run is in flight"""
+        with self._lock:
+            self._watchers.setdefault(key, []).append(callback)
+            last = self._last_progress.get(key)
+        if last is not None:
+            callback(*last)
+
+    def unwatch(self, key: str, callback: Callable[[str, float], None]):
+        with self._lock:
+            watchers = self._watchers.get(key, [])
+            if callback in watchers:
+                watchers.remove(callback)
+            if not watchers:
+                self._watchers.pop(key, None)
+
+    def reporter(self, key: str) -> Callable[[str, float], None]:
+        """Progress callback for the run of key that forwards each report to the key's watchers"""
+        def report(stage: str, progress: float):
+            with self._lock:
+                if key in self._calls:
+                    self._last_progress[key] = (stage, progress)
+                watchers = list(self._watchers.get(key, ()))
+            for callback in watchers:
+                try:
+                    callback(stage, progress)
+                except Exception as e:
+                    logger.warning(f"Progress callback for {key} failed: {e}")
+        return report
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """fn() or a concurrent caller's result for the same key; returns (result, shared)"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return future.result(self._wait_limit(timeout)), True
+            except FuturesTimeoutError:
+                logger.warning(f"Gave up waiting for in-flight {key}, running it here")
+                return fn(), False
+
+        try:
+            result, shared = self._lead(key, fn, timeout)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, shared
+
+    def _lead(self, key: str, fn: Callable[[], Any], timeout: Optional[float]) -> Tuple[Any, bool]:
+        """Run fn under the node-wide lease, or wait for the worker holding it"""
+        if self.store is None:
+            self._count('leaders')
+            return fn(), False
+
+        give_up_at = time.monotonic() + self._wait_limit(timeout)
+        while True:
+            if self._acquire_lease(key):
+                self._count('leaders')
+                try:
+                    result = fn()
+                    self._publish(key, result)
+                    return result, False
+                finally:
+                    self._release_lease(key)
+            # Another worker holds the lease; its result appears once it finishes
+            time.sleep(self.poll_interval)
+            published = self._published(key)
+            if published is not None:
+                self._count('followers')
+                return published, True
+            if time.monotonic() >= give_up_at:
+                logger.warning(f"Gave up waiting for {key} in another worker, running it here")
+                return fn(), False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]],
+                       timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Async do(): fn is a coroutine function; waits yield the event loop"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)), self._wait_limit(timeout)
+                ), True
+            except asyncio.TimeoutError:
+                logger.warning(f"Gave up waiting for in-flight {key}, running it here")
+                return await fn(), False
+
+        try:
+            result, shared = await self._lead_async(key, fn, timeout)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, shared
+
+    async def _lead_async(self, key: str, fn: Callable[[], Awaitable[Any]],
+                          timeout: Optional[float]) -> Tuple[Any, bool]:
+        if self.store is None:
+            self._count('leaders')
+            return await fn(), False
+
+        give_up_at = time.monotonic() + self._wait_limit(timeout)
+        while True:
+            if await asyncio.to_thread(self._acquire_lease, key):
+                self._count('leaders')
+                try:
+                    result = await fn()
+                    await asyncio.to_thread(self._publish, key, result)
+                    return result, False
+                finally:
+                    await asyncio.to_thread(self._release_lease, key)
+            await asyncio.sleep(self.poll_interval)
+            published = await asyncio.to_thread(self._published, key)
+            if published is not None:
+                self._count('followers')
+                return published, True
+            if time.monotonic() >= give_up_at:
+                logger.warning(f"Gave up waiting for {key} in another worker, running it here")
+                return await fn(), False
+
+    def _acquire_lease(self, key: str) -> bool:
+        """Claim key unless another live worker holds it (expired leases read as free)"""
+        claim = self.owner.encode('utf-8')
+        try:
+            acquired = self.store.update(
+                f"lease:{key}",
+                lambda current: (claim, True) if current is None else (None, False),
+                ttl=self.lease_seconds
+            )
+            if acquired:
+                # A result left by an earlier run must not be mistaken for this one's
+                self.store.delete(f"result:{key}")
+            return acquired
+        except Exception as e:
+            # A broken table should cost deduplication, not the request
+            logger.warning(f"Single-flight lease unavailable, running {key} uncoordinated: {e}")
+            return True
+
+    def _release_lease(self, key: str):
+        try:
+            if self.store.get(f"lease:{key}") == self.owner.encode('utf-8'):
+                self.store.delete(f"lease:{key}")
+        except Exception as e:
+            logger.warning(f"Single-flight lease release failed for {key}: {e}")
+
+    def _publish(self, key: str, result: Any):
+        try:
+            self.store.set(
+                f"result:{key}", storage_codec.encode(result, schema=SINGLE_FLIGHT_SCHEMA_VERSION),
+                ttl=self.result_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Single-flight result publish failed for {key}: {e}")
+
+    def _published(self, key: str) -> Optional[Any]:
+        try:
+            payload = self.store.get(f"result:{key}")
+            if payload is None:
+                return None
+            return storage_codec.decode(payload, schema=SINGLE_FLIGHT_SCHEMA_VERSION)
+        except Exception as e:
+            logger.warning(f"Single-flight result read failed for {key}: {e}")
+            return None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'in_flight': len(self._calls),
+                'shared_lease': self.store is not None
+            }
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Process-wide single-flight group, or None when disabled"""
+    global _single_flight
+    if SINGLE_FLIGHT_DISABLED:
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                try:
+                    store = SQLiteStore('flights')
+                except Exception as e:
+                    logger.warning(f"Single-flight lease table unavailable, coalescing in-process only: {e}")
+                    store = None
+                _single_flight = SingleFlight(store)
+    return _single_flight
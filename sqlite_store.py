@@ -0,0 +1,164 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shared state lives next to the project unless overridden, so every worker on a node sees it
+DEFAULT_STATE_DIR = os.getenv(
+    'SUMMARIZER_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+class SQLiteStore:
+    """Small key/value table in a local SQLite file, shared by all processes on a node"""
+
+    def __init__(self, name: str, path: Optional[str] = None, default_ttl: Optional[float] = None):
+        if not _is_valid_table_name(name):
+            raise ValueError(f"Invalid store name: {name}")
+        self.name = name
+        self.path = path or os.path.join(DEFAULT_STATE_DIR, 'state.sqlite3')
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.name} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, updated_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not thread-safe"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value, or None if missing or expired"""
+        row = self._connection().execute(
+            f"SELECT value, expires_at FROM {self.name} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store a value, replacing any previous one"""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.name} (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), expires_at, now)
+        )
+
+    def update(self, key: str, func: Callable[[Optional[bytes]], Tuple[Optional[bytes], Any]],
+               ttl: Optional[float] = None) -> Any:
+        """Atomic read-modify-write across processes
+
+        ``func`` gets the current value (None if missing or expired) and returns
+        ``(new_value, result)``; a new_value of None leaves the row untouched.
+        The write lock is held from the read until the write, so concurrent
+        updates from other workers are serialized.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                f"SELECT value, expires_at FROM {self.name} WHERE key = ?", (key,)
+            ).fetchone()
+            current = None
+            if row is not None and (row[1] is None or row[1] > now):
+                current = row[0]
+            new_value, result = func(current)
+            if new_value is not None:
+                ttl = self.default_ttl if ttl is None else ttl
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.name} (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(new_value), now + ttl if ttl else None, now)
+                )
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def increment_many(self, deltas: Dict[str, float]):
+        """Add each delta to its key's numeric value in one transaction; missing keys start at 0"""
+        if not deltas:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT INTO {self.name} (key, value, expires_at, updated_at) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value, updated_at = excluded.updated_at",
+                [(key, float(delta), now) for key, delta in deltas.items()]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def items(self, prefix: str = '') -> List[Tuple[str, Any]]:
+        """Unexpired (key, value) pairs whose key starts with prefix, in key order"""
+        return self._connection().execute(
+            f"SELECT key, value FROM {self.name} WHERE substr(key, 1, ?) = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY key",
+            (len(prefix), prefix, time.time())
+        ).fetchall()
+
+    def delete(self, key: str):
+        self._connection().execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        cursor = self._connection().execute(
+            f"DELETE FROM {self.name} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def size(self) -> Tuple[int, int]:
+        """Number of rows and total value bytes"""
+        rows, total = self._connection().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM {self.name}"
+        ).fetchone()
+        return rows, total
+
+    def trim(self, max_bytes: int) -> int:
+        """Delete the least recently written rows until values total at most max_bytes; returns rows removed"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM {self.name}").fetchone()
+            victims = []
+            if total > max_bytes:
+                for key, length in conn.execute(f"SELECT key, LENGTH(value) FROM {self.name} ORDER BY updated_at"):
+                    if total <= max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= length
+                conn.executemany(f"DELETE FROM {self.name} WHERE key = ?", victims)
+            conn.execute("COMMIT")
+            return len(victims)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+def _is_valid_table_name(name: str) -> bool:
+    """Table names are interpolated into SQL, so only plain identifiers are allowed"""
+    return name.isidentifier()
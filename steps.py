@@ -0,0 +1,179 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Generator, List, Optional, Sequence
+
+from deadline import current_deadline, submit_with_deadline
+
+# A stage is a generator that yields Steps and gets back each step's result,
+# or has the step's exception raised at the yield. Its decisions (prompts,
+# parsing, fallbacks) are written once; run_steps performs the steps blocking
+# and run_steps_async awaits them, so only the I/O differs between the two.
+Steps = Generator['Step', Any, Any]
+
+class Step:
+    """One I/O operation of a stage"""
+
+    def run(self) -> Any:
+        raise NotImplementedError
+
+    async def run_async(self) -> Any:
+        raise NotImplementedError
+
+class Call(Step):
+    """fn(*args, **kwargs): inline when blocking; on asyncio async_fn if given, else fn in a worker thread"""
+
+    def __init__(self, fn: Callable, *args, async_fn: Optional[Callable] = None, **kwargs):
+        self.fn = fn
+        self.async_fn = async_fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> Any:
+        return self.fn(*self.args, **self.kwargs)
+
+    async def run_async(self) -> Any:
+        if self.async_fn is not None:
+            return await self.async_fn(*self.args, **self.kwargs)
+        return await asyncio.to_thread(self.fn, *self.args, **self.kwargs)
+
+class Start(Call):
+    """Start a Call in the background (on executor when blocking) and return a handle for Wait"""
+
+    def __init__(self, executor: ThreadPoolExecutor, fn: Callable, *args,
+                 async_fn: Optional[Callable] = None, **kwargs):
+        super().__init__(fn, *args, async_fn=async_fn, **kwargs)
+        self.executor = executor
+
+    def run(self) -> Any:
+        return submit_with_deadline(self.executor, self.fn, *self.args, **self.kwargs)
+
+    async def run_async(self) -> Any:
+        return asyncio.ensure_future(super().run_async())
+
+class Wait(Step):
+    """Result of a Start handle; TimeoutError if it is not done within timeout seconds"""
+
+    def __init__(self, handle, timeout: Optional[float]):
+        self.handle = handle
+        self.timeout = timeout
+
+    def run(self) -> Any:
+        try:
+            return self.handle.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise TimeoutError() from None
+
+    async def run_async(self) -> Any:
+        try:
+            return await asyncio.wait_for(self.handle, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError() from None
+
+class Gather(Step):
+    """Run stages concurrently, at most limit at a time, and return their results in order
+
+    Each stage has timeout seconds once it starts (None: until the current
+    deadline), capped by the current deadline. A stage that times out or
+    raises is replaced by on_error(position, exception), the exception being
+    a TimeoutError for timeouts. Stages not started when the caller stops
+    waiting never start.
+    """
+
+    def __init__(self, stages: Sequence[Callable[[], Steps]], limit: int,
+                 on_error: Callable[[int, BaseException], Any], timeout: Optional[float] = None,
+                 thread_name_prefix: str = 'stage'):
+        self.stages = stages
+        self.limit = max(1, limit)
+        self.on_error = on_error
+        self.timeout = timeout
+        self.thread_name_prefix = thread_name_prefix
+
+    def run(self) -> List[Any]:
+        max_workers = max(1, min(self.limit, len(self.stages)))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=self.thread_name_prefix)
+        stage_deadline = current_deadline()
+        submitted_at = time.monotonic()
+        futures = [submit_with_deadline(executor, lambda stage=stage: run_steps(stage())) for stage in self.stages]
+
+        results = []
+        for i, future in enumerate(futures):
+            if self.timeout is None:
+                timeout = stage_deadline.timeout()
+            else:
+                # Stages queued behind a full pool get the time budget of their wave
+                wave_ends_at = submitted_at + self.timeout * (i // max_workers + 1)
+                timeout = stage_deadline.cap(max(0.0, wave_ends_at - time.monotonic()))
+            try:
+                results.append(future.result(timeout=timeout))
+            except FuturesTimeoutError:
+                future.cancel()
+                results.append(self.on_error(i, TimeoutError()))
+            except Exception as e:
+                results.append(self.on_error(i, e))
+
+        # Do not wait for stragglers; their results are no longer needed
+        executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    async def run_async(self) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.limit)
+        stage_deadline = current_deadline()
+
+        async def run_one(stage: Callable[[], Steps]) -> Any:
+            async with semaphore:
+                timeout = stage_deadline.timeout() if self.timeout is None else stage_deadline.cap(self.timeout)
+                return await asyncio.wait_for(run_steps_async(stage()), timeout)
+
+        outcomes = await asyncio.gather(*(run_one(stage) for stage in self.stages), return_exceptions=True)
+        results = []
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                outcome = self.on_error(i, TimeoutError())
+            elif isinstance(outcome, Exception):
+                outcome = self.on_error(i, outcome)
+            results.append(outcome)
+        return results
+
+class Coalesce(Step):
+    """Run a stage through SingleFlight so concurrent callers share one run; returns (result, shared)"""
+
+    def __init__(self, single_flight, key: str, stage: Callable[[], Steps], timeout: Optional[float] = None):
+        self.single_flight = single_flight
+        self.key = key
+        self.stage = stage
+        self.timeout = timeout
+
+    def run(self) -> Any:
+        return self.single_flight.do(self.key, lambda: run_steps(self.stage()), timeout=self.timeout)
+
+    async def run_async(self) -> Any:
+        return await self.single_flight.do_async(
+            self.key, lambda: run_steps_async(self.stage()), timeout=self.timeout
+        )
+
+def run_steps(stage: Steps) -> Any:
+    """Run a stage to completion, performing each step blocking"""
+    result, error = None, None
+    while True:
+        try:
+            step = stage.throw(error) if error is not None else stage.send(result)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = step.run(), None
+        except Exception as e:
+            result, error = None, e
+
+async def run_steps_async(stage: Steps) -> Any:
+    """Run a stage to completion on the event loop, awaiting each step"""
+    result, error = None, None
+    while True:
+        try:
+            step = stage.throw(error) if error is not None else stage.send(result)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = await step.run_async(), None
+        except Exception as e:
+            result, error = None, e
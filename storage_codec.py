@@ -0,0 +1,98 @@
+import os
+import lzma
+import zlib
+import struct
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Compression for persisted documents: 'zlib' (fast, the default), 'lzma' (smaller, slower) or 'none'
+STORAGE_CODEC_COMPRESSION = os.getenv('STORAGE_CODEC_COMPRESSION', 'zlib')
+STORAGE_CODEC_ZLIB_LEVEL = int(os.getenv('STORAGE_CODEC_ZLIB_LEVEL', '6'))
+STORAGE_CODEC_LZMA_PRESET = int(os.getenv('STORAGE_CODEC_LZMA_PRESET', '6'))
+# Bodies smaller than this are stored uncompressed; compression would not pay for its header
+STORAGE_CODEC_MIN_COMPRESS_BYTES = int(os.getenv('STORAGE_CODEC_MIN_COMPRESS_BYTES', '256'))
+
+# Frame: magic, codec version, schema version, compression id, CRC32 of the (compressed) payload
+MAGIC = b'YS'
+CODEC_VERSION = 1
+HEADER = struct.Struct('>2sBBBI')
+
+COMPRESSION_IDS = {'none': 0, 'zlib': 1, 'lzma': 2}
+COMPRESSION_NAMES = {v: k for k, v in COMPRESSION_IDS.items()}
+
+class CodecError(ValueError):
+    """Payload is not a readable frame: wrong magic, version or schema, bad checksum or body"""
+
+def dumps(document: Any, canonical: bool = False) -> bytes:
+    """JSON body of a document; canonical sorts keys so equal documents give equal bytes"""
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if canonical else 0)
+    return orjson.dumps(document, option=option)
+
+def pack(body: bytes, schema: int = 0, compression: Optional[str] = None) -> bytes:
+    """Frame an already serialized body"""
+    compression = compression or STORAGE_CODEC_COMPRESSION
+    if compression not in COMPRESSION_IDS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if len(body) < STORAGE_CODEC_MIN_COMPRESS_BYTES:
+        compression = 'none'
+
+    if compression == 'zlib':
+        payload = zlib.compress(body, STORAGE_CODEC_ZLIB_LEVEL)
+    elif compression == 'lzma':
+        payload = lzma.compress(body, preset=STORAGE_CODEC_LZMA_PRESET)
+    else:
+        payload = body
+    return HEADER.pack(MAGIC, CODEC_VERSION, schema, COMPRESSION_IDS[compression], zlib.crc32(payload)) + payload
+
+def unpack(frame: bytes, schema: Optional[int] = None) -> bytes:
+    """Serialized body of a frame, checking its header and checksum"""
+    if len(frame) < HEADER.size:
+        raise CodecError("Frame too short")
+    magic, version, frame_schema, compression_id, checksum = HEADER.unpack_from(frame)
+    if magic != MAGIC:
+        raise CodecError("Not a storage codec frame")
+    if version != CODEC_VERSION:
+        raise CodecError(f"Unsupported codec version {version}")
+    if schema is not None and frame_schema != schema:
+        raise CodecError(f"Schema version {frame_schema}, expected {schema}")
+
+    payload = memoryview(frame)[HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        raise CodecError("Checksum mismatch")
+    compression = COMPRESSION_NAMES.get(compression_id)
+    try:
+        if compression == 'zlib':
+            return zlib.decompress(payload)
+        if compression == 'lzma':
+            return lzma.decompress(payload)
+        if compression == 'none':
+            return bytes(payload)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise CodecError(f"Corrupt payload: {e}") from e
+    raise CodecError(f"Unknown compression id {compression_id}")
+
+def encode(document: Any, schema: int = 0, compression: Optional[str] = None) -> bytes:
+    """Serialize, compress and frame a JSON-like document (dataclasses and NumPy arrays included)"""
+    return pack(dumps(document), schema, compression)
+
+def decode(frame: bytes, schema: Optional[int] = None) -> Any:
+    """Document from an encode() frame; raises CodecError for anything unreadable"""
+    body = unpack(frame, schema)
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise CodecError(f"Corrupt body: {e}") from e
+
+def frame_info(frame: bytes) -> Dict:
+    """Header fields of a frame, for diagnostics"""
+    magic, version, schema, compression_id, checksum = HEADER.unpack_from(frame)
+    return {
+        'codec_version': version,
+        'schema': schema,
+        'compression': COMPRESSION_NAMES.get(compression_id, 'unknown'),
+        'stored_bytes': len(frame)
+    }
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 
 class SummarizerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'summarizer' 
\ No newline at end of file
+    name = 'summarizer'
+
+    def ready(self):
+        # Load the tokenizer at startup rather than on the first request that counts tokens
+        from prompt_budget import get_token_counter
+        get_token_counter()
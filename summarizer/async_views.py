@@ -0,0 +1,310 @@
+import os
+import json
+import sys
+import asyncio
+from dataclasses import asdict
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+# Add the parent directory to Python path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_summarizer import YouTubeSummarizer, Timestamp, VideoInfo
+from job_queue import get_job_queue, JOB_FINISHED_STATES, JOB_EVENT_POLL_INTERVAL
+from .views import (
+    is_valid_youtube_url, save_session_result, load_session_result, session_sections, section_response
+)
+from .job_views import job_event, unknown_job_response
+
+# Async counterparts of the network-bound views, used when served over ASGI
+# (see SUMMARIZER_ASYNC_VIEWS). Session loads and result store reads and writes
+# hit the database, so they go through sync_to_async.
+
+async def _session_get(request, key):
+    return await sync_to_async(load_session_result)(request.session, key)
+
+async def _session_set(request, key, value):
+    await sync_to_async(save_session_result)(request.session, key, value)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def process_video(request):
+    """Process YouTube video and return results"""
+    try:
+        data = json.loads(request.body)
+        video_url = data.get('video_url', '').strip()
+
+        if not video_url:
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a YouTube URL'
+            })
+
+        # Validate YouTube URL
+        if not is_valid_youtube_url(video_url):
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a valid YouTube URL'
+            })
+
+        # Process the video
+        result = await YouTubeSummarizer().process_video_async(video_url, mode=data.get('mode', 'full'))
+
+        if result['success']:
+            await _session_set(request, 'last_result', result)
+
+            return JsonResponse({
+                'success': True,
+                'data': {
+                    'title': result['title'],
+                    'channel': result['channel'],
+                    'duration': result['duration'],
+                    'executive_summary': result['executive_summary'],
+                    'timestamps': result['timestamps'],
+                    'full_summary': result['full_summary'],
+                    'processing_time': result['processing_time'],
+                    'degraded': result.get('degraded', []),
+                    'mode': result.get('mode', 'full'),
+                    'result_id': await sync_to_async(request.session.get)('last_result_id'),
+                    # Set when a fast result will be replaced by the full one; poll it via the jobs API
+                    'upgrade_job_id': result.get('upgrade_job_id')
+                }
+            })
+        else:
+            return JsonResponse({
+                'success': False,
+                'error': result.get('error_message', 'Failed to process video'),
+                'suggestions': result.get('suggestions', [])
+            })
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+async def demo_video(request):
+    """Demo video processing"""
+    demo_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"  # Replace with actual demo video
+
+    try:
+        result = await YouTubeSummarizer().process_video_async(demo_url)
+
+        if result['success']:
+            await _session_set(request, 'last_result', result)
+            # Context processors may touch the database (request.user)
+            return await sync_to_async(render)(request, 'summarizer/result_simple.html', {
+                'video_title': result['title'],
+                'channel': result['channel'],
+                'duration': result['duration'],
+                'executive_summary': result['executive_summary'],
+                'timestamps': result['timestamps'],
+                'full_summary': result['full_summary'],
+                'processing_time': result['processing_time'],
+                'is_demo': True
+            })
+        else:
+            messages.error(request, result.get('error_message', 'Demo failed'))
+            return redirect('summarizer:home')
+
+    except Exception as e:
+        messages.error(request, f'Demo error: {str(e)}')
+        return redirect('summarizer:home')
+
+@require_http_methods(["GET"])
+async def section_summary(request, video_id, section_id):
+    """Summary of one section, generated on first request; neighbouring sections are prefetched"""
+    try:
+        timestamps, language = await sync_to_async(session_sections)(request.session, video_id)
+        result = await YouTubeSummarizer().get_section_summary_async(video_id, section_id, timestamps,
+                                                                     language=language)
+        return section_response(result)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def process_video_interactive(request):
+    """Interactive video processing - returns timestamps first, then streams summary"""
+    try:
+        data = json.loads(request.body)
+        video_url = data.get('video_url', '').strip()
+
+        if not video_url:
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a YouTube URL'
+            })
+
+        if not is_valid_youtube_url(video_url):
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a valid YouTube URL'
+            })
+
+        summarizer = YouTubeSummarizer()
+
+        # Step 1: Extract subtitles and generate timestamps quickly
+        subtitle_result = await summarizer.extract_subtitles_async(video_url)
+        if not subtitle_result['success']:
+            return JsonResponse({
+                'success': False,
+                'error': subtitle_result['error_message']
+            })
+
+        timestamps = [
+            asdict(ts) for ts in await summarizer.generate_timestamps_async(subtitle_result['transcript_index'])
+        ]
+        video_info = asdict(subtitle_result['video_info'])
+
+        # The transcript stays in the transcript cache; the rest goes to the result store
+        await _session_set(request, 'current_processing', {
+            'video_id': video_info['video_id'],
+            'language': subtitle_result['language'],
+            'timestamps': timestamps,
+            'video_info': video_info
+        })
+
+        return JsonResponse({
+            'success': True,
+            'status': 'partial',
+            'stage': 'timestamps_ready',
+            'timestamps': timestamps,
+            'video_info': video_info,
+            'processing_time': subtitle_result['processing_time']
+        })
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Processing failed: {str(e)}'
+        })
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def stream_summary(request):
+    """Stream the full summary token by token as the LLM produces it"""
+    try:
+        processing_data = await _session_get(request, 'current_processing')
+        if not processing_data:
+            return JsonResponse({
+                'success': False,
+                'error': 'No processing data found. Please start video processing first.'
+            })
+
+        async def generate_summary_stream():
+            """Async generator for the SSE body"""
+            try:
+                summarizer = YouTubeSummarizer()
+
+                # Reload the transcript by reference (a transcript cache hit)
+                subtitle_result = await summarizer.extract_subtitles_async(
+                    f"https://www.youtube.com/watch?v={processing_data['video_id']}",
+                    processing_data.get('language', 'en')
+                )
+                if not subtitle_result['success']:
+                    yield f"data: {{\"error\": \"Failed to load transcript\"}}\n\n"
+                    return
+
+                chunks = []
+                async for chunk in summarizer.summarize_full_video_stream_async(
+                    subtitle_result['transcript_text'],
+                    [Timestamp(**ts) for ts in processing_data['timestamps']],
+                    VideoInfo(**processing_data['video_info']),
+                    subtitle_result['transcript_index']
+                ):
+                    chunks.append(chunk)
+                    chunk_data = {
+                        'type': 'token',
+                        'content': chunk,
+                        'index': len(chunks) - 1,
+                        'complete': False
+                    }
+                    yield f"data: {json.dumps(chunk_data)}\n\n"
+
+                full_summary = ''.join(chunks)
+                if not full_summary:
+                    error_data = {
+                        'type': 'error',
+                        'content': 'Failed to generate summary: all LLM providers unavailable',
+                        'complete': True
+                    }
+                    yield f"data: {json.dumps(error_data)}\n\n"
+                    return
+
+                completion_data = {
+                    'type': 'complete',
+                    'content': '',
+                    'complete': True,
+                    'full_summary': full_summary
+                }
+                yield f"data: {json.dumps(completion_data)}\n\n"
+
+                # The session middleware already saved before the body started streaming
+                await _session_set(request, 'last_result', {
+                    'success': True,
+                    'video_id': processing_data['video_id'],
+                    'language': processing_data.get('language', 'en'),
+                    'timestamps': processing_data['timestamps'],
+                    'full_summary': full_summary,
+                    'video_info': processing_data['video_info']
+                })
+                await sync_to_async(request.session.save)()
+
+            except Exception as e:
+                error_data = {
+                    'type': 'error',
+                    'content': f'Summary generation failed: {str(e)}',
+                    'complete': True
+                }
+                yield f"data: {json.dumps(error_data)}\n\n"
+
+        response = StreamingHttpResponse(
+            generate_summary_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['Connection'] = 'keep-alive'
+        response['Access-Control-Allow-Origin'] = '*'
+        response['Access-Control-Allow-Headers'] = 'Cache-Control'
+
+        return response
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Streaming failed: {str(e)}'
+        })
+
+@require_http_methods(["GET"])
+async def job_events(request, job_id):
+    """SSE feed of a job's progress; polls the job store without holding a thread"""
+    job_queue = get_job_queue()
+    if await asyncio.to_thread(job_queue.get, job_id) is None:
+        return unknown_job_response()
+
+    async def generate_job_events():
+        last_event = None
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                yield f"data: {json.dumps({'type': 'error', 'content': 'Job expired', 'complete': True})}\n\n"
+                return
+            event = job_event(job)
+            if event != last_event:
+                yield event
+                last_event = event
+            if job['status'] in JOB_FINISHED_STATES:
+                return
+            await asyncio.sleep(JOB_EVENT_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(generate_job_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,165 @@
+import os
+import json
+import sys
+import time
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+# Add the parent directory to Python path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_summarizer import PROCESSING_MODES
+from job_queue import get_job_queue, JOB_COMPLETED, JOB_FINISHED_STATES, JOB_EVENT_POLL_INTERVAL
+from .views import is_valid_youtube_url, save_session_result
+
+def job_status_payload(job):
+    """Public view of a job record (the result itself comes from the result endpoint)"""
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+
+def job_event(job):
+    """SSE message for the current state of a job"""
+    if job['status'] == JOB_COMPLETED:
+        data = {'type': 'complete', 'job_id': job['job_id'], 'complete': True}
+    elif job['status'] in JOB_FINISHED_STATES:
+        data = {
+            'type': 'error',
+            'job_id': job['job_id'],
+            'content': job['error'],
+            'suggestions': (job['result'] or {}).get('suggestions', []),
+            'complete': True
+        }
+    else:
+        data = dict(job_status_payload(job), type='progress', complete=False)
+    return f"data: {json.dumps(data)}\n\n"
+
+def unknown_job_response():
+    return JsonResponse({
+        'success': False,
+        'error': 'Job not found or expired'
+    }, status=404)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def submit_job(request):
+    """Queue a video for background processing and return the job id at once"""
+    try:
+        data = json.loads(request.body)
+        video_url = data.get('video_url', '').strip()
+
+        if not video_url:
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a YouTube URL'
+            })
+
+        if not is_valid_youtube_url(video_url):
+            return JsonResponse({
+                'success': False,
+                'error': 'Please provide a valid YouTube URL'
+            })
+
+        mode = data.get('mode', 'full')
+        if mode not in PROCESSING_MODES:
+            return JsonResponse({
+                'success': False,
+                'error': f"Unknown processing mode '{mode}'",
+                'suggestions': [f"Use one of: {', '.join(PROCESSING_MODES)}"]
+            })
+
+        job_id = get_job_queue().submit(video_url, mode)
+        request.session['last_job_id'] = job_id
+
+        return JsonResponse({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}/',
+            'result_url': f'/jobs/{job_id}/result/',
+            'events_url': f'/jobs/{job_id}/events/'
+        }, status=202)
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """Poll a job's status and progress"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return unknown_job_response()
+    return JsonResponse(dict(job_status_payload(job), success=True))
+
+@require_http_methods(["GET"])
+def job_result(request, job_id):
+    """Result of a finished job; 202 while it is still running"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return unknown_job_response()
+
+    if job['status'] not in JOB_FINISHED_STATES:
+        return JsonResponse(dict(job_status_payload(job), success=False), status=202)
+
+    result = job['result'] or {}
+    if job['status'] != JOB_COMPLETED:
+        return JsonResponse({
+            'success': False,
+            'error': job['error'],
+            'suggestions': result.get('suggestions', [])
+        })
+
+    # Lets the regular result page render this job
+    save_session_result(request.session, 'last_result', result)
+    return JsonResponse({
+        'success': True,
+        'data': {
+            'title': result['title'],
+            'channel': result['channel'],
+            'duration': result['duration'],
+            'executive_summary': result['executive_summary'],
+            'timestamps': result['timestamps'],
+            'full_summary': result['full_summary'],
+            'processing_time': result['processing_time'],
+            'degraded': result.get('degraded', []),
+            'mode': result.get('mode', 'full'),
+            'result_id': request.session['last_result_id'],
+            # Set when a fast result will be replaced by the full one; poll it like any other job
+            'upgrade_job_id': result.get('upgrade_job_id')
+        }
+    })
+
+@require_http_methods(["GET"])
+def job_events(request, job_id):
+    """SSE feed of a job's progress, ending with a complete or error event"""
+    job_queue = get_job_queue()
+    if job_queue.get(job_id) is None:
+        return unknown_job_response()
+
+    def generate_job_events():
+        last_event = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                yield f"data: {json.dumps({'type': 'error', 'content': 'Job expired', 'complete': True})}\n\n"
+                return
+            event = job_event(job)
+            if event != last_event:
+                yield event
+                last_event = event
+            if job['status'] in JOB_FINISHED_STATES:
+                return
+            time.sleep(JOB_EVENT_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(generate_job_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -1,7 +1,6 @@
 import os
 import json
 import re
-import time
 from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
@@ -11,6 +10,8 @@ import sys
 # Add the parent directory to Python path to import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from .views import save_session_result, load_session_result
+
 def is_valid_youtube_url(url):
     """Validate YouTube URL format"""
     youtube_patterns = [
@@ -51,6 +52,7 @@ def process_video_interactive(request):
         
         # Import here to avoid circular imports
         from core_summarizer import YouTubeSummarizer
+        from dataclasses import asdict
         
         summarizer = YouTubeSummarizer()
         
@@ -59,14 +61,14 @@ def process_video_interactive(request):
         if not subtitle_result['success']:
             return JsonResponse({
                 'success': False,
-                'error': subtitle_result['error']
+                'error': subtitle_result['error_message']
             })
         
         # Generate timestamps immediately
-        timestamps = summarizer.generate_timestamps(
-            subtitle_result['transcript'], 
-            subtitle_result['video_info']
-        )
+        timestamps = [
+            asdict(ts) for ts in summarizer.generate_timestamps(subtitle_result['transcript_index'])
+        ]
+        video_info = asdict(subtitle_result['video_info'])
         
         # Return timestamps immediately (partial response)
         partial_result = {
@@ -74,16 +76,17 @@ def process_video_interactive(request):
             'status': 'partial',
             'stage': 'timestamps_ready',
             'timestamps': timestamps,
-            'video_info': subtitle_result['video_info'],
+            'video_info': video_info,
             'processing_time': subtitle_result['processing_time']
         }
         
-        # Store partial result and video data for streaming
-        request.session['current_processing'] = {
-            'transcript': subtitle_result['transcript'],
+        # The transcript stays in the transcript cache; the rest goes to the result store
+        save_session_result(request.session, 'current_processing', {
+            'video_id': video_info['video_id'],
+            'language': subtitle_result['language'],
             'timestamps': timestamps,
-            'video_info': subtitle_result['video_info']
-        }
+            'video_info': video_info
+        })
         
         return JsonResponse(partial_result)
         
@@ -96,10 +99,10 @@ def process_video_interactive(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def stream_summary(request):
-    """Stream the full summary with typewriter effect"""
+    """Stream the full summary token by token as the LLM produces it"""
     try:
-        # Get processing data from session
-        processing_data = request.session.get('current_processing')
+        # Get processing data by the id in the session
+        processing_data = load_session_result(request.session, 'current_processing')
         if not processing_data:
             return JsonResponse({
                 'success': False,
@@ -109,36 +112,45 @@ def stream_summary(request):
         def generate_summary_stream():
             """Generator function for streaming summary"""
             try:
-                from core_summarizer import YouTubeSummarizer
+                from core_summarizer import YouTubeSummarizer, Timestamp, VideoInfo
                 
                 summarizer = YouTubeSummarizer()
                 
-                # Generate full summary
-                full_summary = summarizer.summarize_full_video(
-                    processing_data['transcript'],
-                    processing_data['timestamps'],
-                    processing_data['video_info']
+                # Reload the transcript by reference (a transcript cache hit)
+                subtitle_result = summarizer.extract_subtitles(
+                    f"https://www.youtube.com/watch?v={processing_data['video_id']}",
+                    processing_data.get('language', 'en')
                 )
-                
-                if not full_summary:
-                    yield f"data: {{\"error\": \"Failed to generate summary\"}}\n\n"
+                if not subtitle_result['success']:
+                    yield f"data: {{\"error\": \"Failed to load transcript\"}}\n\n"
                     return
                 
-                # Split summary into sentences for streaming
-                sentences = re.split(r'(?<=[.!?])\s+', full_summary)
+                # Pass provider tokens straight through as they arrive
+                chunks = []
+                for chunk in summarizer.summarize_full_video_stream(
+                    subtitle_result['transcript_text'],
+                    [Timestamp(**ts) for ts in processing_data['timestamps']],
+                    VideoInfo(**processing_data['video_info']),
+                    subtitle_result['transcript_index']
+                ):
+                    chunks.append(chunk)
+                    chunk_data = {
+                        'type': 'token',
+                        'content': chunk,
+                        'index': len(chunks) - 1,
+                        'complete': False
+                    }
+                    yield f"data: {json.dumps(chunk_data)}\n\n"
                 
-                # Stream each sentence with a small delay
-                for i, sentence in enumerate(sentences):
-                    if sentence.strip():
-                        chunk_data = {
-                            'type': 'sentence',
-                            'content': sentence.strip() + ' ',
-                            'index': i,
-                            'total': len(sentences),
-                            'complete': False
-                        }
-                        yield f"data: {json.dumps(chunk_data)}\n\n"
-                        time.sleep(0.1)  # Small delay for typewriter effect
+                full_summary = ''.join(chunks)
+                if not full_summary:
+                    error_data = {
+                        'type': 'error',
+                        'content': 'Failed to generate summary: all LLM providers unavailable',
+                        'complete': True
+                    }
+                    yield f"data: {json.dumps(error_data)}\n\n"
+                    return
                 
                 # Send completion signal
                 completion_data = {
@@ -149,14 +161,17 @@ def stream_summary(request):
                 }
                 yield f"data: {json.dumps(completion_data)}\n\n"
                 
-                # Store complete result in session
+                # Store the complete result; the session middleware already saved before the body started streaming
                 complete_result = {
                     'success': True,
+                    'video_id': processing_data['video_id'],
+                    'language': processing_data.get('language', 'en'),
                     'timestamps': processing_data['timestamps'],
                     'full_summary': full_summary,
                     'video_info': processing_data['video_info']
                 }
-                request.session['last_result'] = complete_result
+                save_session_result(request.session, 'last_result', complete_result)
+                request.session.save()
                 
             except Exception as e:
                 error_data = {
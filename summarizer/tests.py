@@ -0,0 +1,884 @@
+import asyncio
+import json
+import gc
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from benchmarks.fixtures import synthetic_transcript
+from core_summarizer import YouTubeSummarizer, parse_title_list
+from deadline import Deadline, deadline_scope
+from extractive import ExtractiveSummarizer
+from job_queue import JOB_COMPLETED, JobQueue
+import llm_handler
+from llm_handler import MultiLLMHandler, ProviderState
+from metrics import LATENCY_BUCKETS, MetricsRegistry
+from prompt_budget import TokenCounter
+from rate_limiter import RateLimitExceeded, RateLimiter
+from result_store import ResultStore
+from segmentation import TextTilingSegmenter
+from single_flight import SingleFlight
+from sqlite_store import SQLiteStore
+import storage_codec
+from steps import Call, Gather, run_steps, run_steps_async
+from text_utils import simple_sentence_tokenize
+from transcript_cache import TranscriptCache
+from transcript_index import TranscriptIndex
+
+
+class ProviderStateConcurrencyTests(SimpleTestCase):
+    """Concurrent recorders must not overwrite each other's updates"""
+
+    THREADS = 8
+    CALLS_PER_THREAD = 50
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _run_concurrently(self, target):
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            barrier.wait()
+            for _ in range(self.CALLS_PER_THREAD):
+                target()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _shared_state(self) -> ProviderState:
+        return ProviderState(SQLiteStore('provider_state', path=os.path.join(self.tmpdir.name, 'state.sqlite3')))
+
+    def test_record_call_counts_every_sample(self):
+        state = self._shared_state()
+        self._run_concurrently(lambda: state.record_call('gemini', 1.0, True))
+        self.assertEqual(state.get('gemini')['samples'], self.THREADS * self.CALLS_PER_THREAD)
+
+    def test_record_call_counts_every_sample_in_memory(self):
+        state = ProviderState(None)
+        self._run_concurrently(lambda: state.record_call('gemini', 1.0, False))
+        self.assertEqual(state.get('gemini')['samples'], self.THREADS * self.CALLS_PER_THREAD)
+
+    def test_record_tokens_keeps_every_increment(self):
+        state = self._shared_state()
+        self._run_concurrently(lambda: state.record_tokens('mistral', 10, 3))
+        totals = state.get('mistral')
+        calls = self.THREADS * self.CALLS_PER_THREAD
+        self.assertEqual(totals['token_calls'], calls)
+        self.assertEqual(totals['prompt_tokens'], 10 * calls)
+        self.assertEqual(totals['completion_tokens'], 3 * calls)
+
+
+class StalledHandler(BaseHTTPRequestHandler):
+    """Accepts a request and never answers"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.release.wait(5)
+
+    def log_message(self, *args):
+        pass
+
+
+class LLMHandlerRecordingTests(SimpleTestCase):
+    """Hedged wins count as fallbacks, streams feed the latency stats, stalled calls time out"""
+
+    def setUp(self):
+        self.metrics = MetricsRegistry(None)
+        patcher = mock.patch('llm_handler.get_metrics', return_value=self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handler = MultiLLMHandler(ProviderState(None))
+
+    def _use_providers(self, gemini: dict, mistral: dict):
+        providers = [dict(name='gemini', label='Gemini', available=True, **gemini),
+                     dict(name='mistral', label='Mistral-7B', available=True, **mistral)]
+        patcher = mock.patch.object(self.handler, '_providers', return_value=providers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hedge_answering_for_slow_primary_counts_a_fallback(self):
+        self._use_providers({'call': lambda prompt: time.sleep(0.5) or 'slow'}, {'call': lambda prompt: 'fast'})
+        with mock.patch('llm_handler.LLM_HEDGING', True), \
+                mock.patch.object(self.handler, '_hedge_delay', return_value=0.05):
+            self.assertEqual(self.handler.generate_content('prompt'), 'fast')
+
+        self.assertEqual(
+            self.metrics.collect().get('summarizer_llm_fallbacks_total{provider="gemini",to="mistral"}'), 1
+        )
+
+    def test_streams_record_latency_and_outcome(self):
+        def stream(prompt):
+            time.sleep(0.05)
+            yield 'partial '
+            yield 'answer'
+
+        def broken(prompt):
+            raise RuntimeError('unavailable')
+            yield
+
+        self._use_providers({'stream': broken}, {'stream': stream})
+        with mock.patch('llm_handler.LLM_ADAPTIVE_ROUTING', False):
+            self.assertEqual(''.join(self.handler.generate_content_stream('prompt')), 'partial answer')
+
+        samples = self.metrics.collect()
+        self.assertEqual(samples['summarizer_llm_call_duration_seconds_count{outcome="failure",provider="gemini"}'], 1)
+        self.assertEqual(samples['summarizer_llm_call_duration_seconds_count{outcome="success",provider="mistral"}'], 1)
+        self.assertGreaterEqual(self.handler.provider_state.get('mistral')['latency_ewma'], 0.05)
+
+    def test_mistral_call_times_out_on_a_stalled_server(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StalledHandler)
+        server.release = threading.Event()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(server.release.set)
+        self.handler.together_model = 'model'
+
+        with mock.patch('llm_handler.LLM_CALL_TIMEOUT', 0.3), \
+                mock.patch('llm_handler.together.api_key', 'key'), \
+                mock.patch('llm_handler.together.api_base_complete', f"http://127.0.0.1:{server.server_port}/"):
+            started = time.monotonic()
+            self.assertIsNone(self.handler._call_mistral('prompt', max_retries=1))
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class DeferredJobTests(SimpleTestCase):
+    """Videos deferred while providers are down are queued once when submitted"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        store = SQLiteStore('jobs', path=os.path.join(self.tmpdir.name, 'state.sqlite3'))
+        self.runs = []
+        self.queue = JobQueue(store, lambda url, report, mode: self.runs.append((url, mode)) or {'success': True}, workers=1)
+        self.addCleanup(self.queue._executor.shutdown)
+
+    def test_submit_deferred_queues_each_video_once(self):
+        url = 'https://www.youtube.com/watch?v=abcdefghijk'
+        self.queue.defer(url)
+        self.queue.defer(url)
+
+        job_ids = self.queue.submit_deferred()
+        self.queue._executor.shutdown(wait=True)
+
+        self.assertEqual(len(job_ids), 1)
+        self.assertEqual(self.queue.get(job_ids[0])['status'], JOB_COMPLETED)
+        self.assertEqual(self.runs, [(url, 'full')])
+        self.assertEqual(self.queue.submit_deferred(), [])
+
+
+class TokenCounterTests(SimpleTestCase):
+    """Counting never waits for the tokenizer to load"""
+
+    def test_counts_are_estimated_while_the_encoding_loads(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        counter = TokenCounter(chars_per_token=4)
+
+        with mock.patch.object(TokenCounter, '_load_encoding', lambda self: release.wait(5)):
+            started = time.monotonic()
+            self.assertEqual(counter.count('x' * 40), 10)
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertEqual(counter.method, 'estimate')
+
+    def test_unavailable_encoding_falls_back_to_estimate(self):
+        counter = TokenCounter(encoding_name='no_such_encoding', chars_per_token=4)
+        counter._load_encoding()
+        self.assertEqual(counter.count('x' * 40), 10)
+        self.assertEqual(counter.truncate('word ' * 20, 5), 'word word word word')
+
+
+class ParseTitleListTests(SimpleTestCase):
+    """Batched titles land on their own sections or the reply is rejected whole"""
+
+    def test_json_array_in_prose_and_code_fence(self):
+        reply = 'Here you go:\n```json\n["Intro to Graphs", {"title": "Shortest Paths"}, "Trees"]\n```'
+        self.assertEqual(parse_title_list(reply, 3), ['Intro to Graphs', 'Shortest Paths', 'Trees'])
+
+    def test_keyed_objects_keep_their_sections(self):
+        reply = '[{"section": 3, "title": "Trees"}, {"section": 1, "title": "Graphs"}]'
+        self.assertEqual(parse_title_list(reply, 3), ['Graphs', None, 'Trees'])
+
+    def test_numbered_list_may_skip_sections(self):
+        reply = '1. Graphs\n3) Trees\n4: Heaps'
+        self.assertEqual(parse_title_list(reply, 4), ['Graphs', None, 'Trees', 'Heaps'])
+
+    def test_short_unnumbered_reply_is_rejected(self):
+        self.assertIsNone(parse_title_list('["Graphs", "Trees"]', 3))
+
+    def test_over_long_replies_are_rejected(self):
+        self.assertIsNone(parse_title_list('["Graphs", "Trees", "Heaps", "Tries"]', 3))
+        self.assertIsNone(parse_title_list('1. Graphs\n2. Trees\n3. Heaps\n4. Tries', 3))
+
+    def test_repeated_numbers_are_rejected(self):
+        self.assertIsNone(parse_title_list('1. Graphs\n1. Trees', 2))
+
+
+class Snippet:
+    """Stand-in for a youtube-transcript-api snippet object"""
+    __slots__ = ('text', 'start', 'duration')
+
+    def __init__(self, text: str, start: float, duration: float):
+        self.text = text
+        self.start = start
+        self.duration = duration
+
+
+class TranscriptMemoryTests(SimpleTestCase):
+    """A long transcript kept as a TranscriptIndex costs a fraction of the old dict/list copies"""
+
+    MINUTES = 180
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fixture = synthetic_transcript(cls.MINUTES)
+
+    def _fetch(self):
+        # Fresh strings each time, as a transcript fetch would allocate them
+        return [Snippet(''.join(entry['text']), entry['start'], entry['duration']) for entry in self.fixture]
+
+    @staticmethod
+    def _legacy_representation(snippets):
+        """What extract_subtitles used to keep: a list of dicts, the formatted text and sentence strings"""
+        transcript_list = [{'text': s.text, 'start': s.start, 'duration': s.duration} for s in snippets]
+        transcript_text = '\n'.join(entry['text'] for entry in transcript_list)
+        sentences, sentence_segments = [], []
+        for i, entry in enumerate(transcript_list):
+            for sentence in simple_sentence_tokenize(entry['text']):
+                sentences.append(sentence)
+                sentence_segments.append(i)
+        return transcript_list, transcript_text, sentences, sentence_segments
+
+    @staticmethod
+    def _indexed_representation(snippets):
+        index = TranscriptIndex(
+            [s.text for s in snippets], [s.start for s in snippets], [s.duration for s in snippets]
+        )
+        index.sentence_count  # sentence offsets are part of what the pipeline keeps
+        return index
+
+    def _measure(self, build):
+        """(retained, peak) bytes of fetching the transcript and building the representation"""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            snippets = self._fetch()
+            kept = build(snippets)
+            del snippets
+            gc.collect()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del kept
+        return retained, peak
+
+    def test_index_uses_less_memory_than_dict_list(self):
+        legacy_retained, legacy_peak = self._measure(self._legacy_representation)
+        indexed_retained, indexed_peak = self._measure(self._indexed_representation)
+
+        self.assertGreaterEqual(legacy_retained / indexed_retained, 2.5)
+        self.assertLess(indexed_peak, legacy_peak)
+
+
+class TranscriptCacheTests(SimpleTestCase):
+    """The memory tier stays within its byte budget; the disk tier expires, trims and refills memory"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _store(self) -> SQLiteStore:
+        return SQLiteStore('transcripts', path=os.path.join(self.tmpdir.name, 'state.sqlite3'))
+
+    @staticmethod
+    def _entry(words: int):
+        texts = [f"caption {i} about graphs" for i in range(words)]
+        index = TranscriptIndex(texts, [float(i) for i in range(words)], [1.0] * words)
+        return {'transcript': index, 'video_info': {'title': 'Graphs'}, 'language': 'en'}
+
+    def test_memory_tier_evicts_least_recently_used_by_bytes(self):
+        entry = self._entry(50)
+        size = TranscriptCache._entry_size(entry)
+        cache = TranscriptCache(max_memory_bytes=2 * size + size // 2)
+        for video_id in ('a', 'b'):
+            cache.set(video_id, 'en', entry)
+        cache.get('a', 'en')
+        cache.set('c', 'en', entry)
+
+        self.assertIsNotNone(cache.get('a', 'en'))
+        self.assertIsNone(cache.get('b', 'en'))
+        self.assertEqual(cache.get_stats()['memory_bytes'], 2 * size)
+
+    def test_expired_entries_are_misses_and_purged(self):
+        cache = TranscriptCache(ttl=0.05, disk_store=self._store())
+        cache.set('a', 'en', self._entry(10))
+        time.sleep(0.1)
+
+        self.assertEqual(cache.maintain()['expired'], 1)
+        self.assertIsNone(cache.get('a', 'en'))
+        self.assertEqual(cache.get_stats()['memory_entries'], 0)
+
+    def test_disk_hit_is_promoted_to_memory(self):
+        store = self._store()
+        TranscriptCache(disk_store=store).set('a', 'en', self._entry(10))
+        cache = TranscriptCache(disk_store=store)
+
+        entry = cache.get('a', 'en')
+        self.assertEqual(entry['transcript'].text, self._entry(10)['transcript'].text)
+        cache.get('a', 'en')
+        stats = cache.get_stats()
+        self.assertEqual((stats['disk_hits'], stats['memory_hits'], stats['memory_entries']), (1, 1, 1))
+
+    def test_disk_tier_is_trimmed_to_its_cap(self):
+        store = self._store()
+        cache = TranscriptCache(disk_store=store, max_disk_bytes=1, maintenance_interval=3)
+        for video_id in ('a', 'b', 'c'):
+            cache.set(video_id, 'en', self._entry(10))
+
+        self.assertEqual(store.size()[0], 0)
+        cache.clear_memory()
+        self.assertIsNone(cache.get('a', 'en'))
+
+
+class ExtractiveSamplingTests(SimpleTestCase):
+    """Long transcripts are sampled, but every picked sentence still comes from its own section"""
+
+    def test_long_transcript_sentences_stay_in_their_sections(self):
+        lines = [entry['text'] for entry in synthetic_transcript(600)]
+        sections = ['\n'.join(lines[i::4]) for i in range(4)]
+        summarizer = ExtractiveSummarizer(sample_chars=20000)
+
+        overview, per_section = summarizer.summarize(sections, overview_count=3, section_count=2)
+
+        self.assertEqual(len(overview), 3)
+        flattened = [' '.join(section.split()) for section in sections]
+        for text, sentences in zip(flattened, per_section):
+            self.assertEqual(len(sentences), 2)
+            for sentence in sentences:
+                self.assertIn(sentence.rstrip('.'), text)
+        self.assertEqual(len(summarizer.section_titles(sections)), 4)
+
+
+class StepsTests(SimpleTestCase):
+    """A stage written once behaves the same run blocking and on asyncio"""
+
+    def _stage(self):
+        try:
+            yield Call(int, 'not a number')
+        except ValueError:
+            value = yield Call(int, '41')
+        slow = lambda: (yield Call(time.sleep, 0.5))
+        quick = lambda: (yield Call(int, '1'))
+        results = yield Gather([quick, slow, quick], limit=2, on_error=lambda i, e: type(e).__name__, timeout=0.2)
+        return value + 1, results
+
+    def test_blocking_and_async_runs_agree(self):
+        expected = (42, [1, 'TimeoutError', 1])
+        self.assertEqual(run_steps(self._stage()), expected)
+        self.assertEqual(asyncio.run(run_steps_async(self._stage())), expected)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Concurrent callers for one key share a single run, in one process and across workers"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _store(self) -> SQLiteStore:
+        return SQLiteStore('flights', path=os.path.join(self.tmpdir.name, 'state.sqlite3'))
+
+    def _leader_in_thread(self, flight: SingleFlight, key: str, fn):
+        outcome = {}
+        thread = threading.Thread(target=lambda: outcome.update(value=flight.do(key, fn, timeout=5)))
+        thread.start()
+        return thread, outcome
+
+    def test_in_process_callers_share_one_run_and_its_progress(self):
+        flight = SingleFlight(None)
+        started, release = threading.Event(), threading.Event()
+        runs, progress = [], []
+
+        def fn():
+            runs.append(1)
+            report = flight.reporter('video')
+            report('subtitles', 0.1)
+            started.set()
+            release.wait(5)
+            report('summary', 0.9)
+            return 'result'
+
+        thread, leader = self._leader_in_thread(flight, 'video', fn)
+        started.wait(5)
+        flight.watch('video', lambda stage, fraction: progress.append(stage))
+        threading.Timer(0.1, release.set).start()
+        follower = flight.do('video', fn, timeout=5)
+        thread.join()
+
+        self.assertEqual(runs, [1])
+        self.assertEqual(leader['value'], ('result', False))
+        self.assertEqual(follower, ('result', True))
+        self.assertEqual(progress, ['subtitles', 'summary'])
+        self.assertEqual(flight.get_stats()['leaders'], 1)
+        self.assertEqual(flight.get_stats()['followers'], 1)
+        self.assertEqual(flight.get_stats()['in_flight'], 0)
+
+    def test_other_worker_reads_published_result(self):
+        store = self._store()
+        worker_a = SingleFlight(store, poll_interval=0.02)
+        worker_b = SingleFlight(store, poll_interval=0.02)
+        started, release = threading.Event(), threading.Event()
+        runs = []
+
+        def fn():
+            runs.append(1)
+            started.set()
+            release.wait(5)
+            return {'summary': 'shared'}
+
+        thread, leader = self._leader_in_thread(worker_a, 'video', fn)
+        started.wait(5)
+        threading.Timer(0.1, release.set).start()
+        follower = worker_b.do('video', fn, timeout=5)
+        thread.join()
+
+        self.assertEqual(runs, [1])
+        self.assertEqual(leader['value'], ({'summary': 'shared'}, False))
+        self.assertEqual(follower, ({'summary': 'shared'}, True))
+        self.assertIsNone(store.get('lease:video'))
+
+    def test_follower_runs_itself_after_timeout(self):
+        worker_a = SingleFlight(self._store(), poll_interval=0.02)
+        worker_b = SingleFlight(self._store(), poll_interval=0.02)
+        started, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'late'
+
+        thread, _ = self._leader_in_thread(worker_a, 'video', slow)
+        started.wait(5)
+        self.assertEqual(worker_b.do('video', lambda: 'own', timeout=0.1), ('own', False))
+        release.set()
+        thread.join()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+class StoredResultAccessTests(SimpleTestCase):
+    """/results/<id>/ serves only results handed to the requesting session"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        store = ResultStore(SQLiteStore('stored_results', path=os.path.join(self.tmpdir.name, 'state.sqlite3')))
+        patcher = mock.patch('summarizer.views.get_result_store', return_value=store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = store
+
+    def _session_with(self, key, result):
+        from summarizer.views import save_session_result
+        session = self.client.session
+        save_session_result(session, key, result)
+        session.save()
+        self.client.cookies['sessionid'] = session.session_key
+        return session[f'{key}_id']
+
+    def test_own_result_is_served(self):
+        result_id = self._session_with('last_result', {'success': True, 'video_id': 'abcdefghijk'})
+        response = self.client.get(reverse('summarizer:stored_result', args=[result_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['video_id'], 'abcdefghijk')
+
+    def test_other_documents_are_not_served(self):
+        self._session_with('current_processing', {'video_id': 'abcdefghijk', 'timestamps': []})
+        in_progress_id = self.client.session['current_processing_id']
+        foreign_id = self.store.put({'success': True, 'video_id': 'someoneelse'})
+
+        for result_id in (in_progress_id, foreign_id):
+            response = self.client.get(reverse('summarizer:stored_result', args=[result_id]))
+            self.assertEqual(response.status_code, 404)
+
+
+class RateLimiterTests(SimpleTestCase):
+    """Buckets admit a burst, queue the overflow, refuse past max_wait and honour a 429 backoff"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _limiter(self, store=None, **kwargs) -> RateLimiter:
+        # One request and ten tokens per second, two seconds of burst
+        return RateLimiter(store, limits={'gemini': (60, 600)}, burst_seconds=2, **kwargs)
+
+    def _store(self) -> SQLiteStore:
+        return SQLiteStore('rate_limits', path=os.path.join(self.tmpdir.name, 'state.sqlite3'))
+
+    def test_burst_is_admitted_then_calls_queue(self):
+        limiter = self._limiter()
+        self.assertEqual(limiter.reserve('gemini', 'key', 1), 0.0)
+        self.assertEqual(limiter.reserve('gemini', 'key', 1), 0.0)
+        self.assertAlmostEqual(limiter.reserve('gemini', 'key', 1), 1.0, delta=0.05)
+        self.assertAlmostEqual(limiter.reserve('gemini', 'key', 1), 2.0, delta=0.05)
+
+    def test_token_dimension_sets_the_wait(self):
+        limiter = self._limiter()
+        self.assertAlmostEqual(limiter.reserve('gemini', 'key', 30), 1.0, delta=0.05)
+
+    def test_refused_call_reserves_nothing(self):
+        limiter = self._limiter()
+        limiter.reserve('gemini', 'key', 1)
+        limiter.reserve('gemini', 'key', 1)
+
+        self.assertIsNone(limiter.reserve('gemini', 'key', 1, max_wait=0.5))
+        self.assertAlmostEqual(limiter.reserve('gemini', 'key', 1), 1.0, delta=0.05)
+
+    def test_acquire_waits_or_raises(self):
+        limiter = self._limiter(max_wait=0.5)
+        limiter.reserve('gemini', 'key', 1)
+        limiter.reserve('gemini', 'key', 19)
+
+        started = time.monotonic()
+        limiter.acquire('gemini', 'key', 1, max_wait=2)
+        self.assertGreater(time.monotonic() - started, 0.8)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('gemini', 'key', 1)
+
+    def test_backoff_holds_the_next_request(self):
+        limiter = self._limiter()
+        limiter.backoff('gemini', 'key', 5)
+        self.assertAlmostEqual(limiter.reserve('gemini', 'key', 1), 5.0, delta=0.05)
+
+    def test_buckets_are_per_key_and_shared_through_the_store(self):
+        store = self._store()
+        first, second = self._limiter(store), self._limiter(store)
+        first.backoff('gemini', 'key', 5)
+
+        self.assertAlmostEqual(second.reserve('gemini', 'key', 1), 5.0, delta=0.05)
+        self.assertEqual(second.reserve('gemini', 'other', 1), 0.0)
+        self.assertEqual(second.reserve('mistral', 'key', 1), 0.0)
+
+
+class StorageCodecTests(SimpleTestCase):
+    """Frames round-trip under every compression and reject damaged or foreign payloads"""
+
+    document = {'video_id': 'abcdefghijk', 'sections': [{'title': 'Intro', 'start': 0.0}] * 40, 'ok': True}
+
+    def test_round_trip_under_each_compression(self):
+        for compression in storage_codec.COMPRESSION_IDS:
+            with self.subTest(compression=compression):
+                frame = storage_codec.encode(self.document, schema=3, compression=compression)
+                self.assertEqual(storage_codec.frame_info(frame)['compression'], compression)
+                self.assertEqual(storage_codec.decode(frame, schema=3), self.document)
+
+    def test_small_bodies_are_stored_uncompressed(self):
+        frame = storage_codec.encode({'a': 1}, compression='lzma')
+        self.assertEqual(storage_codec.frame_info(frame)['compression'], 'none')
+        self.assertEqual(storage_codec.decode(frame), {'a': 1})
+
+    def test_numpy_arrays_are_serialized(self):
+        frame = storage_codec.encode({'vector': np.arange(3, dtype=np.float32)})
+        self.assertEqual(storage_codec.decode(frame), {'vector': [0.0, 1.0, 2.0]})
+
+    def test_damaged_or_foreign_frames_are_rejected(self):
+        frame = storage_codec.encode(self.document, schema=3)
+        flipped = bytearray(frame)
+        flipped[-1] ^= 0xFF
+        newer = bytearray(frame)
+        newer[2] = storage_codec.CODEC_VERSION + 1
+        cases = {
+            'checksum': bytes(flipped),
+            'codec version': bytes(newer),
+            'magic': b'XX' + frame[2:],
+            'truncated': frame[:4],
+            'not a frame': json.dumps(self.document).encode('utf-8'),
+        }
+        for name, payload in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(storage_codec.CodecError):
+                    storage_codec.decode(payload, schema=3)
+
+    def test_schema_mismatch_is_rejected(self):
+        frame = storage_codec.encode(self.document, schema=3)
+        with self.assertRaises(storage_codec.CodecError):
+            storage_codec.decode(frame, schema=4)
+        self.assertEqual(storage_codec.decode(frame), self.document)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    """Samples add up across labels and workers and render as Prometheus text"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_counters_and_histograms_accumulate(self):
+        metrics = MetricsRegistry(None)
+        metrics.inc('summarizer_llm_retries_total', provider='gemini')
+        metrics.inc('summarizer_llm_retries_total', 2, provider='gemini')
+        metrics.inc('summarizer_llm_retries_total', provider='mistral')
+        metrics.observe('summarizer_llm_call_duration_seconds', 0.3, provider='gemini')
+        metrics.observe('summarizer_llm_call_duration_seconds', 4.0, provider='gemini')
+
+        samples = metrics.collect()
+        self.assertEqual(samples['summarizer_llm_retries_total{provider="gemini"}'], 3.0)
+        self.assertEqual(samples['summarizer_llm_retries_total{provider="mistral"}'], 1.0)
+        bucket = 'summarizer_llm_call_duration_seconds_bucket{le="%s",provider="gemini"}'
+        self.assertNotIn(bucket % '0.25', samples)
+        self.assertEqual(samples[bucket % '0.5'], 1.0)
+        self.assertEqual(samples[bucket % '5'], 2.0)
+        self.assertEqual(samples[bucket % '+Inf'], 2.0)
+        self.assertEqual(samples['summarizer_llm_call_duration_seconds_sum{provider="gemini"}'], 4.3)
+        self.assertEqual(samples['summarizer_llm_call_duration_seconds_count{provider="gemini"}'], 2.0)
+
+    def test_workers_share_totals_through_the_store(self):
+        store = SQLiteStore('metrics', path=os.path.join(self.tmpdir.name, 'state.sqlite3'))
+        first, second = MetricsRegistry(store, flush_interval=3600), MetricsRegistry(store, flush_interval=3600)
+        first.inc('summarizer_llm_quota_exhausted_total', provider='gemini')
+        second.inc('summarizer_llm_quota_exhausted_total', provider='gemini')
+
+        self.assertEqual(first.collect(), {'summarizer_llm_quota_exhausted_total{provider="gemini"}': 1.0})
+        self.assertEqual(second.collect(), {'summarizer_llm_quota_exhausted_total{provider="gemini"}': 2.0})
+
+    def test_undeclared_or_disabled_metrics(self):
+        with self.assertRaises(ValueError):
+            MetricsRegistry(None).inc('summarizer_unknown_total')
+        with self.assertRaises(ValueError):
+            MetricsRegistry(None).inc('summarizer_llm_call_duration_seconds')
+        metrics = MetricsRegistry(None, enabled=False)
+        metrics.inc('summarizer_llm_retries_total', provider='gemini')
+        self.assertEqual(metrics.collect(), {})
+
+    def test_render_exposition_format(self):
+        metrics = MetricsRegistry(None)
+        metrics.inc('summarizer_cache_requests_total', 3, cache='result', result='hit')
+        metrics.inc('summarizer_cache_requests_total', cache='result', result='miss')
+        metrics.inc('summarizer_degraded_total', stage='titles', reason='say "no"\n')
+        metrics.observe('summarizer_stage_duration_seconds', 0.002, stage='pipeline')
+
+        lines = metrics.render().splitlines()
+        self.assertIn('# TYPE summarizer_cache_requests_total counter', lines)
+        self.assertIn('summarizer_cache_requests_total{cache="result",result="hit"} 3', lines)
+        self.assertIn('# TYPE summarizer_cache_hit_ratio gauge', lines)
+        self.assertIn('summarizer_cache_hit_ratio{cache="result"} 0.75', lines)
+        self.assertIn('summarizer_degraded_total{reason="say \\"no\\"\\n",stage="titles"} 1', lines)
+        self.assertNotIn('# TYPE summarizer_llm_tokens_total counter', lines)
+
+        series = [line.split(' ')[0] for line in lines if line.startswith('summarizer_stage_duration_seconds')]
+        self.assertEqual(series[0], 'summarizer_stage_duration_seconds_bucket{le="0.005",stage="pipeline"}')
+        self.assertEqual(series[-3:], [
+            'summarizer_stage_duration_seconds_bucket{le="+Inf",stage="pipeline"}',
+            'summarizer_stage_duration_seconds_sum{stage="pipeline"}',
+            'summarizer_stage_duration_seconds_count{stage="pipeline"}',
+        ])
+        self.assertEqual(len(series), len(LATENCY_BUCKETS) + 3)
+
+
+class TextTilingTests(SimpleTestCase):
+    """Vocabulary shifts become boundaries at the right segment; sparse results are padded"""
+
+    topics = [
+        ['galaxy', 'telescope', 'orbit', 'planet', 'comet', 'nebula'],
+        ['recipe', 'butter', 'flour', 'oven', 'dough', 'sugar'],
+        ['engine', 'piston', 'gearbox', 'clutch', 'torque', 'exhaust'],
+        ['violin', 'melody', 'chord', 'rhythm', 'tempo', 'harmony'],
+    ]
+
+    def _index(self) -> TranscriptIndex:
+        # Four topics of 20 six-second segments, two sentences per segment
+        texts = [
+            f"The {words[i % 6]} and the {words[(i + 1) % 6]}. It meets the {words[(i + 3) % 6]}."
+            for words in self.topics for i in range(20)
+        ]
+        return TranscriptIndex(texts, [6.0 * i for i in range(len(texts))], [6.0] * len(texts))
+
+    @staticmethod
+    def _strong(boundaries):
+        return [(b['index'], b['start_time']) for b in boundaries if b['confidence'] >= 0.7]
+
+    def test_topic_shifts_are_found_at_segment_indices(self):
+        boundaries = TextTilingSegmenter(min_sections=1).detect_boundaries(self._index())
+
+        self.assertEqual(boundaries[0], {'index': 0, 'start_time': 0.0, 'confidence': 1.0})
+        self.assertEqual(self._strong(boundaries), [(0, 0.0), (20, 120.0), (40, 240.0), (60, 360.0)])
+        times = [b['start_time'] for b in boundaries]
+        self.assertEqual(times, sorted(times))
+
+    def test_grouped_units_find_the_same_shifts(self):
+        boundaries = TextTilingSegmenter(min_sections=1, max_units=40).detect_boundaries(self._index())
+        self.assertEqual(self._strong(boundaries), [(0, 0.0), (20, 120.0), (40, 240.0), (60, 360.0)])
+
+    def test_sparse_results_are_padded_and_spaced(self):
+        segmenter = TextTilingSegmenter(min_sections=8, max_sections=9)
+        boundaries = segmenter.detect_boundaries(self._index())
+
+        self.assertEqual(len(boundaries), 9)
+        self.assertTrue(any(b['confidence'] == 0.5 for b in boundaries))
+        times = [b['start_time'] for b in boundaries]
+        self.assertTrue(all(later - earlier > segmenter.min_section_seconds
+                            for earlier, later in zip(times, times[1:])))
+
+    def test_short_transcripts(self):
+        segmenter = TextTilingSegmenter()
+        self.assertEqual(segmenter.detect_boundaries(TranscriptIndex([], [], [])), [])
+        self.assertEqual(segmenter.detect_boundaries(TranscriptIndex(['Hi there.'], [5.0], [2.0])),
+                         [{'index': 0, 'start_time': 5.0, 'confidence': 1.0}])
+
+
+class TranscriptIndexTests(SimpleTestCase):
+    """Time lookups bisect the segment arrays; ranges and sentences map back to segments"""
+
+    def setUp(self):
+        # A one-second pause between the second and third segments
+        self.index = TranscriptIndex(
+            ['Hello there. General idea', 'is simple!', 'Next part?', 'End'],
+            [0.0, 2.0, 5.0, 9.0], [2.0, 2.0, 3.0, 1.0]
+        )
+
+    def test_segment_at(self):
+        cases = {-1.0: 0, 0.0: 0, 1.9: 0, 2.0: 1, 4.5: 1, 5.0: 2, 100.0: 3}
+        for seconds, expected in cases.items():
+            with self.subTest(seconds=seconds):
+                self.assertEqual(self.index.segment_at(seconds), expected)
+        with self.assertRaises(IndexError):
+            TranscriptIndex([], [], []).segment_at(0.0)
+
+    def test_segments_and_text_between(self):
+        self.assertEqual(self.index.segments_between(1.0, 5.5), (0, 3))
+        self.assertEqual(self.index.segments_between(4.2, 4.8), (2, 2))
+        self.assertEqual(self.index.text_between(2.5, 9.5), 'is simple!\nNext part?\nEnd')
+        self.assertEqual(self.index.text_between(4.2, 4.8), '')
+
+    def test_text_range_is_clamped(self):
+        self.assertEqual(self.index.text_range(-3, 99), self.index.text)
+        self.assertEqual(self.index.text_range(1, 2), 'is simple!')
+        self.assertEqual(self.index.text_range(3, 1), '')
+        self.assertEqual(self.index.duration, 10.0)
+
+    def test_sentences_map_to_their_segments(self):
+        self.assertEqual(self.index.sentence_texts, ['Hello there', 'General idea', 'is simple', 'Next part', 'End'])
+        self.assertEqual(self.index.sentence_segments.tolist(), [0, 0, 1, 2, 3])
+        self.assertEqual(self.index.sentence_starts.tolist(), [0.0, 0.0, 2.0, 5.0, 9.0])
+        self.assertEqual(self.index.sentence_ends.tolist(), [2.0, 2.0, 4.0, 8.0, 10.0])
+        expected = [s for i in range(len(self.index)) for s in simple_sentence_tokenize(self.index.segment_text(i))]
+        self.assertEqual(self.index.sentence_texts, expected)
+
+    def test_round_trips(self):
+        for rebuilt in (TranscriptIndex.from_dict(self.index.to_dict()),
+                        TranscriptIndex.from_list(self.index.to_list())):
+            self.assertEqual(rebuilt.text, self.index.text)
+            self.assertEqual(rebuilt.to_list(), self.index.to_list())
+            self.assertEqual(rebuilt.segment_at(4.5), 1)
+        self.assertEqual(self.index.to_list(2, 99), [
+            {'text': 'Next part?', 'start': 5.0, 'duration': 3.0},
+            {'text': 'End', 'start': 9.0, 'duration': 1.0},
+        ])
+
+
+class TitleHandler:
+    """LLM handler stand-in: titles each excerpt after its first word, tracking concurrent calls"""
+
+    def __init__(self, delay: float = 0.1, fail_on=(), stall_on=()):
+        self.delay = delay
+        self.fail_on = set(fail_on)
+        self.stall_on = set(stall_on)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def prompt_token_budget(self, tokens: int) -> int:
+        return tokens
+
+    def generate_content(self, prompt: str, task_type: str = 'general') -> str:
+        word = prompt.split('"""', 2)[1].split()[0]
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(1.0 if word in self.stall_on else self.delay)
+            if word in self.fail_on:
+                raise RuntimeError(f"no title for {word}")
+            return f'"{word.capitalize()} explained."'
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@mock.patch('core_summarizer.TITLE_MODE', 'parallel')
+@mock.patch('core_summarizer.TITLE_CONCURRENCY', 3)
+class ConcurrentTitleTests(SimpleTestCase):
+    """Per-section title calls overlap up to TITLE_CONCURRENCY and come back in section order"""
+
+    words = ['orbit', 'butter', 'piston', 'violin', 'glacier', 'protein', 'circuit', 'sonnet']
+
+    def _summarizer(self, handler: TitleHandler) -> YouTubeSummarizer:
+        with mock.patch('core_summarizer.get_llm_handler', return_value=handler), \
+                mock.patch('core_summarizer.get_transcript_cache'), mock.patch('core_summarizer.get_result_cache'):
+            return YouTubeSummarizer()
+
+    def _contexts(self):
+        return [f"{word} is the topic here" for word in self.words]
+
+    def test_calls_overlap_up_to_the_limit_in_order(self):
+        handler = TitleHandler()
+        summarizer = self._summarizer(handler)
+
+        started = time.monotonic()
+        titles = run_steps(summarizer._section_titles_steps(self._contexts()))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(titles, [f"{word.capitalize()} explained" for word in self.words])
+        self.assertEqual(handler.max_in_flight, 3)
+        self.assertLess(elapsed, 0.1 * len(self.words))
+
+    def test_async_calls_overlap_up_to_the_limit_in_order(self):
+        handler = TitleHandler()
+        titles = asyncio.run(run_steps_async(self._summarizer(handler)._section_titles_steps(self._contexts())))
+
+        self.assertEqual(titles, [f"{word.capitalize()} explained" for word in self.words])
+        self.assertEqual(handler.max_in_flight, 3)
+
+    @mock.patch('core_summarizer.TITLE_TIMEOUT', 0.3)
+    def test_failed_and_stalled_sections_are_left_untitled(self):
+        handler = TitleHandler(fail_on={'butter'}, stall_on={'sonnet'})
+        deadline = Deadline()
+        with deadline_scope(deadline):
+            titles = run_steps(self._summarizer(handler)._section_titles_steps(self._contexts()))
+
+        self.assertEqual([i for i, title in enumerate(titles) if title is None], [1, 7])
+        self.assertEqual(titles[0], 'Orbit explained')
+        self.assertEqual(deadline.get_degraded(), [{'stage': 'pipeline', 'reason': 'extractive section titles'}])
+
+    def test_untitled_sections_get_keyphrase_titles(self):
+        handler = TitleHandler(delay=0, fail_on={'glacier'})
+        summarizer = self._summarizer(handler)
+        index = TranscriptIndex(self._contexts(), [60.0 * i for i in range(len(self.words))], [60.0] * len(self.words))
+        boundaries = [{'index': i, 'start_time': 60.0 * i, 'confidence': 1.0} for i in range(len(self.words))]
+
+        with mock.patch.object(summarizer, 'analyze_content_structure', return_value=boundaries), \
+                mock.patch('core_summarizer.get_metrics', return_value=MetricsRegistry(None)):
+            timestamps = summarizer.generate_timestamps(index)
+
+        self.assertEqual([timestamp.section_id for timestamp in timestamps], list(range(1, len(self.words) + 1)))
+        self.assertEqual(timestamps[0].title, 'Orbit explained')
+        self.assertTrue(timestamps[4].title)
+        self.assertNotEqual(timestamps[4].title, 'Glacier explained')
+        self.assertEqual(handler.calls, len(self.words))
@@ -1,16 +1,39 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import streaming_views
+from . import job_views
 
 app_name = 'summarizer'
 
+# Under ASGI the pipeline endpoints run on the event loop instead of pinning a worker
+if getattr(settings, 'SUMMARIZER_ASYNC_VIEWS', False):
+    from . import async_views
+    pipeline_views = async_views
+    interactive_views = async_views
+    job_event_views = async_views
+else:
+    pipeline_views = views
+    interactive_views = streaming_views
+    job_event_views = job_views
+
 urlpatterns = [
     path('', views.home, name='home'),
-    path('process/', views.process_video, name='process_video'),
-    path('demo/', views.demo_video, name='demo_video'),
+    path('process/', pipeline_views.process_video, name='process_video'),
+    path('demo/', pipeline_views.demo_video, name='demo_video'),
     path('result/', views.result, name='result'),
+    path('section/<str:video_id>/<int:section_id>/', pipeline_views.section_summary, name='section_summary'),
+    path('results/<str:result_id>/', views.stored_result, name='stored_result'),
+    path('llm-status/', views.get_llm_status, name='llm_status'),
+    # No trailing slash: the path Prometheus scrapes by default
+    path('metrics', views.metrics, name='metrics'),
     # Interactive streaming endpoints
     path('interactive/', streaming_views.interactive_view, name='interactive'),
-    path('process-interactive/', streaming_views.process_video_interactive, name='process_video_interactive'),
-    path('stream-summary/', streaming_views.stream_summary, name='stream_summary'),
+    path('process-interactive/', interactive_views.process_video_interactive, name='process_video_interactive'),
+    path('stream-summary/', interactive_views.stream_summary, name='stream_summary'),
+    # Background jobs
+    path('jobs/', job_views.submit_job, name='submit_job'),
+    path('jobs/<str:job_id>/', job_views.job_status, name='job_status'),
+    path('jobs/<str:job_id>/result/', job_views.job_result, name='job_result'),
+    path('jobs/<str:job_id>/events/', job_event_views.job_events, name='job_events'),
 ]
\ No newline at end of file
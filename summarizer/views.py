@@ -15,8 +15,51 @@ from queue import Queue
 # Add the parent directory to Python path to import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core_summarizer import process_video as process_video_core
-from llm_handler import MultiLLMHandler
+from core_summarizer import process_video as process_video_core, YouTubeSummarizer, Timestamp
+from llm_handler import get_llm_handler
+from result_store import get_result_store
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS_DISABLED, get_metrics
+
+# Results live in the result store; sessions keep only their ids, so a session
+# row stays a few bytes however often it is rewritten
+# Finished results a session may fetch again by id from /results/<id>/, newest last
+SESSION_RESULT_KEYS = ('last_result',)
+SESSION_RESULT_IDS = 20
+
+def save_session_result(session, key, result):
+    """Store a result server-side and remember its id in the session under '<key>_id'"""
+    result_id = get_result_store().put(result)
+    session[f'{key}_id'] = result_id
+    if key in SESSION_RESULT_KEYS:
+        owned = [owned_id for owned_id in session.get('result_ids', []) if owned_id != result_id]
+        session['result_ids'] = (owned + [result_id])[-SESSION_RESULT_IDS:]
+
+def load_session_result(session, key):
+    """The result saved under key, or None if there is none or it expired"""
+    result_id = session.get(f'{key}_id')
+    return get_result_store().get(result_id) if result_id else None
+
+def session_sections(session, video_id):
+    """(sections, transcript language) the user was shown for video_id (interactive or full result)
+
+    Sections are None when the session has no result for the video.
+    """
+    for key in ('current_processing', 'last_result'):
+        result = load_session_result(session, key)
+        if result and result.get('video_id') == video_id and result.get('timestamps'):
+            return [Timestamp(**ts) for ts in result['timestamps']], result.get('language', 'en')
+    return None, 'en'
+
+def section_response(result):
+    """JSON response for a get_section_summary result"""
+    if not result['success']:
+        status = {'SECTION_NOT_FOUND': 404, 'SECTIONS_NOT_READY': 409}.get(result.get('error_code'), 200)
+        return JsonResponse({
+            'success': False,
+            'error': result.get('error_message', 'Failed to summarize section'),
+            'suggestions': result.get('suggestions', [])
+        }, status=status)
+    return JsonResponse({'success': True, 'data': result})
 
 def home(request):
     """Home page view"""
@@ -44,11 +87,10 @@ def process_video(request):
             })
         
         # Process the video
-        result = process_video_core(video_url)
+        result = process_video_core(video_url, mode=data.get('mode', 'full'))
         
         if result['success']:
-            # Store result in session
-            request.session['last_result'] = result
+            save_session_result(request.session, 'last_result', result)
             
             return JsonResponse({
                 'success': True,
@@ -59,7 +101,12 @@ def process_video(request):
                     'executive_summary': result['executive_summary'],
                     'timestamps': result['timestamps'],
                     'full_summary': result['full_summary'],
-                    'processing_time': result['processing_time']
+                    'processing_time': result['processing_time'],
+                    'degraded': result.get('degraded', []),
+                    'mode': result.get('mode', 'full'),
+                    'result_id': request.session['last_result_id'],
+                    # Set when a fast result will be replaced by the full one; poll it via the jobs API
+                    'upgrade_job_id': result.get('upgrade_job_id')
                 }
             })
         else:
@@ -85,7 +132,7 @@ def demo_video(request):
         result = process_video_core(demo_url)
         
         if result['success']:
-            request.session['last_result'] = result
+            save_session_result(request.session, 'last_result', result)
             return render(request, 'summarizer/result_simple.html', {
                 'video_title': result['title'],
                 'channel': result['channel'],
@@ -104,6 +151,19 @@ def demo_video(request):
         messages.error(request, f'Demo error: {str(e)}')
         return redirect('summarizer:home')
 
+@require_http_methods(["GET"])
+def section_summary(request, video_id, section_id):
+    """Summary of one section, generated on first request; neighbouring sections are prefetched"""
+    try:
+        timestamps, language = session_sections(request.session, video_id)
+        result = YouTubeSummarizer().get_section_summary(video_id, section_id, timestamps, language=language)
+        return section_response(result)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
 def is_valid_youtube_url(url):
     """Validate YouTube URL format"""
     patterns = [
@@ -120,17 +180,45 @@ def is_valid_youtube_url(url):
 def get_llm_status(request):
     """Get LLM provider status"""
     try:
-        handler = MultiLLMHandler()
-        status = handler.get_status()
+        status = get_llm_handler().get_status()
         return JsonResponse(status)
     except Exception as e:
         return JsonResponse({
             'error': str(e)
         }) 
     
+@require_http_methods(["GET"])
+def metrics(request):
+    """Pipeline, provider and cache metrics of every worker, in Prometheus text format"""
+    if METRICS_DISABLED:
+        return HttpResponse(status=404)
+    registry = get_metrics()
+    try:
+        status = get_llm_handler().get_status()
+        for provider in ('gemini', 'mistral'):
+            available = status[provider]['available'] and not status[provider]['quota_exceeded']
+            registry.set_gauge('summarizer_llm_provider_available', int(available), provider=provider)
+    except Exception:
+        # Provider gauges are optional; the counters are still worth serving
+        pass
+    return HttpResponse(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 def result(request):
-    # Get the last result from session
-    result = request.session.get('last_result')
+    # Get the last result from the store by the id in the session
+    result = load_session_result(request.session, 'last_result')
     if not result:
         return redirect('summarizer:home')
-    return render(request, 'summarizer/result_simple.html', result)
\ No newline at end of file
+    return render(request, 'summarizer/result_simple.html', result)
+
+@require_http_methods(["GET"])
+def stored_result(request, result_id):
+    """A result this session was given, by id, as returned in 'result_id'"""
+    # Ids are content hashes, so only ones handed to this session are served
+    owned = result_id in request.session.get('result_ids', [])
+    result = get_result_store().get(result_id) if owned else None
+    if result is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Result not found or expired'
+        }, status=404)
+    return JsonResponse({'success': True, 'data': result})
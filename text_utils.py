@@ -0,0 +1,25 @@
+import re
+
+# Simple text processing functions to replace NLTK
+def simple_sentence_tokenize(text):
+    """Simple sentence tokenization without NLTK"""
+    # Split on common sentence endings
+    sentences = re.split(r'[.!?]+', text)
+    return [s.strip() for s in sentences if s.strip()]
+
+def simple_word_tokenize(text):
+    """Simple word tokenization without NLTK"""
+    # Split on whitespace and punctuation
+    words = re.findall(r'\b\w+\b', text.lower())
+    return words
+
+def get_stop_words():
+    """Get common English stop words"""
+    return {
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 
+        'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with',
+        'i', 'you', 'your', 'we', 'they', 'them', 'this', 'these', 'those', 'but', 'or',
+        'if', 'then', 'else', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each',
+        'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own',
+        'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now'
+    }
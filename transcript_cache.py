@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import storage_codec
+from metrics import get_metrics
+from sqlite_store import SQLiteStore
+from transcript_index import TranscriptIndex
+
+logger = logging.getLogger(__name__)
+
+# Cache limits (overridable per deployment)
+TRANSCRIPT_CACHE_MEMORY_BYTES = int(os.getenv('TRANSCRIPT_CACHE_MEMORY_MB', '64')) * 1024 * 1024
+TRANSCRIPT_CACHE_DISK_BYTES = int(os.getenv('TRANSCRIPT_CACHE_DISK_MB', '512')) * 1024 * 1024
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', str(7 * 24 * 3600)))
+TRANSCRIPT_CACHE_DISABLED = os.getenv('TRANSCRIPT_CACHE_DISABLED', 'False') == 'True'
+# Expired disk entries are purged and the disk cap enforced once per this many writes
+TRANSCRIPT_CACHE_MAINTENANCE_INTERVAL = int(os.getenv('TRANSCRIPT_CACHE_MAINTENANCE_INTERVAL', '50'))
+# Bump when the stored entry layout changes; older entries then read as misses
+TRANSCRIPT_SCHEMA_VERSION = 1
+
+class TranscriptCache:
+    """Two-tier transcript store: in-process LRU on top of a shared SQLite table with TTL
+
+    Entries hold the transcript as a TranscriptIndex, the video info as a dict,
+    the language actually used and the languages available for the video. The
+    memory tier keeps the index object itself, so hits share one compact copy.
+    The disk tier is capped at max_disk_bytes by dropping the least recently
+    written transcripts.
+    """
+
+    def __init__(self, max_memory_bytes: int = TRANSCRIPT_CACHE_MEMORY_BYTES,
+                 ttl: float = TRANSCRIPT_CACHE_TTL, disk_store: Optional[SQLiteStore] = None,
+                 max_disk_bytes: int = TRANSCRIPT_CACHE_DISK_BYTES,
+                 maintenance_interval: int = TRANSCRIPT_CACHE_MAINTENANCE_INTERVAL):
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl = ttl
+        self.disk_store = disk_store
+        self.max_disk_bytes = max_disk_bytes
+        self.maintenance_interval = maintenance_interval
+        self._writes = 0
+        self._memory = OrderedDict()  # key -> (entry, size_bytes, expires_at)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(video_id: str, language: str) -> str:
+        return f"{video_id}:{language}"
+
+    def get(self, video_id: str, language: str) -> Optional[Dict]:
+        """Look up a transcript entry, promoting disk hits into memory"""
+        key = self.make_key(video_id, language)
+
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                entry, size, expires_at = item
+                if expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    get_metrics().inc('summarizer_cache_requests_total', cache='transcript', result='hit')
+                    return entry
+                self._evict(key)
+
+        if self.disk_store is not None:
+            try:
+                payload = self.disk_store.get(key)
+            except Exception as e:
+                logger.warning(f"Transcript disk cache read failed: {e}")
+                payload = None
+            entry = None
+            if payload is not None:
+                try:
+                    entry = self._decode(payload)
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Discarding unreadable transcript cache entry {key}: {e}")
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store_in_memory(key, entry, self._entry_size(entry))
+                get_metrics().inc('summarizer_cache_requests_total', cache='transcript', result='hit')
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        get_metrics().inc('summarizer_cache_requests_total', cache='transcript', result='miss')
+        return None
+
+    def set(self, video_id: str, language: str, entry: Dict):
+        """Write an entry through both tiers"""
+        key = self.make_key(video_id, language)
+
+        with self._lock:
+            self._store_in_memory(key, entry, self._entry_size(entry))
+
+        if self.disk_store is None:
+            return
+        try:
+            self.disk_store.set(key, self._encode(entry), ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Transcript disk cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.maintenance_interval == 0
+        if due:
+            self.maintain()
+
+    def maintain(self) -> Dict:
+        """Purge expired disk entries, then trim the disk tier to its size cap"""
+        if self.disk_store is None:
+            return {'expired': 0, 'trimmed': 0}
+        try:
+            expired = self.disk_store.purge_expired()
+            trimmed = self.disk_store.trim(self.max_disk_bytes)
+        except Exception as e:
+            logger.warning(f"Transcript disk cache maintenance failed: {e}")
+            return {'expired': 0, 'trimmed': 0}
+        if expired or trimmed:
+            logger.info(f"Transcript cache maintenance: {expired} expired, {trimmed} trimmed")
+        return {'expired': expired, 'trimmed': trimmed}
+
+    @staticmethod
+    def _encode(entry: Dict) -> bytes:
+        data = dict(entry, transcript=entry['transcript'].to_dict())
+        return storage_codec.encode(data, schema=TRANSCRIPT_SCHEMA_VERSION)
+
+    @staticmethod
+    def _decode(payload: bytes) -> Dict:
+        entry = storage_codec.decode(payload, schema=TRANSCRIPT_SCHEMA_VERSION)
+        entry['transcript'] = TranscriptIndex.from_dict(entry['transcript'])
+        return entry
+
+    @staticmethod
+    def _entry_size(entry: Dict) -> int:
+        # The index dominates; metadata is small and roughly constant
+        return entry['transcript'].nbytes + 1024
+
+    def _store_in_memory(self, key: str, entry: Dict, size: int):
+        """Insert into the LRU tier and evict until under the byte budget (lock held)"""
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._evict(key)
+        self._memory[key] = (entry, size, time.time() + self.ttl)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            oldest_key = next(iter(self._memory))
+            self._evict(oldest_key)
+
+    def _evict(self, key: str):
+        _, size, _ = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'max_disk_bytes': self.max_disk_bytes
+            }
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Process-wide transcript cache, or None when disabled"""
+    global _transcript_cache
+    if TRANSCRIPT_CACHE_DISABLED:
+        return None
+    if _transcript_cache is None:
+        with _transcript_cache_lock:
+            if _transcript_cache is None:
+                try:
+                    disk_store = SQLiteStore('transcripts', default_ttl=TRANSCRIPT_CACHE_TTL)
+                except Exception as e:
+                    logger.warning(f"Transcript disk cache unavailable, using memory only: {e}")
+                    disk_store = None
+                _transcript_cache = TranscriptCache(disk_store=disk_store)
+    return _transcript_cache
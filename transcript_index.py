@@ -0,0 +1,180 @@
+import re
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Sentence pieces between terminators, matching simple_sentence_tokenize
+SENTENCE_RE = re.compile(r'[^.!?]+')
+
+class TranscriptIndex:
+    """Array-backed transcript with O(log n) time lookups and contiguous text ranges
+
+    Segment timings are NumPy arrays and all segment text lives in one
+    newline-joined string, so a range of segments is a single slice of that
+    string rather than a join over dicts. Sentences are split per segment and
+    mapped back to their segment, which keeps sentence positions (used for
+    segmentation) and segment positions (used everywhere else) from being mixed up.
+    """
+
+    def __init__(self, texts: Sequence[str], starts: Sequence[float], durations: Sequence[float]):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.ends = self.starts + self.durations
+        self.text = '\n'.join(texts)
+
+        # Segment i is text[char_starts[i]:char_ends[i]]; the +1 skips the joining newline
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        self.char_ends = np.cumsum(lengths + 1) - 1
+        self.char_starts = self.char_ends - lengths
+
+        self._sentence_char_starts = None
+        self._sentence_char_ends = None
+        self._sentence_segments = None
+
+    @classmethod
+    def from_list(cls, transcript_list: List[Dict]) -> 'TranscriptIndex':
+        """Build from the [{'text', 'start', 'duration'}] list format"""
+        return cls(
+            [entry['text'] for entry in transcript_list],
+            [entry['start'] for entry in transcript_list],
+            [entry['duration'] for entry in transcript_list]
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TranscriptIndex':
+        """Rebuild from to_dict() output"""
+        index = cls.__new__(cls)
+        index.text = data['text']
+        index.starts = np.asarray(data['starts'], dtype=np.float64)
+        index.durations = np.asarray(data['durations'], dtype=np.float64)
+        index.ends = index.starts + index.durations
+        lengths = np.asarray(data['lengths'], dtype=np.int64)
+        index.char_ends = np.cumsum(lengths + 1) - 1
+        index.char_starts = index.char_ends - lengths
+        index._sentence_char_starts = None
+        index._sentence_char_ends = None
+        index._sentence_segments = None
+        return index
+
+    def to_dict(self) -> Dict:
+        """Compact JSON-friendly form: the text blob plus per-segment lengths and timings"""
+        return {
+            'text': self.text,
+            'lengths': (self.char_ends - self.char_starts).tolist(),
+            'starts': self.starts.tolist(),
+            'durations': self.durations.tolist()
+        }
+
+    @classmethod
+    def ensure(cls, transcript: Union['TranscriptIndex', List[Dict]]) -> 'TranscriptIndex':
+        """Accept either an index or a transcript list"""
+        return transcript if isinstance(transcript, cls) else cls.from_list(transcript)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return float(self.ends.max()) if len(self) else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index"""
+        arrays = [self.starts, self.durations, self.ends, self.char_starts, self.char_ends,
+                  self._sentence_char_starts, self._sentence_char_ends, self._sentence_segments]
+        return sys.getsizeof(self.text) + sum(a.nbytes for a in arrays if a is not None)
+
+    def segment_text(self, i: int) -> str:
+        return self.text[self.char_starts[i]:self.char_ends[i]]
+
+    def text_range(self, start: int, end: int) -> str:
+        """Text of segments [start, end) as one slice, newline separated"""
+        start = max(0, start)
+        end = min(len(self), end)
+        if start >= end:
+            return ''
+        return self.text[self.char_starts[start]:self.char_ends[end - 1]]
+
+    def segment_at(self, seconds: float) -> int:
+        """Index of the segment playing at the given time (bisect on start times)"""
+        if not len(self):
+            raise IndexError("Empty transcript")
+        idx = int(np.searchsorted(self.starts, seconds, side='right')) - 1
+        return min(max(idx, 0), len(self) - 1)
+
+    def segments_between(self, start_seconds: float, end_seconds: float) -> Tuple[int, int]:
+        """Segment range [start, end) overlapping the time window"""
+        start = int(np.searchsorted(self.ends, start_seconds, side='right'))
+        end = int(np.searchsorted(self.starts, end_seconds, side='left'))
+        return start, max(start, end)
+
+    def text_between(self, start_seconds: float, end_seconds: float) -> str:
+        return self.text_range(*self.segments_between(start_seconds, end_seconds))
+
+    def _split_sentences(self):
+        """Record sentence offsets into the text blob (same rules as simple_sentence_tokenize)"""
+        char_starts = []
+        char_ends = []
+        counts = np.zeros(len(self), dtype=np.int64)
+        text = self.text
+        for i in range(len(self)):
+            segment_start = int(self.char_starts[i])
+            segment_end = int(self.char_ends[i])
+            count = 0
+            for match in SENTENCE_RE.finditer(text, segment_start, segment_end):
+                start, end = match.span()
+                # Trim surrounding whitespace without copying the sentence
+                while start < end and text[start].isspace():
+                    start += 1
+                while end > start and text[end - 1].isspace():
+                    end -= 1
+                if start < end:
+                    char_starts.append(start)
+                    char_ends.append(end)
+                    count += 1
+            counts[i] = count
+        self._sentence_char_starts = np.asarray(char_starts, dtype=np.int64)
+        self._sentence_char_ends = np.asarray(char_ends, dtype=np.int64)
+        self._sentence_segments = np.repeat(np.arange(len(self)), counts)
+
+    @property
+    def sentence_count(self) -> int:
+        if self._sentence_segments is None:
+            self._split_sentences()
+        return len(self._sentence_segments)
+
+    @property
+    def sentence_texts(self) -> List[str]:
+        """Sentence strings, sliced from the text blob on demand (not kept)"""
+        if self._sentence_segments is None:
+            self._split_sentences()
+        text = self.text
+        return [text[start:end] for start, end in zip(self._sentence_char_starts.tolist(),
+                                                      self._sentence_char_ends.tolist())]
+
+    @property
+    def sentence_segments(self) -> np.ndarray:
+        """Segment index of every sentence"""
+        if self._sentence_segments is None:
+            self._split_sentences()
+        return self._sentence_segments
+
+    @property
+    def sentence_starts(self) -> np.ndarray:
+        return self.starts[self.sentence_segments]
+
+    @property
+    def sentence_ends(self) -> np.ndarray:
+        return self.ends[self.sentence_segments]
+
+    def to_list(self, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Materialize segments back into the transcript list format"""
+        end = len(self) if end is None else min(end, len(self))
+        return [
+            {
+                'text': self.segment_text(i),
+                'start': float(self.starts[i]),
+                'duration': float(self.durations[i])
+            } for i in range(max(0, start), end)
+        ]